@@ -0,0 +1,1091 @@
+"""출퇴근 기록 공용 모듈
+
+봇(bot.py)과 오프라인 도구(export.py, report.py, break_report.py)가 함께 쓰는 시각/시간대 변환,
+성능 지표, 기록 조회와 내보내기, 월별 보관, 휴식 통계, 근무 리포트 엔진을 담습니다.
+불러오기만 해서는 로그 파일, 스레드, 저장소 연결을 만들지 않으므로 CLI에서 그대로 가져다 씁니다.
+"""
+import csv
+import gzip
+import itertools
+import multiprocessing
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, time as dt_time, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dotenv import load_dotenv
+
+# 공용 설정 (봇 전용 설정은 bot.py)
+load_dotenv()
+DB_FILE = os.getenv('DB_FILE', 'work_records.db')
+# 월별 보관 파일 위치
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archive')
+# 근무 리포트에서 하루 근무가 이 시간을 넘으면 넘은 만큼을 초과 근무로 집계
+OVERTIME_HOURS = float(os.getenv('OVERTIME_HOURS', '8'))
+# 길드별 시간대를 정하지 않았을 때 쓸 시간대 (예: Asia/Seoul, 비워두면 서버 로컬 시간대)
+DEFAULT_TIMEZONE = os.getenv('DEFAULT_TIMEZONE', '')
+
+# 시각 변환
+def to_epoch(moment):
+    """로컬 시각(datetime)을 저장용 epoch 초로 변환"""
+    return int(moment.timestamp())
+
+def from_epoch(seconds):
+    """저장된 epoch 초를 로컬 시각(datetime)으로 변환"""
+    return datetime.fromtimestamp(seconds)
+
+def day_start_epoch(day):
+    """날짜(date)의 0시를 epoch 초로 변환"""
+    return to_epoch(datetime.combine(day, dt_time()))
+
+def iso_week_key(date_str):
+    """'YYYY-MM-DD' 날짜를 ISO 주차 키('YYYY-Www')로 변환"""
+    year, week, _ = datetime.strptime(date_str, '%Y-%m-%d').isocalendar()
+    return f"{year}-W{week:02d}"
+
+# 길드별 시간대
+# 길드 ID -> ZoneInfo (시작 시 guild_settings에서 적재, 없으면 DEFAULT_TIMEZONE 또는 서버 로컬 시간대)
+DEFAULT_ZONE = ZoneInfo(DEFAULT_TIMEZONE) if DEFAULT_TIMEZONE else None
+guild_zones = {}
+
+def guild_zone(guild_id):
+    """길드 시간대 (None이면 서버 로컬 시간대)"""
+    return guild_zones.get(guild_id, DEFAULT_ZONE)
+
+def guild_date(guild_id, moment=None):
+    """서버 로컬 시각(naive) moment의 길드 시간대 날짜"""
+    return (moment or datetime.now()).astimezone(guild_zone(guild_id)).date()
+
+def guild_midnight(guild_id, day):
+    """길드 시간대 day 0시를 서버 로컬 시각(naive)으로"""
+    zone = guild_zone(guild_id)
+    if zone is None:
+        return datetime.combine(day, dt_time())
+    return datetime.combine(day, dt_time(), zone).astimezone().replace(tzinfo=None)
+
+def load_guild_zones(conn):
+    """guild_settings의 길드별 시간대를 guild_zones에 적재 (봇 없이 파일을 읽는 도구용)"""
+    rows = conn.execute('SELECT guild_id, timezone FROM guild_settings WHERE timezone IS NOT NULL')
+    for guild_id, timezone_name in rows:
+        try:
+            guild_zones[guild_id] = ZoneInfo(timezone_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+
+# SQLite 메타데이터 (bot_meta)
+def get_meta(conn, key):
+    row = conn.execute('SELECT value FROM bot_meta WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else None
+
+def set_meta(conn, key, value):
+    conn.execute('''
+        INSERT INTO bot_meta (key, value) VALUES (?, ?)
+        ON CONFLICT (key) DO UPDATE SET value = excluded.value
+    ''', (key, value))
+
+# 성능 지표 (Prometheus 텍스트 형식)
+class Histogram:
+    """라벨별 누적 버킷 히스토그램"""
+
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, *labelvalues):
+        series = self._series.get(labelvalues)
+        if series is None:
+            # [버킷별 개수..., +Inf 개수], 합계, 개수
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def series(self):
+        return list(self._series.items())
+
+    def quantile(self, q, *labelvalues):
+        """버킷 경계를 선형 보간한 근사 분위수 (관측값이 없으면 None)"""
+        series = self._series.get(labelvalues)
+        if not series or not series[2]:
+            return None
+        counts, _, count = series
+        target = q * count
+        cumulative = 0
+        for i, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= target and bucket_count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (target - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labelvalues, (counts, total, count) in self._series.items():
+            labels = [f'{name}="{value}"' for name, value in zip(self.labelnames, labelvalues)]
+            cumulative = 0
+            for bound, bucket_count in zip(list(self.buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                bucket_labels = ','.join(labels + [f'le="{bound}"'])
+                lines.append(f'{self.name}_bucket{{{bucket_labels}}} {cumulative}')
+            suffix = f'{{{",".join(labels)}}}' if labels else ''
+            lines.append(f'{self.name}_sum{suffix} {total}')
+            lines.append(f'{self.name}_count{suffix} {count}')
+        return lines
+
+class Metrics:
+    """봇 전체 성능 지표 모음"""
+
+    def __init__(self):
+        self.command_duration = Histogram(
+            'attendance_command_duration_seconds', '명령어 처리 전체 시간', ('command',))
+        self.command_db = Histogram(
+            'attendance_command_db_seconds', '명령어 하나가 DB 호출에 쓴 시간', ('command',))
+        self.defer_to_followup = Histogram(
+            'attendance_command_defer_to_followup_seconds', 'defer 응답부터 followup 전송 시작까지 시간', ('command',))
+        self.followup_send = Histogram(
+            'attendance_followup_send_seconds', 'followup 전송 API 호출 시간', ('command',))
+        self.db_call = Histogram(
+            'attendance_db_call_seconds', 'DB 작업 대기+실행 시간', ('op',))
+        self.loop_lag = Histogram(
+            'attendance_event_loop_lag_seconds', '이벤트 루프 지연',
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+        self.job_duration = Histogram(
+            'attendance_job_duration_seconds', '스케줄 작업 실행 시간', ('job',))
+        self.command_errors = {}
+        self.collectors = []
+
+    def histograms(self):
+        return [self.command_duration, self.command_db, self.defer_to_followup, self.followup_send,
+                self.db_call, self.loop_lag, self.job_duration]
+
+    def render(self):
+        lines = []
+        for histogram in self.histograms():
+            lines.extend(histogram.render())
+        lines.append('# TYPE attendance_command_errors_total counter')
+        for command, count in self.command_errors.items():
+            lines.append(f'attendance_command_errors_total{{command="{command}"}} {count}')
+        for collect in self.collectors:
+            lines.extend(collect())
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+
+class job_timer:
+    """스케줄 작업 실행 시간을 기록하는 컨텍스트 매니저"""
+
+    def __init__(self, job):
+        self.job = job
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        metrics.job_duration.observe(self.elapsed, self.job)
+        return False
+
+# 개인 기록 조회 (키셋 페이지네이션)
+# 종류별 테이블, 정렬 키, 조회 컬럼, (길드, 날짜) -> 정렬 키 값 변환 (휴식은 길드 시간대 0시)
+# 정렬 키는 (guild_id, user_id, 키) 인덱스의 세 번째 컬럼
+HISTORY_KINDS = {
+    '근무': ('work_history', 'date', 'id, date, start_time, end_time, work_seconds, break_seconds',
+             lambda guild_id, day: day.isoformat()),
+    '휴식': ('break_history', 'start_time', 'id, start_time, end_time, reason, duration_seconds',
+             lambda guild_id, day: to_epoch(guild_midnight(guild_id, day))),
+}
+
+def fetch_history_page(conn, kind, guild_id, user_id, start_date, end_date, limit, after=None, before=None,
+                       schemas=('main',)):
+    """한 사용자의 기록 한 페이지를 최신순으로 반환 (OFFSET 없이 인덱스 탐색)
+
+    start_date~end_date(포함) 범위에서, after=(키, id)가 있으면 그보다 오래된 행을,
+    before=(키, id)가 있으면 그보다 최신인 행을 limit개 가져옵니다.
+    schemas는 읽을 데이터베이스 이름을 읽는 방향 순서대로 (기간이 겹치지 않아야 함)
+    내놓는 이터러블이며, 페이지가 차면 더 읽지 않습니다.
+    반환값: (행 목록, 같은 방향으로 더 있는지 여부)
+    """
+    table, key, columns, bound = HISTORY_KINDS[kind]
+    where = f'WHERE guild_id = ? AND user_id = ? AND {key} >= ? AND {key} < ?'
+    params = [guild_id, user_id, bound(guild_id, start_date), bound(guild_id, end_date + timedelta(days=1))]
+
+    if before is not None:
+        where += f' AND ({key}, id) > (?, ?)'
+        params += list(before)
+        order = f'ORDER BY {key} ASC, id ASC'
+    else:
+        if after is not None:
+            where += f' AND ({key}, id) < (?, ?)'
+            params += list(after)
+        order = f'ORDER BY {key} DESC, id DESC'
+
+    rows = []
+    for schema in schemas:
+        rows += conn.execute(f'SELECT {columns} FROM {schema}.{table} {where} {order} LIMIT ?',
+                             [*params, limit + 1 - len(rows)]).fetchall()
+        if len(rows) > limit:
+            break
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if before is not None:
+        rows.reverse()
+    return rows, has_more
+
+# 근무/휴식 기록 내보내기
+# 테이블별 내보낼 (컬럼 이름, SQL 식), 기간 조건에 쓰는 컬럼, 날짜 -> 조건 값 변환
+# 시각은 사람이 읽을 수 있도록 로컬 시각 문자열로 내보냄
+EXPORT_TABLES = {
+    'work_history': (
+        (
+            ('id', 'h.id'), ('guild_id', 'h.guild_id'), ('user_id', 'h.user_id'), ('username', 'u.username'),
+            ('date', 'h.date'),
+            ('start_time', "datetime(h.start_time, 'unixepoch', 'localtime')"),
+            ('end_time', "datetime(h.end_time, 'unixepoch', 'localtime')"),
+            ('work_seconds', 'h.work_seconds'), ('break_seconds', 'h.break_seconds'),
+        ),
+        'date',
+        lambda guild_id, day: day.isoformat(),
+    ),
+    'break_history': (
+        (
+            ('id', 'h.id'), ('guild_id', 'h.guild_id'), ('user_id', 'h.user_id'), ('username', 'u.username'),
+            ('reason', 'h.reason'),
+            ('start_time', "datetime(h.start_time, 'unixepoch', 'localtime')"),
+            ('end_time', "datetime(h.end_time, 'unixepoch', 'localtime')"),
+            ('duration_seconds', 'h.duration_seconds'),
+        ),
+        'start_time',
+        lambda guild_id, day: to_epoch(guild_midnight(guild_id, day)),
+    ),
+}
+
+# 문자열로 내보내는 컬럼 (나머지는 모두 정수)
+EXPORT_TEXT_COLUMNS = {'username', 'date', 'reason', 'start_time', 'end_time'}
+
+def require_sqlite_file(path):
+    """데이터베이스 파일을 직접 여는 기능은 SQLite 저장소에서만 사용 가능"""
+    if path is None:
+        raise RuntimeError('이 기능은 SQLite 저장소(STORAGE_BACKEND=sqlite)에서만 사용할 수 있습니다.')
+
+def open_snapshot(path):
+    """읽기 전용 연결을 열고 읽기 트랜잭션을 시작해 그 시점의 스냅샷을 고정
+
+    WAL 모드이므로 이 연결이 읽는 동안에도 봇의 쓰기는 막히지 않습니다.
+    """
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, isolation_level=None)
+    conn.execute('BEGIN')
+    # BEGIN은 지연 시작이므로 첫 읽기에서 스냅샷이 정해짐
+    conn.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+    return conn
+
+def iter_export_rows(conn, table, start_date, end_date, guild_id=None, batch_size=1000, schema='main'):
+    """start_date~end_date(포함) 기간의 행을 batch_size개씩 가져와 하나씩 내보내는 제너레이터"""
+    columns, key, bound = EXPORT_TABLES[table]
+    sql = (
+        f'SELECT {", ".join(expr for _, expr in columns)} FROM {schema}.{table} h '
+        f'LEFT JOIN {schema}.users u ON u.guild_id = h.guild_id AND u.user_id = h.user_id '
+        f'WHERE h.{key} >= ? AND h.{key} < ?'
+    )
+    params = [bound(guild_id, start_date), bound(guild_id, end_date + timedelta(days=1))]
+    if guild_id is not None:
+        sql += ' AND h.guild_id = ?'
+        params.append(guild_id)
+
+    # 정렬 없이 rowid 순서로 읽어 임시 정렬 버퍼를 만들지 않음
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+
+def write_csv_gz(rows, columns, dest):
+    """행 이터레이터를 gzip 압축 CSV로 기록하고 행 수 반환"""
+    count = 0
+    with gzip.open(dest, 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+def write_parquet(rows, columns, dest, batch_size=10000):
+    """행 이터레이터를 batch_size개씩 Parquet row group으로 기록하고 행 수 반환 (pyarrow 필요)
+
+    스키마는 첫 배치에서 추론하지 않고 컬럼 이름으로 미리 정하므로, 첫 배치에서 값이 모두 NULL인
+    컬럼(진행 중인 휴식의 end_time 등)이 있어도 이후 배치와 타입이 어긋나지 않습니다.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError('Parquet 내보내기에는 pyarrow가 필요합니다. (pip install pyarrow)')
+
+    schema = pa.schema([(name, pa.string() if name in EXPORT_TEXT_COLUMNS else pa.int64()) for name in columns])
+    count = 0
+    with pq.ParquetWriter(dest, schema, compression='zstd') as writer:
+        while True:
+            batch = [row for _, row in zip(range(batch_size), rows)]
+            if not batch:
+                break
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)], schema=schema
+            ))
+            count += len(batch)
+    return count
+
+def export_history(path, out_dir, start_date, end_date, guild_id=None, fmt='csv', archive_dir=ARCHIVE_DIR):
+    """두 히스토리 테이블을 하나의 스냅샷에서 스트리밍으로 내보내고 [(파일 경로, 행 수)] 반환
+
+    기간에 걸친 월별 보관 파일을 먼저 읽고 이어서 현재 데이터베이스를 읽습니다.
+    행을 한 번에 메모리에 올리지 않으므로 기록 수와 관계없이 메모리 사용량이 일정합니다.
+    휴식 기록의 기간 경계는 guild_id가 있으면 그 길드 시간대의 0시, 없으면(전체 길드) DEFAULT_TIMEZONE
+    또는 서버 로컬 시간대의 0시입니다. 파일의 start_time/end_time 문자열은 항상 서버 로컬 시각입니다.
+    """
+    require_sqlite_file(path)
+    suffix = f'{start_date:%Y%m%d}-{end_date:%Y%m%d}'
+    # 길드 시간대의 하루는 서버 날짜로 앞뒤 하루에 걸칠 수 있으므로 인접한 달의 보관 파일까지 봄
+    months = [month for month in archive_months(archive_dir)
+              if month_overlaps(month, start_date - timedelta(days=1), end_date + timedelta(days=1))]
+    results = []
+    conn = open_snapshot(path)
+    try:
+        load_guild_zones(conn)
+        for table, (columns, _, _) in EXPORT_TABLES.items():
+            columns = [name for name, _ in columns]
+            rows = itertools.chain(
+                iter_archive_export_rows(archive_dir, months, table, start_date, end_date, guild_id),
+                iter_export_rows(conn, table, start_date, end_date, guild_id),
+            )
+            if fmt == 'parquet':
+                dest = os.path.join(out_dir, f'{table}_{suffix}.parquet')
+                count = write_parquet(rows, columns, dest)
+            else:
+                dest = os.path.join(out_dir, f'{table}_{suffix}.csv.gz')
+                count = write_csv_gz(rows, columns, dest)
+            results.append((dest, count))
+    finally:
+        conn.close()
+    return results
+
+# 오래된 기록 보관 (월별 보관 파일)
+# 보관 파일은 archive/work_records-YYYY-MM.db 이며 그 달의 work_history, break_history와
+# 보관 당시의 사용자 이름(users)을 담습니다. bot_meta의 archive_before(YYYY-MM-01) 이전
+# 기록은 모두 보관 파일에 있고, 그 이후 기록은 모두 현재 데이터베이스에 있습니다.
+ARCHIVE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS archive.users (
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        username TEXT NOT NULL,
+        PRIMARY KEY (guild_id, user_id)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS archive.work_history (
+        id INTEGER PRIMARY KEY,
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        start_time INTEGER NOT NULL,
+        end_time INTEGER NOT NULL,
+        work_seconds INTEGER NOT NULL,
+        break_seconds INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS archive.break_history (
+        id INTEGER PRIMARY KEY,
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        reason TEXT NOT NULL,
+        start_time INTEGER NOT NULL,
+        end_time INTEGER,
+        duration_seconds INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS archive.attendance_events (
+        id INTEGER PRIMARY KEY,
+        guild_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        kind INTEGER NOT NULL,
+        at INTEGER NOT NULL,
+        detail TEXT
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS archive.idx_work_history_user_date ON work_history(guild_id, user_id, date)',
+    'CREATE INDEX IF NOT EXISTS archive.idx_work_history_date ON work_history(guild_id, date)',
+    'CREATE INDEX IF NOT EXISTS archive.idx_break_history_user ON break_history(guild_id, user_id, start_time)',
+]
+
+def archive_path(archive_dir, month):
+    return os.path.join(archive_dir, f'work_records-{month}.db')
+
+def archive_months(archive_dir):
+    """보관 파일이 있는 달('YYYY-MM') 목록 (오래된 순)"""
+    if not os.path.isdir(archive_dir):
+        return []
+    return sorted(name[len('work_records-'):-len('.db')] for name in os.listdir(archive_dir)
+                  if name.startswith('work_records-') and name.endswith('.db'))
+
+def month_bounds(month):
+    """'YYYY-MM' -> (그 달 1일, 다음 달 1일)"""
+    first = datetime.strptime(month, '%Y-%m').date()
+    return first, (first + timedelta(days=32)).replace(day=1)
+
+def month_overlaps(month, start_date, end_date):
+    first, next_first = month_bounds(month)
+    return first <= end_date and start_date < next_first
+
+def attach_archives(conn, archive_dir, months, lead=(), trail=()):
+    """lead의 스키마 이름, months의 보관 파일(하나씩 ATTACH해 'archive'), trail 순서로 내놓는 제너레이터
+
+    한 번에 하나만 붙여 두므로 SQLite의 ATTACH 개수 제한과 관계없이 여러 달을 읽을 수 있습니다.
+    conn은 트랜잭션 밖이어야 하고 uri=True로 열려 있어야 합니다.
+    """
+    yield from lead
+    for month in months:
+        path = archive_path(archive_dir, month)
+        if not os.path.exists(path):
+            continue
+        conn.execute('ATTACH DATABASE ? AS archive', (f'file:{path}?mode=ro',))
+        try:
+            yield 'archive'
+        finally:
+            conn.execute('DETACH DATABASE archive')
+    yield from trail
+
+def read_history_page(path, archive_dir, archive_before, kind, guild_id, user_id, start_date, end_date, limit,
+                      after=None, before=None):
+    """보관 기간에 걸친 fetch_history_page (별도 읽기 전용 연결에서 실행)
+
+    현재 데이터베이스와 기간에 걸친 월별 보관 파일을 최신순(before가 있으면 오래된 순)으로 읽으며,
+    커서 반대쪽에 있는 달은 건너뜁니다.
+    """
+    months = [month for month in archive_months(archive_dir)
+              if month < archive_before[:7] and month_overlaps(month, start_date, end_date)]
+    cursor = after or before
+    if cursor is not None:
+        key = cursor[0]
+        cursor_month = key[:7] if isinstance(key, str) else f'{from_epoch(key):%Y-%m}'
+        months = [month for month in months if (month >= cursor_month if before else month <= cursor_month)]
+
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    if before is not None:
+        schemas = attach_archives(conn, archive_dir, months, trail=['main'])
+    else:
+        schemas = attach_archives(conn, archive_dir, reversed(months), lead=['main'])
+    try:
+        return fetch_history_page(conn, kind, guild_id, user_id, start_date, end_date, limit, after, before,
+                                  schemas=schemas)
+    finally:
+        schemas.close()
+        conn.close()
+
+def iter_archive_export_rows(archive_dir, months, table, start_date, end_date, guild_id=None):
+    """월별 보관 파일의 내보낼 행을 오래된 달부터 차례로 내보내는 제너레이터"""
+    conn = sqlite3.connect(':memory:', uri=True)
+    try:
+        for schema in attach_archives(conn, archive_dir, months):
+            yield from iter_export_rows(conn, table, start_date, end_date, guild_id, schema=schema)
+    finally:
+        conn.close()
+
+def archive_history(path, archive_dir, cutoff):
+    """cutoff(달의 1일)보다 이전 달의 기록을 월별 보관 파일로 옮기고 [(달, 근무 행 수, 휴식 행 수)] 반환
+
+    봇의 DB 워커와 별도의 연결에서 한 달씩 처리합니다. 먼저 보관 파일에 복사해 커밋하고
+    (INSERT OR IGNORE이므로 중간에 중단돼도 다시 실행하면 이어서 처리됨) 그다음 현재 데이터베이스에서
+    보관 파일에 들어간 행만 지우면서 archive_before를 앞당깁니다. 출퇴근 이벤트 저널은 이미 스냅샷에
+    반영된 이벤트만 함께 옮깁니다.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    moved = []
+    try:
+        oldest = conn.execute('SELECT MIN(date) FROM work_history').fetchone()[0]
+        oldest_break = conn.execute('SELECT MIN(start_time) FROM break_history').fetchone()[0]
+        candidates = [value for value in (
+            oldest[:7] if oldest else None,
+            f'{from_epoch(oldest_break):%Y-%m}' if oldest_break is not None else None,
+        ) if value]
+        if not candidates:
+            return moved
+
+        month = min(candidates)
+        while month < f'{cutoff:%Y-%m}':
+            first, next_first = month_bounds(month)
+            day_range = (first.isoformat(), next_first.isoformat())
+            epoch_range = (day_start_epoch(first), day_start_epoch(next_first))
+
+            conn.execute('ATTACH DATABASE ? AS archive', (archive_path(archive_dir, month),))
+            try:
+                for statement in ARCHIVE_SCHEMA:
+                    conn.execute(statement)
+
+                # 1) 보관 파일에 복사 (이름은 보관 당시 값)
+                conn.execute('BEGIN')
+                work_rows = conn.execute('''
+                    INSERT OR IGNORE INTO archive.work_history
+                    SELECT id, guild_id, user_id, date, start_time, end_time, work_seconds, break_seconds
+                    FROM main.work_history WHERE date >= ? AND date < ?
+                ''', day_range).rowcount
+                break_rows = conn.execute('''
+                    INSERT OR IGNORE INTO archive.break_history
+                    SELECT id, guild_id, user_id, reason, start_time, end_time, duration_seconds
+                    FROM main.break_history WHERE start_time >= ? AND start_time < ?
+                ''', epoch_range).rowcount
+                snapshot_id = int(get_meta(conn, 'journal_snapshot') or 0)
+                conn.execute('''
+                    INSERT OR IGNORE INTO archive.attendance_events
+                    SELECT id, guild_id, user_id, kind, at, detail
+                    FROM main.attendance_events WHERE at >= ? AND at < ? AND id <= ?
+                ''', (*epoch_range, snapshot_id))
+                conn.execute('''
+                    INSERT OR REPLACE INTO archive.users (guild_id, user_id, username)
+                    SELECT guild_id, user_id, username FROM main.users
+                    WHERE (guild_id, user_id) IN (
+                        SELECT guild_id, user_id FROM archive.work_history
+                        UNION SELECT guild_id, user_id FROM archive.break_history
+                    )
+                ''')
+                conn.execute('COMMIT')
+
+                # 2) 현재 데이터베이스에서 삭제하고 경계 이동. 복사를 커밋한 뒤 들어온 행이 보관되지 않은 채
+                # 지워지지 않도록 보관 파일에 들어간 id만 지움 (그런 행은 다음 보관 때 옮겨짐)
+                conn.execute('BEGIN')
+                conn.execute('''
+                    DELETE FROM main.work_history WHERE date >= ? AND date < ?
+                    AND id IN (SELECT id FROM archive.work_history)
+                ''', day_range)
+                conn.execute('''
+                    DELETE FROM main.break_history WHERE start_time >= ? AND start_time < ?
+                    AND id IN (SELECT id FROM archive.break_history)
+                ''', epoch_range)
+                # 저널에는 at 인덱스가 없으므로 보관 파일로 옮긴 id로 지움 (쓰기 잠금 동안 전체를 훑지 않도록).
+                # 새 이벤트 id가 되돌아가지 않도록 가장 최근 이벤트는 남김
+                conn.execute('''
+                    DELETE FROM main.attendance_events WHERE id IN (SELECT id FROM archive.attendance_events)
+                    AND id < (SELECT MAX(id) FROM main.attendance_events)
+                ''')
+                set_meta(conn, 'archive_before', next_first.isoformat())
+                conn.execute('COMMIT')
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            finally:
+                conn.execute('DETACH DATABASE archive')
+
+            moved.append((month, work_rows, break_rows))
+            month = f'{next_first:%Y-%m}'
+    finally:
+        conn.close()
+    return moved
+
+# 휴식 통계
+# 자유 입력 사유를 한 항목으로 묶는 별칭 (항목 이름: 정규화 후 같은 것으로 볼 단어들)
+BREAK_REASON_ALIASES = {
+    '식사': ('식사', '밥', '점심', '점심식사', '저녁', '저녁식사', '아침', '아침식사', 'lunch', 'dinner'),
+    '커피': ('커피', '카페', '음료', 'coffee'),
+    '흡연': ('흡연', '담배', 'smoke'),
+    '화장실': ('화장실', 'toilet'),
+    '회의': ('회의', '미팅', 'meeting'),
+    '외출': ('외출', '은행', '병원', '택배'),
+    '휴식': ('휴식', '쉬는시간', '잠깐', 'break'),
+}
+
+def require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError('휴식 통계에는 numpy가 필요합니다. (pip install numpy)')
+    return numpy
+
+class ReasonIndex(dict):
+    """원래 사유 문자열 -> 정규화된 사유 번호 조회 테이블
+
+    처음 보는 문자열만 정규화(소문자, 문장부호/공백 정리 후 별칭 적용)해 번호를 매기고
+    이후에는 사전 조회만 합니다. 봇에서는 하나를 계속 재사용하므로 같은 사유를 다시 가공하지 않습니다.
+    """
+
+    def __init__(self, aliases=BREAK_REASON_ALIASES):
+        super().__init__()
+        self.names = []
+        self._codes = {}
+        self._aliases = {self.normalize(word): name for name, words in aliases.items() for word in words}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(reason):
+        return ' '.join(re.sub(r'[^\w]+', ' ', reason.casefold()).split())
+
+    def __missing__(self, reason):
+        text = self.normalize(reason)
+        name = self._aliases.get(text) or self._aliases.get(text.split(' ', 1)[0]) or text or '기타'
+        with self._lock:
+            code = self._codes.get(name)
+            if code is None:
+                code = self._codes[name] = len(self.names)
+                self.names.append(name)
+            self[reason] = code
+        return code
+
+def local_seconds(starts, guild_ids):
+    """epoch 초 배열 -> 길드 시간대의 벽시계 시각 (1970-01-01 0시부터의 초)
+
+    guild_ids는 길드 ID 하나 또는 starts와 같은 길이의 배열입니다. UTC 오프셋은 길드마다 한 시간
+    구간별로 한 번만 구하므로 행마다 시간대 변환을 하지 않고, 서머타임이 바뀌는 날도 맞게 계산합니다.
+    """
+    np = require_numpy()
+
+    def shift(starts, zone):
+        slots, inverse = np.unique(starts // 3600, return_inverse=True)
+        offsets = np.array([int(datetime.fromtimestamp(slot * 3600, timezone.utc).astimezone(zone)
+                                .utcoffset().total_seconds()) for slot in slots.tolist()], dtype=np.int64)
+        return starts + offsets[inverse]
+
+    if np.ndim(guild_ids) == 0:
+        return shift(starts, guild_zone(guild_ids))
+    local = np.empty_like(starts)
+    for guild_id in np.unique(guild_ids).tolist():
+        rows = guild_ids == guild_id
+        local[rows] = shift(starts[rows], guild_zone(guild_id))
+    return local
+
+def load_break_columns(conn, key, start_date, end_date, guild_id=None, reason_index=None, schema='main',
+                       batch_size=50000):
+    """기간(길드 시간대 날짜) 내 시작한 끝난 휴식을 열별 numpy 배열로 읽기 -> {key, hour(시작 시각의 시), duration}
+
+    key는 'user_id' 또는 'reason'이며 필요한 열만 읽습니다. 사유는 reason_index의 번호로 바꿉니다.
+    """
+    np = require_numpy()
+    # 길드마다 날짜 경계가 다르므로 UTC 오프셋(최대 ±14시간)만큼 넓게 읽은 뒤 길드 시간대 날짜로 거름
+    first = (start_date - datetime(1970, 1, 1).date()).days * 86400
+    last = first + ((end_date - start_date).days + 1) * 86400
+    columns = f'{key}, start_time, duration_seconds' + (', guild_id' if guild_id is None else '')
+    sql = (
+        f"SELECT {columns} FROM {schema}.break_history "
+        f"WHERE start_time >= ? AND start_time < ? AND duration_seconds IS NOT NULL"
+    )
+    params = [first - 86400, last + 86400]
+    if guild_id is not None:
+        # 길드의 휴식 대부분을 읽으므로 (guild_id, user_id, start_time) 인덱스를 거쳐 행마다
+        # 테이블을 다시 찾지 않고 테이블을 순서대로 읽음
+        sql += ' AND +guild_id = ?'
+        params.append(guild_id)
+
+    # 배치마다 열 단위로 전치해 배열로 옮김
+    encode = reason_index.__getitem__ if key == 'reason' else None
+    parts = ([], [], [], [])
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        values = list(zip(*rows))
+        if encode:
+            values[0] = map(encode, values[0])
+        for part, column in zip(parts, values):
+            part.append(np.fromiter(column, dtype=np.int64, count=len(rows)))
+    keys, starts, durations, guild_ids = (np.concatenate(part) if part else np.empty(0, dtype=np.int64)
+                                          for part in parts)
+    local = local_seconds(starts, guild_id if guild_id is not None else guild_ids)
+    keep = (local >= first) & (local < last)
+    return {'key': keys[keep], 'hour': local[keep] // 3600 % 24, 'duration': durations[keep]}
+
+def aggregate_breaks(keys, durations, hours):
+    """키 배열의 값별 (키, 횟수, 합계, 중앙값, 시간대별 횟수[키, 24]) 계산"""
+    np = require_numpy()
+    groups, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(groups))
+    totals = np.bincount(inverse, weights=durations, minlength=len(groups)).astype(np.int64)
+
+    # 키, 길이 순으로 정렬하면 각 키의 구간 가운데가 중앙값
+    ordered = durations[np.lexsort((durations, inverse))]
+    first = np.cumsum(counts) - counts
+    medians = (ordered[first + (counts - 1) // 2] + ordered[first + counts // 2]) / 2
+
+    hourly = np.bincount(inverse * 24 + hours, minlength=len(groups) * 24).reshape(len(groups), 24)
+    return groups, counts, totals, medians, hourly
+
+def read_break_stats(path, start_date, end_date, guild_id=None, by='user', reason_index=None, archive_dir=ARCHIVE_DIR):
+    """휴식 통계를 별도 읽기 전용 연결에서 계산해 (항목별 통계 목록, 전체 시간대별 횟수) 반환
+
+    by는 'user' 또는 'reason'이며 목록은 총 휴식 시간이 긴 순서입니다. 기간에 걸친 월별
+    보관 파일도 함께 읽습니다.
+    """
+    require_sqlite_file(path)
+    np = require_numpy()
+    reason_index = ReasonIndex() if reason_index is None else reason_index
+
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    # 날짜 경계와 시간대 분포는 길드 시간대로 계산
+    load_guild_zones(conn)
+    archive_before = get_meta(conn, 'archive_before') or ''
+    months = [month for month in archive_months(archive_dir)
+              if month < archive_before[:7] and month_overlaps(month, start_date, end_date)]
+    schemas = attach_archives(conn, archive_dir, months, trail=['main'])
+    parts = []
+    names = {}
+    try:
+        for schema in schemas:
+            parts.append(load_break_columns(conn, 'reason' if by == 'reason' else 'user_id',
+                                            start_date, end_date, guild_id, reason_index, schema))
+            # 현재 데이터베이스를 마지막에 읽으므로 최신 이름이 남음
+            sql = f'SELECT user_id, username FROM {schema}.users'
+            names.update(conn.execute(sql + ' WHERE guild_id = ?', (guild_id,)) if guild_id is not None
+                         else conn.execute(sql))
+    finally:
+        schemas.close()
+        conn.close()
+
+    columns = {name: np.concatenate([part[name] for part in parts]) for name in ('key', 'hour', 'duration')}
+    if by == 'reason':
+        label = reason_index.names.__getitem__
+    else:
+        label = lambda user_id: names.get(user_id, str(user_id))
+    groups, counts, totals, medians, hourly = aggregate_breaks(columns['key'], columns['duration'], columns['hour'])
+    stats = [
+        {
+            'key': int(groups[i]) if by == 'user' else label(int(groups[i])),
+            'name': label(int(groups[i])),
+            'count': int(counts[i]),
+            'total_seconds': int(totals[i]),
+            'median_seconds': int(medians[i]),
+            'hourly': hourly[i].tolist(),
+        }
+        for i in np.argsort(-totals, kind='stable')
+    ]
+    return stats, hourly.sum(axis=0).tolist()
+
+def format_duration(seconds):
+    hours, minutes = seconds // 3600, (seconds % 3600) // 60
+    return f"{hours}시간 {minutes}분" if hours else f"{minutes}분"
+
+def format_hourly(hourly):
+    """0~23시 횟수를 막대 문자 24개로 표시"""
+    peak = max(hourly, default=0)
+    if not peak:
+        return '▁' * 24
+    return ''.join('▁▂▃▄▅▆▇█'[round(count / peak * 7)] for count in hourly)
+
+# 근무 리포트 엔진
+# 근무/휴식 기록을 한 번 훑으며 (길드, 사용자, 근무 날짜)별로만 누적하고, 일별/주별/월별
+# 리포트는 그 날짜별 값을 묶어 만듭니다. 봇의 주간 리포트와 report.py CLI가 같은 엔진을 씁니다.
+REPORT_PERIODS = ('day', 'week', 'month')
+REPORT_BATCH_ROWS = 5000
+WEEKDAY_NAMES = '월화수목금토일'
+
+# 날짜별 누적 값 목록의 위치
+DAY_WORK, DAY_BREAK, DAY_SESSIONS, DAY_OVERNIGHT, DAY_BREAKS = range(5)
+
+class PeriodTotals:
+    """리포트 한 행 (한 사용자의 한 기간)을 날짜별 누적 값으로 합산"""
+    __slots__ = ('work_seconds', 'break_seconds', 'sessions', 'overnight', 'breaks', 'days', 'overtime',
+                 'overtime_days', 'weekday_totals', 'weekday_days')
+
+    def __init__(self):
+        self.work_seconds = self.break_seconds = self.sessions = self.overnight = self.breaks = 0
+        self.days = self.overtime = self.overtime_days = 0
+        self.weekday_totals, self.weekday_days = [0] * 7, [0] * 7
+
+    def add_day(self, values, weekday, overtime_seconds):
+        work_seconds = values[DAY_WORK]
+        self.work_seconds += work_seconds
+        self.break_seconds += values[DAY_BREAK]
+        self.sessions += values[DAY_SESSIONS]
+        self.overnight += values[DAY_OVERNIGHT]
+        self.breaks += values[DAY_BREAKS]
+        if values[DAY_SESSIONS]:
+            self.days += 1
+            self.weekday_totals[weekday] += work_seconds
+            self.weekday_days[weekday] += 1
+            if work_seconds > overtime_seconds:
+                self.overtime += work_seconds - overtime_seconds
+                self.overtime_days += 1
+
+    def summary(self):
+        return {
+            'work_seconds': self.work_seconds,
+            'break_seconds': self.break_seconds,
+            'sessions': self.sessions,
+            'days': self.days,
+            'avg_day_seconds': self.work_seconds // self.days if self.days else 0,
+            'overtime_seconds': self.overtime,
+            'overtime_days': self.overtime_days,
+            'overnight_sessions': self.overnight,
+            'breaks': self.breaks,
+            # 그 요일에 근무한 날의 평균 (월요일부터)
+            'weekday_avg_seconds': [total // count if count else 0
+                                    for total, count in zip(self.weekday_totals, self.weekday_days)],
+        }
+
+class WorkReportEngine:
+    """근무/휴식 기록 스트림을 (길드, 사용자, 근무 날짜)별로 누적해 기간별 리포트를 만듦
+
+    행마다 날짜별 값 하나만 갱신하므로 기간 종류가 몇 개든 기록은 한 번만 읽으면 되고, 주/달
+    리포트는 reports()에서 날짜별 값을 묶어 만듭니다. 한 사용자의 행은 그 사용자의 값에만 더해지므로
+    사용자별로 나눠 따로 누적한 엔진들의 날짜별 값을 그대로 합쳐도 결과가 같습니다.
+    """
+
+    def __init__(self, day_range=None):
+        self.day_range = day_range  # 휴식을 셀 날짜 범위 ('YYYY-MM-DD', 'YYYY-MM-DD'), None이면 전부
+        self.days = {}              # (guild_id, user_id, 근무 날짜) -> [근무, 휴식, 세션 수, 자정 넘김, 휴식 횟수]
+        self.names = {}             # (guild_id, user_id) -> username
+        self._day_bounds = {}       # (guild_id, 근무 날짜) -> (그날 0시, 다음 날 0시) epoch 초
+        self._local_days = {}       # (guild_id, epoch 초 // 900) -> 길드 시간대 날짜
+
+    def _bounds(self, guild_id, day):
+        bounds = self._day_bounds.get((guild_id, day))
+        if bounds is None:
+            first = datetime.strptime(day, '%Y-%m-%d').date()
+            bounds = self._day_bounds[guild_id, day] = (
+                to_epoch(guild_midnight(guild_id, first)),
+                to_epoch(guild_midnight(guild_id, first + timedelta(days=1))),
+            )
+        return bounds
+
+    def _local_day(self, guild_id, seconds):
+        # UTC 오프셋은 15분 단위이므로 15분 구간마다 한 번만 시간대 변환
+        key = (guild_id, seconds // 900)
+        day = self._local_days.get(key)
+        if day is None:
+            day = self._local_days[key] = guild_date(guild_id, from_epoch(seconds)).isoformat()
+        return day
+
+    def add(self, table, rows):
+        """table('work_history', 'break_history' 또는 'daily_work_summary')의 행 목록을 누적"""
+        if table == 'work_history':
+            self.add_sessions(rows)
+        elif table == 'daily_work_summary':
+            self.add_days(rows)
+        else:
+            self.add_breaks(rows)
+
+    def add_sessions(self, rows):
+        """rows: (guild_id, user_id, username, date, start_time, end_time, work_seconds, break_seconds)
+
+        근무 날짜 0시 전에 시작했거나 다음 날 0시 이후에 끝난 세션은 자정을 넘긴 세션으로 셉니다.
+        """
+        days, names = self.days, self.names
+        for guild_id, user_id, username, day, start_time, end_time, work_seconds, break_seconds in rows:
+            names[guild_id, user_id] = username
+            first, last = self._bounds(guild_id, day)
+            values = days.get((guild_id, user_id, day))
+            if values is None:
+                values = days[guild_id, user_id, day] = [0, 0, 0, 0, 0]
+            values[DAY_WORK] += work_seconds
+            values[DAY_BREAK] += break_seconds
+            values[DAY_SESSIONS] += 1
+            if start_time < first or end_time >= last:
+                values[DAY_OVERNIGHT] += 1
+
+    def add_days(self, rows):
+        """rows: (guild_id, user_id, username, date, work_seconds, break_seconds, session_count)
+
+        일별 집계에는 세션 시각과 휴식 횟수가 없으므로 자정 넘김과 휴식 횟수는 0으로 남습니다.
+        """
+        days, names = self.days, self.names
+        for guild_id, user_id, username, day, work_seconds, break_seconds, session_count in rows:
+            names[guild_id, user_id] = username
+            values = days.get((guild_id, user_id, day))
+            if values is None:
+                values = days[guild_id, user_id, day] = [0, 0, 0, 0, 0]
+            values[DAY_WORK] += work_seconds
+            values[DAY_BREAK] += break_seconds
+            values[DAY_SESSIONS] += session_count
+
+    def add_breaks(self, rows):
+        """rows: (guild_id, user_id, start_time). 시작한 날(길드 시간대)이 날짜 범위 안인 휴식의 횟수를 더함"""
+        days, day_range = self.days, self.day_range
+        for guild_id, user_id, start_time in rows:
+            day = self._local_day(guild_id, start_time)
+            if day_range and not day_range[0] <= day <= day_range[1]:
+                continue
+            values = days.get((guild_id, user_id, day))
+            if values is None:
+                values = days[guild_id, user_id, day] = [0, 0, 0, 0, 0]
+            values[DAY_BREAKS] += 1
+
+    def reports(self, period, overtime_seconds=None):
+        """기간 종류('day', 'week', 'month') 하나의 리포트 행 목록
+
+        기간, 길드 순이고 같은 기간 안에서는 근무 시간이 긴 순입니다. 초과 근무는 하루 근무가
+        overtime_seconds(기본: OVERTIME_HOURS)를 넘은 만큼의 합이며, 근무 기록 없이 휴식만 있는
+        사용자는 제외합니다.
+        """
+        if overtime_seconds is None:
+            overtime_seconds = int(OVERTIME_HOURS * 3600)
+        calendar = {}  # 근무 날짜 -> (기간, 요일)
+        groups = {}
+        for (guild_id, user_id, day), values in self.days.items():
+            entry = calendar.get(day)
+            if entry is None:
+                weekday = datetime.strptime(day, '%Y-%m-%d').weekday()
+                key = day if period == 'day' else iso_week_key(day) if period == 'week' else day[:7]
+                entry = calendar[day] = (key, weekday)
+            totals = groups.get((entry[0], guild_id, user_id))
+            if totals is None:
+                totals = groups[entry[0], guild_id, user_id] = PeriodTotals()
+            totals.add_day(values, entry[1], overtime_seconds)
+
+        rows = [
+            {'period': key, 'guild_id': guild_id, 'user_id': user_id,
+             'username': self.names.get((guild_id, user_id), str(user_id)), **totals.summary()}
+            for (key, guild_id, user_id), totals in groups.items() if totals.sessions
+        ]
+        rows.sort(key=lambda row: (row['period'], row['guild_id'], -row['work_seconds'], row['user_id']))
+        return rows
+
+def aggregate_work_reports(batches, day_range=None):
+    """(테이블, 행 목록) 배치 이터레이터를 한 번 훑어 누적한 WorkReportEngine 반환
+
+    봇의 주간 리포트와 report.py가 함께 쓰므로 리포트 집계 시간은 work_report 작업 지표 하나로 남습니다.
+    """
+    with job_timer('work_report'):
+        engine = WorkReportEngine(day_range)
+        for table, rows in batches:
+            engine.add(table, rows)
+    return engine
+
+def iter_report_rows(conn, table, start_date, end_date, guild_id=None, schema='main', batch_size=REPORT_BATCH_ROWS):
+    """리포트 엔진 입력 행을 batch_size개씩 목록으로 내놓는 제너레이터
+
+    work_history는 근무 날짜로, break_history는 시작 시각으로 기간을 고르며 정렬하지 않습니다.
+    """
+    if table == 'work_history':
+        sql = (
+            f'SELECT h.guild_id, h.user_id, COALESCE(u.username, CAST(h.user_id AS TEXT)), h.date, '
+            f'h.start_time, h.end_time, h.work_seconds, h.break_seconds FROM {schema}.work_history h '
+            f'LEFT JOIN {schema}.users u ON u.guild_id = h.guild_id AND u.user_id = h.user_id '
+            f'WHERE h.date >= ? AND h.date <= ?'
+        )
+        params = [start_date.isoformat(), end_date.isoformat()]
+    else:
+        # 길드 시간대 날짜로는 엔진이 다시 거르므로 앞뒤로 하루씩 넉넉히 읽음
+        sql = (f'SELECT h.guild_id, h.user_id, h.start_time FROM {schema}.break_history h '
+               f'WHERE h.start_time >= ? AND h.start_time < ?')
+        params = [day_start_epoch(start_date - timedelta(days=1)), day_start_epoch(end_date + timedelta(days=2))]
+    if guild_id is not None:
+        sql += ' AND h.guild_id = ?'
+        params.append(guild_id)
+
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows
+
+def aggregate_report_shard(inbox, outbox, day_range, zones):
+    """리포트 워커 프로세스: inbox에서 (테이블, 행 목록)을 None이 올 때까지 받아 누적한 엔진을 outbox로 보냄"""
+    guild_zones.update(zones)
+    outbox.put(aggregate_work_reports(iter(inbox.get, None), day_range))
+
+def build_work_reports(path, start_date, end_date, guild_id=None, workers=1, archive_dir=ARCHIVE_DIR):
+    """start_date~end_date(근무 날짜 기준, 포함)의 근무 리포트를 별도 읽기 전용 연결에서 계산해
+    WorkReportEngine 반환
+
+    기간에 걸친 월별 보관 파일과 현재 데이터베이스의 두 히스토리 테이블을 한 번씩만 읽습니다.
+    workers가 2 이상이면 읽은 행을 사용자 ID로 나눠 워커 프로세스들이 따로 누적하고 마지막에 합칩니다.
+    기간에 일부만 걸친 주/달은 기간 안의 날만 집계됩니다.
+    """
+    require_sqlite_file(path)
+    day_range = (start_date.isoformat(), end_date.isoformat())
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+
+    def batches():
+        for schema in attach_archives(conn, archive_dir, months, trail=['main']):
+            for table in ('work_history', 'break_history'):
+                for rows in iter_report_rows(conn, table, start_date, end_date, guild_id, schema):
+                    yield table, rows
+
+    try:
+        # 자정 경계와 휴식 날짜는 길드 시간대로 계산
+        load_guild_zones(conn)
+        archive_before = get_meta(conn, 'archive_before') or ''
+        months = [month for month in archive_months(archive_dir)
+                  if month < archive_before[:7] and month_overlaps(month, start_date, end_date)]
+        if workers <= 1:
+            return aggregate_work_reports(batches(), day_range)
+        return aggregate_in_workers(batches(), day_range, workers)
+    finally:
+        conn.close()
+
+def aggregate_in_workers(batches, day_range, workers):
+    """배치의 행을 사용자 ID로 나눠 workers개의 프로세스에서 누적하고 합친 엔진 반환"""
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue(maxsize=4) for _ in range(workers)]
+    outbox = context.Queue()
+    processes = [
+        context.Process(target=aggregate_report_shard, args=(inbox, outbox, day_range, dict(guild_zones)),
+                        daemon=True)
+        for inbox in inboxes
+    ]
+    for process in processes:
+        process.start()
+
+    def check_workers():
+        if any(process.exitcode not in (None, 0) for process in processes):
+            raise RuntimeError('리포트 워커 프로세스가 비정상 종료했습니다.')
+
+    def send(inbox, item):
+        while True:
+            try:
+                inbox.put(item, timeout=1)
+                return
+            except queue.Full:
+                check_workers()
+
+    try:
+        with job_timer('work_report'):
+            for table, rows in batches:
+                shards = [[] for _ in range(workers)]
+                for row in rows:
+                    shards[row[1] % workers].append(row)
+                for inbox, shard in zip(inboxes, shards):
+                    if shard:
+                        send(inbox, (table, shard))
+            for inbox in inboxes:
+                send(inbox, None)
+
+            # 사용자별로 나눴으므로 워커마다 날짜별 값의 키가 겹치지 않아 그대로 합침
+            engine = WorkReportEngine(day_range)
+            received = 0
+            while received < workers:
+                try:
+                    shard = outbox.get(timeout=1)
+                except queue.Empty:
+                    check_workers()
+                    continue
+                engine.days.update(shard.days)
+                engine.names.update(shard.names)
+                received += 1
+        return engine
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+def format_weekdays(seconds):
+    """요일별 평균 근무 시간 (월요일부터)을 '월 8.0 화 7.5 ...' 형식의 시간으로 표시 (근무하지 않은 요일은 -)"""
+    return ' '.join(f"{name} {value / 3600:.1f}" if value else f"{name} -"
+                    for name, value in zip(WEEKDAY_NAMES, seconds))
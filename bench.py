@@ -0,0 +1,322 @@
+"""출퇴근 봇 명령어 부하 테스트 / 벤치마크
+
+실제 명령어 핸들러 코루틴(work_start, work_end, ...)과 스케줄 작업을 가짜 Interaction으로
+직접 호출해 임시 데이터베이스에서 실행합니다. Discord 연결은 필요 없습니다.
+
+사용 예:
+    python bench.py --users 10,1000,50000 --rush-seconds 5
+    python bench.py --users 1000 --output new.json --baseline old.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import bot as attendance
+
+
+# 가짜 Discord 객체
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.display_name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+
+class FakeResponse:
+    async def defer(self, **kwargs):
+        pass
+
+    async def send_message(self, *args, **kwargs):
+        pass
+
+class FakeFollowup:
+    async def send(self, *args, **kwargs):
+        pass
+
+class FakeInteraction:
+    """핸들러가 사용하는 속성만 갖춘 discord.Interaction 대용"""
+
+    def __init__(self, user_id, guild_id):
+        self.user = FakeUser(user_id)
+        self.guild_id = guild_id
+        self.channel_id = guild_id * 10
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+        self.extras = {}
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+    async def send(self, **kwargs):
+        pass
+
+class FakeClient:
+    def get_channel(self, channel_id):
+        return FakeChannel(channel_id)
+
+
+# 측정
+class Recorder:
+    """명령어별 지연 시간과 구간별 소요 시간 기록"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.walls = {}
+
+    async def call(self, name, command, interaction, *args):
+        started = time.perf_counter()
+        await command.callback(interaction, *args)
+        self.latencies.setdefault(name, []).append(time.perf_counter() - started)
+
+    async def phase(self, name, calls):
+        started = time.perf_counter()
+        await asyncio.gather(*calls)
+        self.walls[name] = self.walls.get(name, 0.0) + time.perf_counter() - started
+
+    async def job(self, name, coro):
+        started = time.perf_counter()
+        await coro
+        elapsed = time.perf_counter() - started
+        self.latencies.setdefault(name, []).append(elapsed)
+        self.walls[name] = self.walls.get(name, 0.0) + elapsed
+
+    def summary(self):
+        result = {}
+        for name, values in self.latencies.items():
+            values = sorted(values)
+            wall = self.walls.get(name) or sum(values)
+            result[name] = {
+                'count': len(values),
+                'throughput_per_s': round(len(values) / wall, 1) if wall else None,
+                'p50_ms': round(percentile(values, 50) * 1000, 3),
+                'p95_ms': round(percentile(values, 95) * 1000, 3),
+                'p99_ms': round(percentile(values, 99) * 1000, 3),
+                'max_ms': round(values[-1] * 1000, 3),
+            }
+        return result
+
+def percentile(sorted_values, p):
+    """nearest-rank 백분위수"""
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+def rush_offsets(count, window, rng):
+    """출근 러시 도착 시각(초): 창의 40% 지점을 중심으로 한 절단 정규분포"""
+    if window <= 0:
+        return [0.0] * count
+    return [min(window, max(0.0, rng.gauss(window * 0.4, window / 6))) for _ in range(count)]
+
+def uniform_offsets(count, window, rng):
+    return [rng.uniform(0, window) if window > 0 else 0.0 for _ in range(count)]
+
+async def arrive(offset, coro):
+    if offset > 0:
+        await asyncio.sleep(offset)
+    await coro
+
+
+# 시나리오
+def seed_last_week(tx, user_ids, guild_count, last_monday):
+    """지난주 월~금 근무 기록을 채워 주간 리포트가 읽을 데이터 생성"""
+    tx.upsert_users([(user_id % guild_count + 1, user_id, f"user{user_id}") for user_id in user_ids])
+    rows = []
+    for day in range(5):
+        date = last_monday + timedelta(days=day)
+        start = datetime.combine(date, datetime.min.time()).replace(hour=9)
+        end = start + timedelta(hours=9)
+        for user_id in user_ids:
+            rows.append((user_id % guild_count + 1, user_id, date.isoformat(),
+                         attendance.to_epoch(start), attendance.to_epoch(end), 8 * 3600, 3600))
+    tx.insert_history(rows)
+
+async def run_population(users, args, rng):
+    """users명 규모로 하루 일과 시나리오를 한 번 실행하고 명령어별 통계 반환"""
+    from cogs import jobs, work
+
+    workdir = tempfile.mkdtemp(prefix='attendance-bench-')
+    if args.storage == 'memory':
+        db = attendance.MemoryStorage()
+    else:
+        db = attendance.Database(os.path.join(workdir, 'bench.db'), group_commit_ms=args.group_commit_ms)
+    sessions = attendance.SessionStore(db)
+    outbox = attendance.MessageDispatcher(FakeClient(), channel_rate=1000, channel_burst=1000, global_rate=1000)
+
+    # 모듈 전역을 임시 데이터베이스와 가짜 전송 큐로 교체 (확장 모듈이 가져간 이름까지)
+    for module in (attendance, work, jobs):
+        for name, value in (('db', db), ('sessions', sessions), ('outbox', outbox)):
+            if hasattr(module, name):
+                setattr(module, name, value)
+    attendance.report_channels.clear()
+    for guild_id in range(1, args.guilds + 1):
+        attendance.report_channels[guild_id] = {guild_id * 10}
+
+    await db.migrate()
+
+    today = datetime.now()
+    report_time = datetime.combine((today - timedelta(days=today.weekday())).date(), datetime.min.time())
+    user_ids = list(range(1, users + 1))
+    await db.run(seed_last_week, user_ids, args.guilds, (report_time - timedelta(days=7)).date())
+    await sessions.load()
+
+    def guild_of(user_id):
+        return user_id % args.guilds + 1
+
+    recorder = Recorder()
+
+    # 1. 출근 러시
+    offsets = rush_offsets(users, args.rush_seconds, rng)
+    await recorder.phase('출근', [
+        arrive(offset, recorder.call('출근', work.work_start, FakeInteraction(user_id, guild_of(user_id))))
+        for user_id, offset in zip(user_ids, offsets)
+    ])
+
+    # 2. 개인 상태 / 전체 현황 조회
+    sample = rng.sample(user_ids, min(users, args.status_sample))
+    await recorder.phase('상태', [
+        recorder.call('상태', work.work_status, FakeInteraction(user_id, guild_of(user_id)))
+        for user_id in sample
+    ])
+    await recorder.phase('현황', [
+        recorder.call('현황', work.work_status_all, FakeInteraction(user_ids[0], guild_of(user_ids[i % users])))
+        for i in range(args.status_all_calls)
+    ])
+
+    # 3. 휴식 / 복귀
+    breakers = rng.sample(user_ids, int(users * args.break_ratio))
+    await recorder.phase('휴식', [
+        arrive(offset, recorder.call('휴식', work.work_break, FakeInteraction(user_id, guild_of(user_id)), '점심식사'))
+        for user_id, offset in zip(breakers, uniform_offsets(len(breakers), args.phase_seconds, rng))
+    ])
+    await recorder.phase('복귀', [
+        arrive(offset, recorder.call('복귀', work.work_return, FakeInteraction(user_id, guild_of(user_id))))
+        for user_id, offset in zip(breakers, uniform_offsets(len(breakers), args.phase_seconds, rng))
+    ])
+
+    # 4. 일부 퇴근, 나머지는 자정 자동 퇴근
+    leavers = rng.sample(user_ids, int(users * args.leave_ratio))
+    await recorder.phase('퇴근', [
+        arrive(offset, recorder.call('퇴근', work.work_end, FakeInteraction(user_id, guild_of(user_id))))
+        for user_id, offset in zip(leavers, uniform_offsets(len(leavers), args.phase_seconds, rng))
+    ])
+
+    # 5. 스케줄 작업: 다음 0시 회차(자동 퇴근 -> 주간 리포트)를 한 번에 실행
+    scheduler = attendance.JobScheduler(db, [jobs.AutoCheckoutJob(), jobs.WeeklyReportJob()])
+    midnight = datetime.combine(today.date() + timedelta(days=1), datetime.min.time())
+    for job in scheduler.jobs:
+        for guild_id in range(1, args.guilds + 1):
+            scheduler.last_runs[(job.name, guild_id)] = ''
+    await recorder.job('scheduler_pass', scheduler.run_pending(midnight))
+
+    await outbox.stop()
+    await db.close()
+
+    return {
+        'commands': recorder.summary(),
+        'db': {key: value for key, value in db.stats.items() if key != 'batch_sizes'},
+        'db_size_bytes': os.path.getsize(db.path) if db.path else None,
+    }
+
+
+# 출력
+def print_table(users, result):
+    print(f"\n== {users:,}명 ==")
+    print(f"{'명령어':<22}{'횟수':>8}{'처리량/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in result['commands'].items():
+        print(f"{name:<22}{stats['count']:>8}{stats['throughput_per_s'] or 0:>12}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+    db_stats = result['db']
+    print(f"DB: 배치 {db_stats['batches']}회, 작업 {db_stats['jobs']}건, "
+          f"최대 배치 {db_stats['max_batch_size']}, 커밋 합계 {db_stats['commit_seconds_total'] * 1000:.1f}ms"
+          + (f", 파일 {result['db_size_bytes'] / 1024:.0f}KB" if result['db_size_bytes'] is not None else ""))
+
+def compare(baseline, current, threshold):
+    """p95가 threshold(비율) 이상 느려진 항목 목록"""
+    regressions = []
+    for users, result in current['populations'].items():
+        base = baseline.get('populations', {}).get(users)
+        if not base:
+            continue
+        for name, stats in result['commands'].items():
+            before = base['commands'].get(name)
+            if before and before['p95_ms'] > 0 and stats['p95_ms'] > before['p95_ms'] * (1 + threshold):
+                regressions.append((users, name, before['p95_ms'], stats['p95_ms']))
+    return regressions
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="출퇴근 봇 명령어 벤치마크")
+    parser.add_argument('--users', default='10,1000', help="쉼표로 구분한 인원 규모 (예: 10,1000,50000)")
+    parser.add_argument('--guilds', type=int, default=1, help="사용자를 나눌 길드 수")
+    parser.add_argument('--rush-seconds', type=float, default=2.0, help="출근 러시가 퍼지는 시간(초), 0이면 동시에 도착")
+    parser.add_argument('--phase-seconds', type=float, default=1.0, help="휴식/복귀/퇴근 요청이 퍼지는 시간(초)")
+    parser.add_argument('--break-ratio', type=float, default=0.3, help="휴식하는 인원 비율")
+    parser.add_argument('--leave-ratio', type=float, default=0.5, help="직접 퇴근하는 인원 비율 (나머지는 자동 퇴근)")
+    parser.add_argument('--status-sample', type=int, default=1000, help="/상태를 호출할 인원 수")
+    parser.add_argument('--status-all-calls', type=int, default=20, help="/현황 호출 횟수")
+    parser.add_argument('--storage', choices=('sqlite', 'memory'), default='sqlite',
+                        help="저장소 (memory면 디스크 없이 명령어 처리 경로만 측정)")
+    parser.add_argument('--group-commit-ms', type=float, default=attendance.DB_GROUP_COMMIT_MS, help="그룹 커밋 대기 시간(ms)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_results.json', help="결과 JSON 파일 경로")
+    parser.add_argument('--baseline', help="비교할 이전 결과 JSON 파일")
+    parser.add_argument('--threshold', type=float, default=0.2, help="회귀로 판단할 p95 증가 비율")
+    parser.add_argument('--fail-on-regression', action='store_true', help="회귀가 있으면 종료 코드 1")
+    return parser.parse_args(argv)
+
+async def main(argv=None):
+    args = parse_args(argv)
+    # 확장 모듈이 가져갈 공유 상태 (저장소와 전송 큐는 규모마다 run_population에서 교체)
+    attendance.create_bot(attendance.MemoryStorage())
+    populations = [int(value) for value in args.users.split(',') if value.strip()]
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        },
+        'populations': {},
+    }
+
+    for users in populations:
+        result = await run_population(users, args, random.Random(args.seed))
+        results['populations'][str(users)] = result
+        print_table(users, result)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.threshold)
+        for users, name, before, after in regressions:
+            print(f"⚠️ 회귀: {users}명 {name} p95 {before}ms -> {after}ms")
+        if not regressions:
+            print(f"기준 결과({baseline['meta'].get('revision')}) 대비 회귀 없음")
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
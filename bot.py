@@ -1,687 +1,1512 @@
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 import os
 from datetime import datetime, timedelta, time as dt_time
 from dotenv import load_dotenv
+from sortedcontainers import SortedList
 import sqlite3
-from contextlib import contextmanager
+import asyncio
+import queue
+import random
+import hashlib
+import json
+import time
 import logging
+import logging.handlers
+import atexit
+import gzip
+import shutil
+import sys
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from attendance import (
+    aggregate_work_reports, ARCHIVE_DIR, archive_history, DB_FILE, export_history, format_duration, format_hourly,
+    from_epoch, guild_date, guild_midnight, guild_zone, guild_zones, iso_week_key, job_timer, metrics, open_snapshot,
+    OVERTIME_HOURS, read_break_stats, read_history_page, ReasonIndex, to_epoch,
+)
+# 저장소 구현은 storage 모듈에 있고, 확장 모듈과 도구가 `from bot import ...`로 쓰던 이름을 그대로 제공
+from storage import (
+    create_storage, current_timing, Database, DATABASE_URL, DB_GROUP_COMMIT_MS, DB_POOL_SIZE, EVENT_AUTO_FINISH,
+    EVENT_BREAK, EVENT_FINISH, EVENT_RETURN, EVENT_START, fold_journal, MemoryStorage, MemoryTransaction, MIGRATIONS,
+    PostgresStorage, PostgresTransaction, run_migrations, SQLiteTransaction, Storage, STORAGE_BACKEND,
+    StorageTransaction, WorkSession,
+)
 
 # 환경 변수 로드
+# python bot.py로 실행하면 이 모듈은 __main__이므로, 확장 모듈의 `from bot import ...`가
+# 모듈을 새로 실행하지 않고 같은 상태(db, sessions 등)를 보도록 bot 이름으로도 등록
+sys.modules.setdefault('bot', sys.modules[__name__])
+
 load_dotenv()
+# 기록 파일, 보관, 리포트, 시간대 설정(DB_FILE, ARCHIVE_DIR, OVERTIME_HOURS, DEFAULT_TIMEZONE)은 attendance 모듈,
+# 저장소 설정(STORAGE_BACKEND, DATABASE_URL, DB_POOL_SIZE, DB_GROUP_COMMIT_MS)은 storage 모듈에서 읽음
 TOKEN = os.getenv('DISCORD_TOKEN')
 ALLOWED_CHANNEL_NAME = "출석-기록"
-DB_FILE = "work_records.db"
+# 샤드 수 (비워두면 Discord 권장값을 따라 길드 수에 맞춰 자동 결정)
+SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+# 길드 구분 이전 데이터를 배정할 길드 (비워두면 봇이 속한 길드가 하나일 때 자동 배정)
+LEGACY_GUILD_ID = int(os.getenv('LEGACY_GUILD_ID')) if os.getenv('LEGACY_GUILD_ID') else None
+# 1이면 명령어 정의 해시와 상관없이 시작 시 항상 명령어 트리 동기화
+FORCE_COMMAND_SYNC = os.getenv('FORCE_COMMAND_SYNC') == '1'
+# 시작할 때 불러오는 확장 모듈 (명령어와 예약 작업). 상태는 이 모듈에 있으므로 /리로드로 하나씩 교체 가능
+EXTENSIONS = ('cogs.work', 'cogs.records', 'cogs.admin', 'cogs.jobs')
+# 이 일수보다 오래된 달의 근무/휴식 기록을 월별 보관 파일로 옮김 (0이면 보관하지 않음)
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '0'))
+# 매일 유지보수 때 만드는 온라인 백업 위치와 남겨둘 개수 (0이면 백업하지 않음)
+BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
+BACKUP_KEEP = int(os.getenv('BACKUP_KEEP', '7'))
+# 성능 지표 HTTP 엔드포인트 (0이면 비활성화, 로컬에서만 접근)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))
+# 로그 파일과 교체 기준 (LOG_ROTATE_WHEN을 지정하면 시간 기준, 아니면 크기 기준으로 교체)
+LOG_FILE = os.getenv('LOG_FILE', 'bot.log')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN', '')
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '7'))
+# 1이면 로그 파일을 JSON Lines 형식으로 기록
+LOG_JSON = os.getenv('LOG_JSON') == '1'
+# 0이면 콘솔(stderr) 출력 끔 (백그라운드 실행 시)
+LOG_CONSOLE = os.getenv('LOG_CONSOLE', '1') != '0'
 
 # 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)-8s] %(name)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[
-        logging.FileHandler('bot.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+class JsonFormatter(logging.Formatter):
+    """로그 레코드 하나를 JSON 한 줄로 변환"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """같은 프로세스 안의 큐이므로 레코드를 미리 포맷하지 않고 그대로 넘김 (포맷은 리스너 스레드에서)"""
+
+    def prepare(self, record):
+        return record
+
+def gzip_namer(name):
+    return name + '.gz'
+
+def gzip_rotator(source, dest):
+    """교체된 로그 파일을 gzip으로 압축 (리스너 스레드에서 실행)"""
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+def setup_logging():
+    """루트 로거에는 큐 핸들러만 붙이고, 실제 파일/콘솔 쓰기는 리스너 스레드에서 처리
+
+    이벤트 루프는 레코드를 큐에 넣기만 하므로 디스크 쓰기, 파일 교체, 압축이
+    명령어 처리 시간에 영향을 주지 않습니다.
+    """
+    if LOG_ROTATE_WHEN:
+        file_handler = logging.handlers.TimedRotatingFileHandler(
+            LOG_FILE, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+    else:
+        file_handler = logging.handlers.RotatingFileHandler(
+            LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+        )
+    file_handler.namer = gzip_namer
+    file_handler.rotator = gzip_rotator
+
+    text_formatter = logging.Formatter(
+        '[%(asctime)s] [%(levelname)-8s] %(name)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    file_handler.setFormatter(JsonFormatter() if LOG_JSON else text_formatter)
+    handlers = [file_handler]
+    if LOG_CONSOLE:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(text_formatter)
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(LocalQueueHandler(log_queue))
+    return listener
+
+logger = logging.getLogger('attendance')
+
+# 명령어 처리 시간 측정
+class CommandTiming:
+    """명령어 하나를 처리하는 동안의 시간 측정값"""
+    __slots__ = ('command', 'started', 'db_seconds', 'deferred_at')
+
+    def __init__(self, command):
+        self.command = command
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.deferred_at = None
+
+async def defer_response(interaction, **kwargs):
+    """interaction.response.defer() 후 defer 시각 기록"""
+    await interaction.response.defer(**kwargs)
+    timing = current_timing.get()
+    if timing:
+        timing.deferred_at = time.perf_counter()
+
+async def send_followup(interaction, *args, **kwargs):
+    """interaction.followup.send()를 호출하며 defer→followup 시간과 전송 시간 기록"""
+    timing = current_timing.get()
+    if timing is None:
+        return await interaction.followup.send(*args, **kwargs)
+
+    started = time.perf_counter()
+    if timing.deferred_at is not None:
+        metrics.defer_to_followup.observe(started - timing.deferred_at, timing.command)
+    try:
+        return await interaction.followup.send(*args, **kwargs)
+    finally:
+        metrics.followup_send.observe(time.perf_counter() - started, timing.command)
+
+async def monitor_loop_lag(interval=0.5):
+    """interval마다 깨어나 예정보다 늦어진 시간을 이벤트 루프 지연으로 기록"""
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + interval
+        await asyncio.sleep(interval)
+        metrics.loop_lag.observe(max(0.0, loop.time() - scheduled))
+
+async def handle_metrics_request(reader, writer):
+    """GET /metrics 요청에 Prometheus 텍스트 형식으로 응답"""
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        while True:
+            header = await asyncio.wait_for(reader.readline(), timeout=5)
+            if header in (b'\r\n', b'\n', b''):
+                break
+
+        parts = request_line.decode('latin-1').split()
+        if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] in ('/', '/metrics'):
+            status, body = '200 OK', metrics.render().encode('utf-8')
+        else:
+            status, body = '404 Not Found', b'not found\n'
+
+        writer.write(
+            f'HTTP/1.1 {status}\r\n'
+            f'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: close\r\n\r\n'.encode('latin-1') + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
 
 # 봇 설정
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix='/', intents=intents)
-
-# 데이터베이스 컨텍스트 매니저
-@contextmanager
-def get_db():
-    """데이터베이스 연결 컨텍스트 매니저"""
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    try:
-        yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
-
-def init_db():
-    """데이터베이스 초기화"""
-    with get_db() as conn:
-        cursor = conn.cursor()
-
-        # 현재 출근 상태 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS current_work_status (
-                user_id TEXT PRIMARY KEY,
-                username TEXT NOT NULL,
-                start_time TEXT NOT NULL,
-                break_time TEXT,
-                total_break_seconds INTEGER DEFAULT 0
-            )
-        ''')
-
-        # 출퇴근 히스토리 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS work_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                username TEXT NOT NULL,
-                date TEXT NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                work_seconds INTEGER NOT NULL,
-                break_seconds INTEGER DEFAULT 0,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # 휴식 기록 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS break_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                username TEXT NOT NULL,
-                reason TEXT NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT,
-                duration_seconds INTEGER,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # 인덱스 생성
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_work_history_user_date ON work_history(user_id, date)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_work_history_date ON work_history(date)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_break_history_user ON break_history(user_id, start_time)')
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """명령어마다 처리 시간 측정을 시작하고 오류 횟수를 기록하는 명령어 트리"""
 
-def channel_only():
-    """특정 채널에서만 명령어 사용 가능하도록 제한"""
-    async def predicate(interaction: discord.Interaction) -> bool:
-        if interaction.channel.name != ALLOWED_CHANNEL_NAME:
-            await interaction.response.send_message(
-                f"❌ 이 명령어는 **{ALLOWED_CHANNEL_NAME}** 채널에서만 사용할 수 있습니다!",
-                ephemeral=True
-            )
-            return False
+    async def interaction_check(self, interaction):
+        # 같은 태스크에서 실행되는 명령어 콜백과 DB 호출이 이 측정값을 공유
+        command = interaction.command
+        current_timing.set(CommandTiming(command.qualified_name if command else 'unknown'))
         return True
-    return app_commands.check(predicate)
-
-@bot.event
-async def on_ready():
-    """봇이 준비되었을 때"""
-    print(f'{bot.user} 봇이 준비되었습니다!')
-    init_db()
 
-    # 스케줄러 시작
-    if not daily_auto_checkout.is_running():
-        daily_auto_checkout.start()
-    if not weekly_report.is_running():
-        weekly_report.start()
+    async def on_error(self, interaction, error):
+        timing = finish_command_timing()
+        if timing:
+            metrics.command_errors[timing.command] = metrics.command_errors.get(timing.command, 0) + 1
+        await super().on_error(interaction, error)
+
+def finish_command_timing():
+    """현재 명령어 측정을 끝내고 히스토그램에 기록 (측정 중이 아니면 None)"""
+    timing = current_timing.get()
+    if timing is None:
+        return None
+    current_timing.set(None)
+    metrics.command_duration.observe(time.perf_counter() - timing.started, timing.command)
+    metrics.command_db.observe(timing.db_seconds, timing.command)
+    return timing
+
+class AttendanceBot(commands.AutoShardedBot):
+    """게이트웨이 연결 전에 한 번만 필요한 시작 작업을 setup_hook에서 처리하는 봇"""
+
+    legacy_rows_pending = False
+    metrics_server = None
+    loop_lag_task = None
+
+    async def setup_hook(self):
+        """로그인 직후, 게이트웨이 연결 전에 한 번 실행 (재연결 시에는 실행되지 않음)"""
+        # 스키마 마이그레이션
+        logger.info('저장소: %s', STORAGE_BACKEND)
+        if isinstance(db, MemoryStorage):
+            logger.warning('메모리 저장소는 봇을 종료하면 모든 기록이 사라집니다.')
+        applied = await db.migrate()
+        for version, description in applied:
+            logger.info('스키마 마이그레이션 v%d 적용: %s', version, description)
+
+        # 명령어와 예약 작업 확장 (기존 데이터를 배정할 때 길드별 예약 작업 목록이 필요하므로 먼저 불러옴)
+        for name in EXTENSIONS:
+            await self.load_extension(name)
+
+        # 길드 구분 이전 데이터 배정 (길드를 지정하지 않았으면 on_ready에서 처리)
+        self.legacy_rows_pending = bool(await db.run(lambda tx: tx.count_legacy_rows()))
+        if LEGACY_GUILD_ID and self.legacy_rows_pending:
+            await assign_legacy_rows(LEGACY_GUILD_ID)
+        await load_guild_settings()
+        replayed = await sessions.load()
+        logger.info('출근 상태 복원: %d명 (스냅샷 이후 저널 이벤트 %d건 재생)', len(sessions), replayed)
+        await rankings.load(datetime.now())
+        await status_boards.load()
+        await scheduler.load()
+
+        # 전송 큐 시작 (스케줄러는 출석 채널 인덱스가 생긴 뒤 on_ready에서 시작)
+        outbox.start()
+        self.loop_lag_task = asyncio.create_task(monitor_loop_lag())
+        if METRICS_PORT:
+            self.metrics_server = await asyncio.start_server(handle_metrics_request, METRICS_HOST, METRICS_PORT)
+            logger.info('성능 지표 엔드포인트: http://%s:%d/metrics', METRICS_HOST, METRICS_PORT)
+
+        # 명령어 정의가 바뀐 경우에만 동기화
+        await sync_command_tree(self.tree)
+
+    async def close(self):
+        if self.metrics_server:
+            self.metrics_server.close()
+        if self.loop_lag_task:
+            self.loop_lag_task.cancel()
+        scheduler.stop()
+        status_boards.stop()
+        await outbox.stop()
+        await super().close()
+        await db.close()
+
+# 데이터베이스 유지보수 (빈 페이지 정리, 쿼리 통계, 온라인 백업, WAL 체크포인트)
+BACKUP_STEP_PAGES = 256
+INCREMENTAL_VACUUM_PAGES = 1024
+ANALYSIS_LIMIT = 1000
+
+# 마지막 유지보수 결과 (지표와 /지표에서 표시)
+maintenance_report = {}
+
+def database_pages(conn):
+    """(페이지 크기, 전체 페이지 수, 빈 페이지 수)"""
+    return tuple(conn.execute(f'PRAGMA {name}').fetchone()[0] for name in ('page_size', 'page_count', 'freelist_count'))
+
+def database_file_sizes(path):
+    """(데이터베이스 파일 크기, WAL 파일 크기) 바이트"""
+    return tuple(os.path.getsize(file) if os.path.exists(file) else 0 for file in (path, f'{path}-wal'))
+
+def incremental_vacuum(tx, max_pages=INCREMENTAL_VACUUM_PAGES):
+    """빈 페이지를 최대 max_pages개 파일 끝에서 잘라내고 남은 빈 페이지 수 반환
+
+    auto_vacuum=INCREMENTAL(v8 마이그레이션)인 파일에서만 줄어듭니다. 한 번에 조금씩만 처리하므로
+    DB 워커에서 실행해도 사이사이 명령어의 쓰기가 끼어들 수 있습니다.
+    """
+    conn = tx.conn
+    # 잘라낸 페이지마다 결과 행이 하나씩 나오며 끝까지 읽어야 모두 처리됨
+    conn.execute(f'PRAGMA incremental_vacuum({int(max_pages)})').fetchall()
+    return conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+def optimize_database(tx):
+    """쿼리 계획에 쓰는 통계를 갱신하고 실행한 방식('ANALYZE' 또는 'optimize') 반환
+
+    DB 워커 연결에서 실행해야 PRAGMA optimize가 실제 명령어 쿼리를 보고 통계가 오래된 테이블만
+    다시 분석합니다. 통계가 아직 없으면 ANALYZE로 처음 만들며, analysis_limit으로 인덱스마다
+    읽는 행 수를 제한해 기록이 많아도 짧게 끝납니다.
+    """
+    conn = tx.conn
+    conn.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is None:
+        conn.execute('ANALYZE')
+        return 'ANALYZE'
+    conn.execute('PRAGMA optimize')
+    return 'optimize'
+
+def backup_database(path, backup_dir, keep, step_pages=BACKUP_STEP_PAGES, now=None):
+    """온라인 백업 API로 backup_dir에 '<이름>-YYYYMMDD-HHMMSS.db' 사본을 만들고 최근 keep개만 남김
+
+    스냅샷을 고정한 읽기 전용 연결에서 step_pages 페이지씩 복사합니다. WAL 모드라 복사 중에도
+    봇의 쓰기는 막히지 않으며, 스냅샷이 고정돼 있어 그 사이의 쓰기 때문에 처음부터 다시
+    복사하지도 않습니다. 임시 파일에 복사해 quick_check를 통과한 뒤에 이름을 바꾸므로
+    중간에 실패해도 이전 백업은 그대로 남습니다.
+    반환값: (백업 파일 경로, 파일 크기, 페이지 수, 복사 단계 수)
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    target = os.path.join(backup_dir, f'{stem}-{now or datetime.now():%Y%m%d-%H%M%S}.db')
+    partial = f'{target}.partial'
+    steps = 0
+
+    def progress(status, remaining, total):
+        nonlocal steps
+        steps += 1
 
     try:
-        synced = await bot.tree.sync()
-        print(f'{len(synced)}개의 명령어가 동기화되었습니다.')
-    except Exception as e:
-        print(f'명령어 동기화 실패: {e}')
+        source = open_snapshot(path)
+        try:
+            dest = sqlite3.connect(partial)
+            try:
+                source.backup(dest, pages=step_pages, progress=progress)
+                # 사본은 WAL 파일 없이 파일 하나로 열리도록
+                dest.execute('PRAGMA journal_mode=DELETE')
+                pages = dest.execute('PRAGMA page_count').fetchone()[0]
+                check = dest.execute('PRAGMA quick_check').fetchone()[0]
+            finally:
+                dest.close()
+        finally:
+            source.close()
+        if check != 'ok':
+            raise RuntimeError(f'백업 파일 검사 실패: {check}')
+        os.replace(partial, target)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
 
-# 매일 0시 자동 퇴근 처리
-@tasks.loop(time=dt_time(hour=0, minute=0, second=0))
-async def daily_auto_checkout():
-    """매일 0시에 출근 중인 사람들 자동 퇴근 처리"""
+    # 이름에 시각이 들어 있어 이름순이 곧 시간순
+    backups = sorted(name for name in os.listdir(backup_dir) if name.startswith(f'{stem}-') and name.endswith('.db'))
+    for name in backups[:-keep]:
+        os.remove(os.path.join(backup_dir, name))
+    return target, os.path.getsize(target), pages, steps
+
+def checkpoint_wal(path):
+    """WAL 내용을 데이터베이스 파일에 반영하고 가능하면 WAL 파일을 비움
+
+    잠금을 기다리지 않는 별도 연결에서 실행하므로, 다른 연결이 읽거나 쓰는 중이면 지금 반영할 수
+    있는 만큼만 반영하고 끝납니다 (봇의 쓰기를 막지 않음). 평소에는 SQLite가 WAL이 1000페이지를
+    넘을 때마다 자동으로 체크포인트합니다.
+    반환값: (WAL을 모두 비웠는지, WAL 프레임 수, 반영된 프레임 수)
+    """
+    conn = sqlite3.connect(path, timeout=0)
     try:
-        with get_db() as conn:
-            cursor = conn.cursor()
+        busy, wal_frames, checkpointed = conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+    finally:
+        conn.close()
+    return not busy, wal_frames, checkpointed
+
+# 출근 세션 메모리 저장소
+class SessionStore:
+    """현재 출근 상태의 권위 있는 메모리 사본
+
+    길드 ID -> (사용자 ID -> WorkSession) 형태로 보관합니다. 변경은 메모리에 먼저 반영한 뒤
+    출퇴근 이벤트 저널(attendance_events)에 추가만 하는 방식으로 기록(write-through)하며,
+    기록이 실패하면 메모리 상태를 되돌립니다. 조회 명령어는 디스크에 접근하지 않습니다.
+    시작할 때는 마지막 스냅샷(current_work_status)에 그 뒤의 이벤트만 재생해 복원합니다.
+    """
+
+    def __init__(self, database):
+        self.db = database
+        self._guilds = {}
+        # 자동 퇴근 기록이 커밋되기를 기다리는 세션 (길드 ID, 사용자 ID) -> asyncio.Event
+        self._closing = {}
+        # 기록이 끝난 변경마다 길드 ID로 호출되는 함수들 (실시간 현황판 등)
+        self.listeners = []
+
+    def notify_changed(self, *guild_ids):
+        """guild_ids의 출근 상태가 바뀌었다고 listeners에 알림 (저장소에서 직접 바꾼 뒤 호출)"""
+        for guild_id in guild_ids:
+            for listener in self.listeners:
+                listener(guild_id)
+
+    async def load(self):
+        """스냅샷과 그 뒤의 저널 이벤트로 현재 출근 상태를 복원해 메모리에 적재하고 재생한 이벤트 수 반환"""
+        snapshot, events = await self.db.run(lambda tx: tx.load_journal())
+        self._guilds = {}
+        for session in fold_journal(snapshot, events).values():
+            self._put(session)
+        return len(events)
+
+    def _put(self, session):
+        self._guilds.setdefault(session.guild_id, {})[session.user_id] = session
+
+    def get(self, guild_id, user_id):
+        return self._guilds.get(guild_id, {}).get(user_id)
+
+    async def settled(self, guild_id, user_id):
+        """자동 퇴근 기록 중인 세션이면 커밋(또는 실패)될 때까지 기다린 뒤 현재 세션 반환
+
+        출근 상태를 바꾸는 명령어는 get() 대신 이것으로 확인해야 자동 퇴근 이벤트와 순서가 뒤섞이지 않습니다.
+        """
+        while (guild_id, user_id) in self._closing:
+            await self._closing[(guild_id, user_id)].wait()
+        return self.get(guild_id, user_id)
+
+    def in_guild(self, guild_id):
+        """해당 길드의 출근 중인 세션 목록"""
+        return list(self._guilds.get(guild_id, {}).values())
+
+    def __iter__(self):
+        return iter([session for guild in self._guilds.values() for session in guild.values()])
+
+    def __len__(self):
+        return sum(len(guild) for guild in self._guilds.values())
+
+    def discard(self, guild_id, user_id):
+        guild = self._guilds.get(guild_id)
+        if guild is not None:
+            guild.pop(user_id, None)
+            if not guild:
+                del self._guilds[guild_id]
+
+    async def start(self, guild_id, user_id, username, start_time):
+        """출근 기록 (호출 전 출근 상태가 아님을 확인해야 함)"""
+        # 저널에 저장되는 초 단위로 맞춰 재시작 뒤에도 같은 값이 되도록
+        session = WorkSession(guild_id, user_id, username, start_time.replace(microsecond=0))
+        self._put(session)
+
+        def insert(tx):
+            tx.upsert_users([(guild_id, user_id, username)])
+            tx.append_events([(guild_id, user_id, EVENT_START, to_epoch(session.start_time), None)])
+
+        try:
+            await self.db.run(insert)
+        except Exception:
+            self.discard(guild_id, user_id)
+            raise
+        self.notify_changed(guild_id)
+        return session
+
+    async def finish(self, session, username, end_time, day=None):
+        """퇴근 기록 후 (순수 근무 시간, 휴식 시간) 반환 (day: 기록할 근무 날짜, 기본은 end_time의 날짜)"""
+        end_time = end_time.replace(microsecond=0)
+        work_seconds, total_break = session.totals_at(end_time)
+
+        self.discard(session.guild_id, session.user_id)
+
+        def close(tx):
+            tx.upsert_users([(session.guild_id, session.user_id, username)])
+            record_checkouts(tx, [(session, (day or end_time.date()).isoformat(), end_time)], EVENT_FINISH)
+
+        try:
+            await self.db.run(close)
+        except Exception:
+            self._put(session)
+            raise
+        self.notify_changed(session.guild_id)
+        return work_seconds, total_break
+
+    def close_started_before(self, guild_id, cutoff, end_of_day):
+        """guild_id에서 cutoff 이전에 출근한 세션을 자동 퇴근 중으로 표시하고 퇴근 처리할 값 계산
+
+        각 세션은 end_of_day(session) 시각에 퇴근한 것으로 보며, 휴식 중이면 휴식도 그 시각에 끝납니다.
+        (세션, 근무 날짜, 순수 근무 시간, 휴식 시간, 퇴근 시각) 목록을 반환합니다. 세션은 기록이 커밋될
+        때까지 메모리에 남아 조회에 보이고, 상태를 바꾸는 명령어는 settled()에서 기다립니다. 기록은 호출한
+        쪽이 close_detached()로 처리한 뒤 finish_closing()으로, 실패하면 cancel_closing()으로 마칩니다.
+        """
+        closed = []
+        for session in self.in_guild(guild_id):
+            key = (guild_id, session.user_id)
+            if session.start_time >= cutoff or key in self._closing:
+                continue
+            end_time, day = end_of_day(session)
+            work_seconds, total_break = session.totals_at(end_time)
+
+            self._closing[key] = asyncio.Event()
+            closed.append((session, day, work_seconds, total_break, end_time))
+        return closed
+
+    def _release(self, sessions):
+        for session in sessions:
+            event = self._closing.pop((session.guild_id, session.user_id), None)
+            if event is not None:
+                event.set()
+
+    def finish_closing(self, sessions):
+        """자동 퇴근 기록이 커밋된 세션을 메모리에서 지우고 기다리던 명령어를 깨움"""
+        for session in sessions:
+            if self.get(session.guild_id, session.user_id) is session:
+                self.discard(session.guild_id, session.user_id)
+        self._release(sessions)
+
+    def cancel_closing(self, sessions):
+        """자동 퇴근 기록이 실패한 세션을 출근 상태 그대로 두고 기다리던 명령어를 깨움"""
+        self._release(sessions)
+
+    async def begin_break(self, session, username, reason, break_time):
+        """휴식 시작 기록 (호출 전 휴식 중이 아님을 확인해야 함)"""
+        session.begin_break(break_time.replace(microsecond=0), reason)
+
+        def update(tx):
+            tx.upsert_users([(session.guild_id, session.user_id, username)])
+            tx.append_events([(session.guild_id, session.user_id, EVENT_BREAK, to_epoch(session.break_time), reason)])
+
+        try:
+            await self.db.run(update)
+        except Exception:
+            session.break_time = session.break_reason = None
+            raise
+        self.notify_changed(session.guild_id)
+
+    async def end_break(self, session, return_time):
+        """휴식 종료 기록 후 이번 휴식 시간(초) 반환"""
+        return_time = return_time.replace(microsecond=0)
+        break_start, reason, previous_total = session.break_time, session.break_reason, session.total_break_seconds
+        break_duration = session.end_break(return_time)
+
+        def update(tx):
+            # 복귀 이벤트와 함께 끝난 휴식을 완성된 행으로 추가
+            tx.append_events([(session.guild_id, session.user_id, EVENT_RETURN, to_epoch(return_time), None)])
+            tx.insert_breaks([(session.guild_id, session.user_id, reason, to_epoch(break_start),
+                               to_epoch(return_time), break_duration)])
+
+        try:
+            await self.db.run(update)
+        except Exception:
+            session.break_time, session.break_reason, session.total_break_seconds = break_start, reason, previous_total
+            raise
+        self.notify_changed(session.guild_id)
+        return break_duration
+
+def record_checkouts(tx, checkouts, kind):
+    """퇴근한 세션들을 저널에 남기고 근무 기록/집계와 (휴식 중이었으면) 휴식 기록에 반영
+
+    checkouts: (퇴근 직전의 WorkSession, 근무 날짜, 퇴근 시각) 목록
+    """
+    events, history, breaks = [], [], []
+    for session, day, end_time in checkouts:
+        end = to_epoch(end_time)
+        work_seconds, total_break = session.totals_at(end_time)
+        events.append((session.guild_id, session.user_id, kind, end, day))
+        history.append((session.guild_id, session.user_id, day, to_epoch(session.start_time), end,
+                        work_seconds, total_break))
+        if session.break_time:
+            start = to_epoch(session.break_time)
+            breaks.append((session.guild_id, session.user_id, session.break_reason, start, end, max(0, end - start)))
+    tx.append_events(events)
+    tx.insert_history(history)
+    if breaks:
+        tx.insert_breaks(breaks)
+
+def close_detached(tx, closed):
+    """close_started_before()가 돌려준 세션들을 자동 퇴근으로 기록 (한 트랜잭션)"""
+    record_checkouts(tx, [(session, day, end_time) for session, day, _, _, end_time in closed], EVENT_AUTO_FINISH)
+
+# 주간/월간 근무 시간 랭킹 (메모리)
+class RankingBoard:
+    """한 길드의 한 기간(주/월) 근무 시간 순위표
+
+    (-근무 시간, 사용자 ID) 정렬 리스트로 보관해 갱신, 순위 조회가 O(log n)이고
+    상위 N명은 앞에서부터 N개만 읽습니다.
+    """
+    __slots__ = ('period', 'totals', 'names', 'order')
+
+    def __init__(self, period):
+        self.period = period
+        self.totals = {}
+        self.names = {}
+        self.order = SortedList()
+
+    def add(self, user_id, username, seconds):
+        previous = self.totals.get(user_id)
+        if previous is not None:
+            self.order.remove((-previous, user_id))
+        total = (previous or 0) + seconds
+        self.totals[user_id] = total
+        self.names[user_id] = username
+        self.order.add((-total, user_id))
+
+    def rank(self, user_id):
+        """(순위, 근무 시간) 반환, 기록이 없으면 None (동률은 같은 순위)"""
+        total = self.totals.get(user_id)
+        if total is None:
+            return None
+        return self.order.bisect_left((-total,)) + 1, total
+
+    def top(self, count):
+        return [(self.names[user_id], -negative_total) for negative_total, user_id in self.order.islice(0, count)]
+
+    def __len__(self):
+        return len(self.totals)
+
+class RankingStore:
+    """길드별 주간/월간 RankingBoard 모음
+
+    퇴근과 자정 자동 퇴근 때 record()로 갱신되며 조회 시 데이터베이스에 접근하지 않습니다.
+    시작할 때 집계 테이블에서 길드 시간대 기준 현재 주/월 값을 한 번 읽어 채웁니다. 기간이 바뀌면
+    (다음 주/달의 기록이 들어오거나 조회 시점이 다음 기간이면) 해당 순위표를 비웁니다.
+    """
+
+    PERIODS = {
+        'week': lambda date_str: iso_week_key(date_str),
+        'month': lambda date_str: date_str[:7],
+    }
+
+    def __init__(self, database):
+        self.db = database
+        self._boards = {}
+
+    async def load(self, now, guild_id=None):
+        """집계 테이블에서 길드마다 그 길드 시간대의 현재 주/월 순위표를 다시 생성
+
+        now는 서버 로컬 시각(naive)이며 guild_id를 주면 그 길드의 순위표만 다시 만듭니다
+        (/시간대로 기준 날짜가 바뀐 경우).
+        """
+        # 길드 시간대 날짜는 서버 날짜와 하루 넘게 차이 나지 않으므로 그 사이 기간만 읽어 길드별로 고름
+        days = [(now + timedelta(days=offset)).date().isoformat() for offset in (-1, 0, 1)]
+        periods = {(self.PERIODS['week'](day), self.PERIODS['month'](day)) for day in days}
+
+        def read(tx):
+            totals = {}
+            for week, month in periods:
+                weekly, monthly = tx.ranking_totals(week, month)
+                totals.setdefault(('week', week), weekly)
+                totals.setdefault(('month', month), monthly)
+            return totals
+
+        totals = await self.db.run(read)
+
+        if guild_id is None:
+            self._boards = {}
+        else:
+            for kind in self.PERIODS:
+                self._boards.pop((guild_id, kind), None)
+        todays = {}
+        for (kind, period), rows in totals.items():
+            for row in rows:
+                row_guild_id = row['guild_id']
+                if guild_id is not None and row_guild_id != guild_id:
+                    continue
+                if row_guild_id not in todays:
+                    todays[row_guild_id] = guild_date(row_guild_id, now).isoformat()
+                if self.PERIODS[kind](todays[row_guild_id]) == period:
+                    self._board(row_guild_id, kind, period).add(row['user_id'], row['username'], row['work_seconds'])
+
+    def _board(self, guild_id, kind, period):
+        """period의 순위표 반환. 저장된 순위표가 더 오래된 기간이면 비우고, 더 최신이면 None"""
+        board = self._boards.get((guild_id, kind))
+        if board is None or board.period < period:
+            board = self._boards[(guild_id, kind)] = RankingBoard(period)
+        elif board.period > period:
+            return None
+        return board
+
+    def record(self, guild_id, user_id, username, date_str, work_seconds):
+        """완료된 근무 한 건(date_str 날짜로 기록된)을 주간/월간 순위표에 반영"""
+        for kind, period_of in self.PERIODS.items():
+            board = self._board(guild_id, kind, period_of(date_str))
+            if board is not None:
+                board.add(user_id, username, work_seconds)
+
+    def current(self, guild_id, kind, today):
+        """길드 시간대의 오늘(today) 기준 현재 기간의 순위표"""
+        period = self.PERIODS[kind](today.isoformat())
+        return self._board(guild_id, kind, period) or RankingBoard(period)
+
+# /휴식통계에서 계속 재사용하는 사유 조회 테이블
+break_reasons = ReasonIndex()
+
+# 발신 메시지 전송 큐
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷"""
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, now):
+        """토큰 하나를 쓰려면 기다려야 하는 시간(초), 0이면 바로 사용 가능"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+class OutboundMessage:
+    """전송 대기 중인 메시지 한 건과 전달 상태 (queued / sending / retrying / sent / failed)"""
+    __slots__ = ('channel_id', 'kwargs', 'status', 'attempts', 'error', 'sent_message', '_done')
+
+    def __init__(self, channel_id, kwargs):
+        self.channel_id = channel_id
+        self.kwargs = kwargs
+        self.status = 'queued'
+        self.attempts = 0
+        self.error = None
+        self.sent_message = None
+        self._done = asyncio.Event()
+
+    async def wait(self):
+        """전송이 끝날 때까지 대기 후 성공 여부 반환"""
+        await self._done.wait()
+        return self.status == 'sent'
+
+class MessageDispatcher:
+    """레이트 리밋을 고려해 채널 메시지를 보내는 비동기 전송 큐
+
+    - 크기가 제한된 큐: 가득 차면 enqueue가 자리가 날 때까지 대기
+    - 전역 토큰 버킷과 채널별 토큰 버킷을 모두 통과해야 전송
+    - 여러 워커가 동시에 전송하며, 429/5xx 오류는 지수 백오프로 재시도
+    """
+
+    def __init__(self, client, maxsize=1000, workers=4, global_rate=45.0, channel_rate=1.0,
+                 channel_burst=5, max_attempts=5, base_backoff=1.0):
+        self.client = client
+        self.maxsize = maxsize
+        self.worker_count = workers
+        self.channel_rate = channel_rate
+        self.channel_burst = channel_burst
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.channel_buckets = {}
+        self.counters = {'queued': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+        self._queue = None
+        self._workers = []
+        self._pending_retries = {}  # 재시도 대기 태스크 -> OutboundMessage
+
+    def is_running(self):
+        return bool(self._workers)
+
+    def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._workers = [asyncio.create_task(self._worker(), name=f'outbox-worker-{i}')
+                         for i in range(self.worker_count)]
 
-            # 현재 출근 중인 사람들 조회
-            cursor.execute('SELECT * FROM current_work_status')
-            working_users = cursor.fetchall()
+    async def stop(self, timeout=10.0):
+        """재시도 대기 중인 것까지 남은 메시지를 최대 timeout초 동안 전송한 뒤 워커 종료
 
-            if not working_users:
+        시간 안에 보내지 못한 메시지는 실패로 표시하므로 wait()로 기다리던 쪽도 끝납니다.
+        """
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning('전송 큐 종료: 미전송 메시지 %d건, 재시도 대기 %d건',
+                           self._queue.qsize(), len(self._pending_retries))
+        retries = dict(self._pending_retries)
+        for task in list(self._workers) + list(retries):
+            task.cancel()
+        await asyncio.gather(*self._workers, *retries, return_exceptions=True)
+        self._workers = []
+
+        stopped = RuntimeError('전송 큐가 종료되어 보내지 못했습니다')
+        for message in retries.values():
+            self._finish(message, 'failed', stopped)
+        while not self._queue.empty():
+            self._finish(self._queue.get_nowait(), 'failed', stopped)
+            self._queue.task_done()
+
+    async def _drain(self):
+        # 재시도 대기 중인 메시지는 다시 큐에 들어온 뒤에 끝나므로, 큐와 재시도 대기가 모두 빌 때까지 반복
+        while True:
+            await self._queue.join()
+            if not self._pending_retries:
                 return
-
-            current_time = datetime.now()
-            yesterday = (current_time - timedelta(days=1)).date()
-
-            daily_summary = []
-
-            for user in working_users:
-                user_id = user['user_id']
-                username = user['username']
-                start_time = datetime.fromisoformat(user['start_time'])
-                total_break = user['total_break_seconds']
-
-                # 휴식 중이면 휴식 시간도 추가
-                if user['break_time']:
-                    break_start = datetime.fromisoformat(user['break_time'])
-                    total_break += int((current_time - break_start).total_seconds())
-
-                # 근무 시간 계산 (전날 23:59:59까지)
-                end_of_day = datetime.combine(yesterday, dt_time(23, 59, 59))
-                total_seconds = int((end_of_day - start_time).total_seconds())
-                work_seconds = total_seconds - total_break
-
-                # 히스토리에 저장
-                cursor.execute('''
-                    INSERT INTO work_history (user_id, username, date, start_time, end_time, work_seconds, break_seconds)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (user_id, username, yesterday.isoformat(), start_time.isoformat(),
-                      end_of_day.isoformat(), work_seconds, total_break))
-
-                # 현재 상태에서 삭제
-                cursor.execute('DELETE FROM current_work_status WHERE user_id = ?', (user_id,))
-
-                # 요약 정보 추가
-                hours = work_seconds // 3600
-                minutes = (work_seconds % 3600) // 60
-                daily_summary.append(f"**{username}**: {hours}시간 {minutes}분")
-
-            # 출석-기록 채널에 일일 리포트 전송
-            channel = discord.utils.get(bot.get_all_channels(), name=ALLOWED_CHANNEL_NAME)
-            if channel and daily_summary:
-                embed = discord.Embed(
-                    title=f"📊 일일 근무 시간 리포트 ({yesterday.strftime('%Y년 %m월 %d일')})",
-                    description="\n".join(daily_summary),
-                    color=discord.Color.blue()
-                )
-                embed.set_footer(text="자동 퇴근 처리되었습니다.")
-                await channel.send(embed=embed)
-
-    except Exception as e:
-        print(f'자동 퇴근 처리 오류: {e}')
-
-# 월요일 0시 주간 리포트
-@tasks.loop(time=dt_time(hour=0, minute=0, second=0))
-async def weekly_report():
-    """월요일 0시에 주간 리포트 전송"""
-    try:
-        current_time = datetime.now()
-
-        # 월요일이 아니면 종료
-        if current_time.weekday() != 0:  # 0 = 월요일
+            await asyncio.wait(list(self._pending_retries))
+
+    async def enqueue(self, channel_id, **kwargs):
+        """channel.send(**kwargs)를 큐에 넣고 상태 추적용 OutboundMessage 반환"""
+        self.start()
+        message = OutboundMessage(channel_id, kwargs)
+        await self._queue.put(message)
+        self.counters['queued'] += 1
+        return message
+
+    def stats(self):
+        return dict(self.counters, pending=self._queue.qsize() if self._queue else 0)
+
+    async def _acquire(self, channel_id):
+        """전역/채널 버킷에서 토큰을 얻을 때까지 대기"""
+        bucket = self.channel_buckets.get(channel_id)
+        if bucket is None:
+            bucket = self.channel_buckets[channel_id] = TokenBucket(self.channel_rate, self.channel_burst)
+
+        while True:
+            now = time.monotonic()
+            wait = max(self.global_bucket.wait_time(now), bucket.wait_time(now))
+            if wait <= 0:
+                self.global_bucket.consume()
+                bucket.consume()
+                return
+            await asyncio.sleep(wait)
+
+    async def _worker(self):
+        while True:
+            message = await self._queue.get()
+            try:
+                await self._deliver(message)
+            except asyncio.CancelledError:
+                self._finish(message, 'failed', RuntimeError('전송 큐가 종료되어 보내지 못했습니다'))
+                raise
+            except Exception as e:
+                self._finish(message, 'failed', e)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, message):
+        channel = self.client.get_channel(message.channel_id)
+        if channel is None:
+            self._finish(message, 'failed', LookupError(f'채널을 찾을 수 없습니다: {message.channel_id}'))
             return
 
-        # 지난주 월요일 ~ 일요일 계산
-        last_monday = (current_time - timedelta(days=7)).date()
-        last_sunday = (current_time - timedelta(days=1)).date()
-
-        with get_db() as conn:
-            cursor = conn.cursor()
-
-            # 주간 근무 시간 집계
-            cursor.execute('''
-                SELECT
-                    username,
-                    SUM(work_seconds) as total_work_seconds,
-                    COUNT(*) as work_days,
-                    AVG(work_seconds) as avg_work_seconds
-                FROM work_history
-                WHERE date BETWEEN ? AND ?
-                GROUP BY user_id, username
-                ORDER BY total_work_seconds DESC
-            ''', (last_monday.isoformat(), last_sunday.isoformat()))
-
-            weekly_stats = cursor.fetchall()
-
-            if not weekly_stats:
+        await self._acquire(message.channel_id)
+        message.status = 'sending'
+        message.attempts += 1
+
+        try:
+            message.sent_message = await channel.send(**message.kwargs)
+        except (discord.HTTPException, discord.RateLimited) as e:
+            status = getattr(e, 'status', 429)
+            retryable = status == 429 or status >= 500
+            if not retryable or message.attempts >= self.max_attempts:
+                self._finish(message, 'failed', e)
                 return
 
-            # 출석-기록 채널에 주간 리포트 전송
-            channel = discord.utils.get(bot.get_all_channels(), name=ALLOWED_CHANNEL_NAME)
-            if channel:
-                embed = discord.Embed(
-                    title=f"📈 주간 근무 시간 리포트",
-                    description=f"{last_monday.strftime('%Y년 %m월 %d일')} ~ {last_sunday.strftime('%m월 %d일')}",
-                    color=discord.Color.purple()
-                )
-
-                for stat in weekly_stats:
-                    total_hours = stat['total_work_seconds'] // 3600
-                    total_minutes = (stat['total_work_seconds'] % 3600) // 60
-                    avg_hours = int(stat['avg_work_seconds']) // 3600
-                    avg_minutes = (int(stat['avg_work_seconds']) % 3600) // 60
-
-                    embed.add_field(
-                        name=f"👤 {stat['username']}",
-                        value=f"총 근무: {total_hours}시간 {total_minutes}분\n"
-                              f"출근 일수: {stat['work_days']}일\n"
-                              f"평균 근무: {avg_hours}시간 {avg_minutes}분",
-                        inline=False
-                    )
-
-                embed.set_footer(text="수고하셨습니다!")
-                await channel.send(embed=embed)
-
-    except Exception as e:
-        print(f'주간 리포트 오류: {e}')
-
-@bot.tree.command(name="출근", description="출근을 기록합니다")
-@channel_only()
-async def work_start(interaction: discord.Interaction):
-    """출근 명령어"""
-    # 먼저 응답 대기 상태로 전환 (3초 제한 회피)
-    await interaction.response.defer()
-
-    user_id = str(interaction.user.id)
-    username = interaction.user.display_name
-    current_time = datetime.now()
-
-    with get_db() as conn:
-        cursor = conn.cursor()
-
-        # 이미 출근한 경우 확인
-        cursor.execute('SELECT user_id FROM current_work_status WHERE user_id = ?', (user_id,))
-        if cursor.fetchone():
-            await interaction.followup.send(
-                f"❌ {interaction.user.mention}님은 이미 출근 상태입니다!",
-                ephemeral=True
-            )
+            # 지수 백오프 후 다시 큐에 넣음 (대기 중에도 워커는 다른 메시지를 처리)
+            retry_after = getattr(e, 'retry_after', None)
+            delay = retry_after or min(60.0, self.base_backoff * 2 ** (message.attempts - 1))
+            delay += random.uniform(0, delay / 4)
+            message.status = 'retrying'
+            message.error = e
+            self.counters['retried'] += 1
+            task = asyncio.create_task(self._requeue(message, delay))
+            self._pending_retries[task] = message
+            task.add_done_callback(lambda task: self._pending_retries.pop(task, None))
             return
 
-        # 출근 기록
-        cursor.execute('''
-            INSERT INTO current_work_status (user_id, username, start_time, total_break_seconds)
-            VALUES (?, ?, ?, 0)
-        ''', (user_id, username, current_time.isoformat()))
-
-    time_str = current_time.strftime('%Y년 %m월 %d일 %H:%M:%S')
-
-    embed = discord.Embed(
-        title="🟢 출근",
-        description=f"{interaction.user.mention}님이 출근했습니다.",
-        color=discord.Color.green()
-    )
-    embed.add_field(name="출근 시간", value=time_str, inline=False)
-    embed.set_footer(text="출근 기록됨")
-
-    await interaction.followup.send(embed=embed)
+        self._finish(message, 'sent')
 
-@bot.tree.command(name="퇴근", description="퇴근을 기록하고 근무 시간을 계산합니다")
-@channel_only()
-async def work_end(interaction: discord.Interaction):
-    """퇴근 명령어"""
-    # 먼저 응답 대기 상태로 전환 (3초 제한 회피)
-    await interaction.response.defer()
+    async def _requeue(self, message, delay):
+        await asyncio.sleep(delay)
+        await self._queue.put(message)
 
-    user_id = str(interaction.user.id)
-    username = interaction.user.display_name
-    current_time = datetime.now()
-    today = current_time.date()
+    def _finish(self, message, status, error=None):
+        message.status = status
+        message.error = error
+        self.counters[status] += 1
+        if status == 'failed':
+            logger.error('메시지 전송 실패 (채널 %s, %d회 시도): %s', message.channel_id, message.attempts, error)
+        message._done.set()
 
-    with get_db() as conn:
-        cursor = conn.cursor()
+# 길드별 출석 채널 인덱스 (guild_id -> 같은 이름의 채널 ID 집합)
+report_channels = {}
 
-        # 출근 기록 조회
-        cursor.execute('SELECT * FROM current_work_status WHERE user_id = ?', (user_id,))
-        record = cursor.fetchone()
+def index_guild_channel(guild):
+    """길드의 출석 채널(같은 이름이 여러 개면 모두)을 찾아 인덱스 갱신"""
+    channel_ids = {channel.id for channel in guild.text_channels if channel.name == ALLOWED_CHANNEL_NAME}
+    if channel_ids:
+        report_channels[guild.id] = channel_ids
+    else:
+        report_channels.pop(guild.id, None)
 
-        if not record:
-            await interaction.followup.send(
-                f"❌ {interaction.user.mention}님은 출근 기록이 없습니다!",
-                ephemeral=True
-            )
-            return
+async def send_report(guild_id, embed):
+    """길드의 출석 채널로 보낼 리포트를 전송 큐에 넣고 OutboundMessage 반환 (채널이 없으면 None)
 
-        start_time = datetime.fromisoformat(record['start_time'])
-        total_break = record['total_break_seconds']
-
-        # 휴식 중인 경우 자동 복귀 처리
-        if record['break_time']:
-            break_start = datetime.fromisoformat(record['break_time'])
-            break_duration = int((current_time - break_start).total_seconds())
-            total_break += break_duration
-
-        # 근무 시간 계산
-        total_seconds = int((current_time - start_time).total_seconds())
-        work_seconds = total_seconds - total_break
-
-        # 히스토리에 저장
-        cursor.execute('''
-            INSERT INTO work_history (user_id, username, date, start_time, end_time, work_seconds, break_seconds)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, username, today.isoformat(), start_time.isoformat(),
-              current_time.isoformat(), work_seconds, total_break))
-
-        # 현재 상태에서 삭제
-        cursor.execute('DELETE FROM current_work_status WHERE user_id = ?', (user_id,))
-
-    # 시간 계산
-    hours = work_seconds // 3600
-    minutes = (work_seconds % 3600) // 60
-    break_hours = total_break // 3600
-    break_minutes = (total_break % 3600) // 60
-
-    time_str = current_time.strftime('%Y년 %m월 %d일 %H:%M:%S')
-
-    embed = discord.Embed(
-        title="🔴 퇴근",
-        description=f"{interaction.user.mention}님이 퇴근했습니다.",
-        color=discord.Color.red()
-    )
-    embed.add_field(name="퇴근 시간", value=time_str, inline=False)
-    embed.add_field(name="순수 근무 시간", value=f"{hours}시간 {minutes}분", inline=True)
-    if total_break > 0:
-        embed.add_field(name="휴식 시간", value=f"{break_hours}시간 {break_minutes}분", inline=True)
-    embed.set_footer(text="퇴근 기록됨")
-
-    await interaction.followup.send(embed=embed)
-
-@bot.tree.command(name="휴식", description="휴식을 시작합니다")
-@channel_only()
-@app_commands.describe(사유="휴식 사유를 입력하세요")
-async def work_break(interaction: discord.Interaction, 사유: str):
-    """휴식 명령어"""
-    # 먼저 응답 대기 상태로 전환 (3초 제한 회피)
-    await interaction.response.defer()
-
-    user_id = str(interaction.user.id)
-    username = interaction.user.display_name
-    current_time = datetime.now()
-
-    with get_db() as conn:
-        cursor = conn.cursor()
-
-        # 출근 상태 확인
-        cursor.execute('SELECT break_time FROM current_work_status WHERE user_id = ?', (user_id,))
-        record = cursor.fetchone()
-
-        if not record:
-            await interaction.followup.send(
-                f"❌ {interaction.user.mention}님은 출근 상태가 아닙니다!",
-                ephemeral=True
-            )
-            return
+    출석 채널이 여러 개면 매번 같은 곳으로 가도록 ID가 가장 작은(가장 먼저 만든) 채널로 보냅니다.
+    """
+    channel_ids = report_channels.get(guild_id)
+    if not channel_ids:
+        return None
+    return await outbox.enqueue(min(channel_ids), embed=embed)
 
-        # 이미 휴식 중인 경우
-        if record['break_time']:
-            await interaction.followup.send(
-                f"❌ {interaction.user.mention}님은 이미 휴식 중입니다!",
+def channel_only():
+    """특정 채널에서만 명령어 사용 가능하도록 제한"""
+    async def predicate(interaction: discord.Interaction) -> bool:
+        if interaction.channel_id not in report_channels.get(interaction.guild_id, ()):
+            await interaction.response.send_message(
+                f"❌ 이 명령어는 **{ALLOWED_CHANNEL_NAME}** 채널에서만 사용할 수 있습니다!",
                 ephemeral=True
             )
-            return
-
-        # 휴식 시작
-        cursor.execute('UPDATE current_work_status SET break_time = ? WHERE user_id = ?',
-                      (current_time.isoformat(), user_id))
-
-        # 휴식 히스토리에 기록
-        cursor.execute('''
-            INSERT INTO break_history (user_id, username, reason, start_time)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, username, 사유, current_time.isoformat()))
-
-    time_str = current_time.strftime('%Y년 %m월 %d일 %H:%M:%S')
-
-    embed = discord.Embed(
-        title="🟡 휴식 시작",
-        description=f"{interaction.user.mention}님이 **{사유}** 사유로 휴식합니다.",
-        color=discord.Color.gold()
-    )
-    embed.add_field(name="시간", value=time_str, inline=False)
-    embed.set_footer(text="휴식 기록됨")
-
-    await interaction.followup.send(embed=embed)
-
-@bot.tree.command(name="복귀", description="휴식을 종료하고 업무에 복귀합니다")
-@channel_only()
-async def work_return(interaction: discord.Interaction):
-    """복귀 명령어"""
-    # 먼저 응답 대기 상태로 전환 (3초 제한 회피)
-    await interaction.response.defer()
-
-    user_id = str(interaction.user.id)
-    current_time = datetime.now()
-
-    with get_db() as conn:
-        cursor = conn.cursor()
-
-        # 출근 상태 및 휴식 정보 조회
-        cursor.execute('SELECT break_time, total_break_seconds FROM current_work_status WHERE user_id = ?', (user_id,))
-        record = cursor.fetchone()
+            return False
+        return True
+    return app_commands.check(predicate)
 
-        if not record:
-            await interaction.followup.send(
-                f"❌ {interaction.user.mention}님은 출근 상태가 아닙니다!",
-                ephemeral=True
-            )
+def collect_runtime_metrics():
+    """DB 워커, 전송 큐, 세션 저장소의 현재 값을 게이지/카운터 형식으로 반환"""
+    lines = [
+        '# TYPE attendance_db_batches_total counter',
+        f"attendance_db_batches_total {db.stats['batches']}",
+        '# TYPE attendance_db_jobs_total counter',
+        f"attendance_db_jobs_total {db.stats['jobs']}",
+        '# TYPE attendance_db_failed_jobs_total counter',
+        f"attendance_db_failed_jobs_total {db.stats['failed_jobs']}",
+        '# TYPE attendance_db_commit_seconds_total counter',
+        f"attendance_db_commit_seconds_total {db.stats['commit_seconds_total']}",
+        '# TYPE attendance_outbox_messages_total counter',
+    ]
+    outbox_stats = outbox.stats()
+    for status in ('queued', 'sent', 'retried', 'failed'):
+        lines.append(f'attendance_outbox_messages_total{{status="{status}"}} {outbox_stats[status]}')
+    lines += [
+        '# TYPE attendance_outbox_pending gauge',
+        f"attendance_outbox_pending {outbox_stats['pending']}",
+        '# TYPE attendance_active_sessions gauge',
+        f'attendance_active_sessions {len(sessions)}',
+        '# TYPE attendance_status_board_events_total counter',
+    ]
+    for event, count in status_boards.counters.items():
+        lines.append(f'attendance_status_board_events_total{{event="{event}"}} {count}')
+    if db.path:
+        db_bytes, wal_bytes = database_file_sizes(db.path)
+        lines += [
+            '# TYPE attendance_db_file_bytes gauge',
+            f'attendance_db_file_bytes{{file="db"}} {db_bytes}',
+            f'attendance_db_file_bytes{{file="wal"}} {wal_bytes}',
+        ]
+    if maintenance_report:
+        lines += [
+            '# TYPE attendance_db_pages gauge',
+            f'attendance_db_pages{{state="total"}} {maintenance_report["page_count"]}',
+            f'attendance_db_pages{{state="free"}} {maintenance_report["free_pages"]}',
+            '# TYPE attendance_db_maintenance_last_timestamp_seconds gauge',
+            f'attendance_db_maintenance_last_timestamp_seconds {maintenance_report["finished_at"]}',
+            '# TYPE attendance_db_maintenance_step_seconds gauge',
+        ]
+        for step, seconds in maintenance_report['steps'].items():
+            lines.append(f'attendance_db_maintenance_step_seconds{{step="{step}"}} {seconds}')
+        if maintenance_report['backup_bytes'] is not None:
+            lines += [
+                '# TYPE attendance_db_backup_bytes gauge',
+                f'attendance_db_backup_bytes {maintenance_report["backup_bytes"]}',
+            ]
+    return lines
+
+# 현황 임베드 (Discord 제한: 설명 4096자, 필드 값 1024자, 필드 25개, 메시지의 임베드 전체 6000자)
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBED_FIELD_LIMIT = 1024
+EMBED_MAX_FIELDS = 25
+EMBED_MESSAGE_LIMIT = 6000
+
+def chunk_lines(lines, first_limit, limit):
+    """줄 목록을 첫 덩어리는 first_limit자, 이후는 limit자 이하로 나누기 (줄 중간에서는 자르지 않음)"""
+    chunk, size, current = [], 0, first_limit
+    for line in lines:
+        line = line[:limit]
+        if chunk and size + 1 + len(line) > current:
+            yield '\n'.join(chunk)
+            chunk, size, current = [], 0, limit
+        size += len(line) + (1 if chunk else 0)
+        chunk.append(line)
+    if chunk:
+        yield '\n'.join(chunk)
+
+def build_status_embeds(heading, sections, footer):
+    """(제목, 색상, 줄 목록) 섹션마다 임베드 하나씩 만든 목록
+
+    줄은 설명에 먼저 담고 넘치면 필드로 나눕니다. 메시지 전체 6000자 제한을 넘는 줄은
+    '… 외 N명'으로 줄입니다. 빈 섹션은 건너뜁니다.
+    """
+    sections = [section for section in sections if section[2]]
+    budget = EMBED_MESSAGE_LIMIT - len(heading) - len(footer) - sum(64 + len(title) for title, _, _ in sections)
+
+    # 짧은 섹션부터 남은 글자 수를 고르게 나눠 주고, 다 못 쓴 몫은 긴 섹션이 가져감
+    needs = [sum(len(line) + 1 for line in lines) for _, _, lines in sections]
+    shares = [0] * len(sections)
+    for rank, index in enumerate(sorted(range(len(sections)), key=needs.__getitem__)):
+        shares[index] = min(needs[index], budget // (len(sections) - rank))
+        budget -= shares[index]
+
+    embeds = []
+    for (title, color, lines), budget in zip(sections, shares):
+        shown = []
+        for line in lines:
+            if len(line) + 1 > budget:
+                break
+            budget -= len(line) + 1
+            shown.append(line)
+        if len(shown) < len(lines):
+            shown.append(f"… 외 {len(lines) - len(shown)}명")
+
+        chunks = list(chunk_lines(shown, EMBED_DESCRIPTION_LIMIT, EMBED_FIELD_LIMIT))
+        embed = discord.Embed(title=title, description=chunks[0], color=color)
+        for chunk in chunks[1:EMBED_MAX_FIELDS + 1]:
+            embed.add_field(name='\u200b', value=chunk, inline=False)
+        embeds.append(embed)
+
+    if not embeds:
+        embeds.append(discord.Embed(description="현재 출근한 인원이 없습니다.", color=discord.Color.blue()))
+    embeds[0].set_author(name=heading)
+    embeds[-1].set_footer(text=footer)
+    return embeds
+
+class StatusBoards:
+    """길드별 실시간 현황판 (출석 채널에 고정된 메시지 하나를 계속 수정)
+
+    출근 상태가 바뀌면 SessionStore가 mark(guild_id)를 호출합니다. 길드마다 갱신 태스크가
+    하나만 돌며 debounce초 동안 변경을 모은 뒤 메모리 세션으로 메시지를 한 번 수정하고,
+    같은 메시지는 min_interval초에 한 번까지만 수정합니다. 변경이 몰려도 수정은 한 번으로 합쳐지고,
+    보는 사람이 많아도 데이터베이스 조회나 API 호출이 늘지 않습니다. 경과 시간은 Discord 상대 시각
+    표시로 보내므로 변경이 없을 때 메시지를 다시 고칠 필요가 없습니다.
+    """
+
+    def __init__(self, client, database, debounce=2.0, min_interval=5.0):
+        self.client = client
+        self.db = database
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.boards = {}
+        self.counters = {'changes': 0, 'edits': 0, 'failed': 0}
+        self._dirty = set()
+        self._tasks = {}
+        self._last_edit = {}
+
+    async def load(self):
+        """저장된 현황판 위치를 읽고, 꺼져 있던 동안의 변경을 반영하도록 한 번씩 갱신 예약"""
+        rows = await self.db.run(lambda tx: tx.status_boards())
+        self.boards = {row['guild_id']: (row['channel_id'], row['message_id']) for row in rows}
+        for guild_id in self.boards:
+            self.mark(guild_id)
+
+    def stop(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._tasks.clear()
+
+    def jump_url(self, guild_id):
+        channel_id, message_id = self.boards[guild_id]
+        return f'https://discord.com/channels/{guild_id}/{channel_id}/{message_id}'
+
+    def render(self, guild_id):
+        working = []
+        on_break = []
+        for session in sorted(sessions.in_guild(guild_id), key=lambda session: session.start_time):
+            start = to_epoch(session.start_time)
+            if session.break_time:
+                on_break.append(f"**{session.username}** - 출근 <t:{start}:t> · 휴식 <t:{to_epoch(session.break_time)}:R> 시작")
+            else:
+                working.append(f"**{session.username}** - 출근 <t:{start}:t> (<t:{start}:R>)")
+
+        embeds = build_status_embeds("📌 실시간 출근 현황", [
+            (f"🟢 근무 중 ({len(working)}명)", discord.Color.green(), working),
+            (f"🟡 휴식 중 ({len(on_break)}명)", discord.Color.gold(), on_break),
+        ], f"총 {len(working) + len(on_break)}명 출근 · 상태가 바뀌면 자동으로 갱신됩니다")
+        embeds[-1].timestamp = datetime.now().astimezone()
+        return embeds
+
+    def mark(self, guild_id):
+        """길드의 출근 상태가 바뀌었음을 알림 (현황판이 없으면 무시)"""
+        if guild_id not in self.boards:
             return
-
-        # 휴식 중이 아닌 경우
-        if not record['break_time']:
-            await interaction.followup.send(
-                f"❌ {interaction.user.mention}님은 휴식 중이 아닙니다!",
-                ephemeral=True
-            )
+        self.counters['changes'] += 1
+        self._dirty.add(guild_id)
+        if guild_id not in self._tasks:
+            self._tasks[guild_id] = asyncio.create_task(self._flush_later(guild_id), name=f'status-board-{guild_id}')
+
+    async def _flush_later(self, guild_id):
+        try:
+            # 수정하는 동안 들어온 변경은 다음 차례에 한 번 더 반영
+            while guild_id in self._dirty:
+                last = self._last_edit.get(guild_id, float('-inf'))
+                await asyncio.sleep(max(self.debounce, last + self.min_interval - time.monotonic()))
+                self._dirty.discard(guild_id)
+                await self._edit(guild_id)
+        finally:
+            self._tasks.pop(guild_id, None)
+
+    async def _edit(self, guild_id):
+        board = self.boards.get(guild_id)
+        if board is None:
             return
+        channel_id, message_id = board
+        self._last_edit[guild_id] = time.monotonic()
+        message = self.client.get_partial_messageable(channel_id).get_partial_message(message_id)
+        try:
+            await message.edit(content=None, embeds=self.render(guild_id))
+            self.counters['edits'] += 1
+        except discord.NotFound:
+            logger.warning('현황판 메시지가 삭제되어 현황판을 끕니다 (길드 %s)', guild_id)
+            await self.disable(guild_id)
+        except discord.HTTPException as e:
+            self.counters['failed'] += 1
+            logger.error('현황판 갱신 실패 (길드 %s): %s', guild_id, e)
+
+    async def enable(self, guild_id, channel):
+        """channel에 새 현황판을 올려 고정하고 이전 현황판은 삭제. 고정 성공 여부 반환"""
+        previous = self.boards.get(guild_id)
+        message = await channel.send(embeds=self.render(guild_id))
+        try:
+            await message.pin(reason="실시간 출근 현황판")
+            pinned = True
+        except discord.HTTPException:
+            pinned = False
+
+        await self.db.run(lambda tx: tx.save_status_board(guild_id, channel.id, message.id))
+        self.boards[guild_id] = (channel.id, message.id)
+        self._last_edit[guild_id] = time.monotonic()
+
+        if previous is not None:
+            await self._delete_message(*previous)
+        return pinned
+
+    async def disable(self, guild_id):
+        """현황판을 끄고 메시지를 삭제. 켜져 있었는지 반환"""
+        board = self.boards.pop(guild_id, None)
+        self._dirty.discard(guild_id)
+        self._last_edit.pop(guild_id, None)
+        await self.db.run(lambda tx: tx.delete_status_board(guild_id))
+        if board is None:
+            return False
+        await self._delete_message(*board)
+        return True
 
-        # 휴식 시간 계산
-        break_start = datetime.fromisoformat(record['break_time'])
-        break_duration = int((current_time - break_start).total_seconds())
-        new_total_break = record['total_break_seconds'] + break_duration
-
-        # 현재 상태 업데이트
-        cursor.execute('''
-            UPDATE current_work_status
-            SET break_time = NULL, total_break_seconds = ?
-            WHERE user_id = ?
-        ''', (new_total_break, user_id))
-
-        # 휴식 히스토리 업데이트 (가장 최근 기록)
-        cursor.execute('''
-            UPDATE break_history
-            SET end_time = ?, duration_seconds = ?
-            WHERE user_id = ? AND end_time IS NULL
-            ORDER BY start_time DESC
-            LIMIT 1
-        ''', (current_time.isoformat(), break_duration, user_id))
-
-    # 휴식 시간 표시
-    break_minutes = break_duration // 60
-    break_seconds = break_duration % 60
-
-    time_str = current_time.strftime('%Y년 %m월 %d일 %H:%M:%S')
-
-    embed = discord.Embed(
-        title="🟢 업무 복귀",
-        description=f"{interaction.user.mention}님이 업무에 복귀했습니다.",
-        color=discord.Color.green()
-    )
-    embed.add_field(name="복귀 시간", value=time_str, inline=False)
-    embed.add_field(name="휴식 시간", value=f"{break_minutes}분 {break_seconds}초", inline=False)
-    embed.set_footer(text="복귀 기록됨")
-
-    await interaction.followup.send(embed=embed)
-
-@bot.tree.command(name="현황", description="현재 출근한 인원을 확인합니다")
-@channel_only()
-async def work_status_all(interaction: discord.Interaction):
-    """전체 현황 명령어"""
-    # 먼저 응답 대기 상태로 전환 (3초 제한 회피)
-    await interaction.response.defer()
-
-    with get_db() as conn:
-        cursor = conn.cursor()
+    async def _delete_message(self, channel_id, message_id):
+        try:
+            await self.client.get_partial_messageable(channel_id).get_partial_message(message_id).delete()
+        except discord.HTTPException:
+            pass
+
+def command_tree_hash(tree):
+    """명령어 트리 정의(이름, 설명, 옵션, 권한 등)의 SHA-256 해시"""
+    payload = []
+    for command in sorted(tree.get_commands(), key=lambda c: c.name):
+        try:
+            payload.append(command.to_dict(tree))
+        except TypeError:  # discord.py 2.3 이하
+            payload.append(command.to_dict())
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+async def sync_command_tree(tree):
+    """저장된 해시와 다를 때만 명령어 트리를 Discord에 업로드"""
+    tree_hash = command_tree_hash(tree)
+    if not FORCE_COMMAND_SYNC and await db.run(lambda tx: tx.get_meta('command_tree_hash')) == tree_hash:
+        logger.info('명령어 정의가 바뀌지 않아 동기화를 건너뜁니다.')
+        return
 
-        # 현재 출근한 모든 사람 조회
-        cursor.execute('SELECT * FROM current_work_status')
-        all_users = cursor.fetchall()
+    try:
+        synced = await tree.sync()
+        await db.run(lambda tx: tx.set_meta('command_tree_hash', tree_hash))
+        logger.info('%d개의 명령어가 동기화되었습니다.', len(synced))
+    except Exception as e:
+        logger.exception('명령어 동기화 실패: %s', e)
+
+async def assign_legacy_rows(guild_id):
+    """길드 구분 이전 데이터와 길드별 예약 작업의 실행 기록을 guild_id에 배정하고 메모리 상태 다시 적재"""
+    jobs = [job.name for job in scheduler.jobs if job.per_guild]
+    moved = await db.run(lambda tx: tx.adopt_legacy_rows(guild_id, jobs))
+    bot.legacy_rows_pending = False
+    if moved:
+        logger.info('기존 기록 %d건을 길드 %s에 배정했습니다.', moved, guild_id)
+    await sessions.load()
+    await rankings.load(datetime.now())
+    await scheduler.load()
 
-        if not all_users:
-            await interaction.followup.send("📊 현재 출근한 인원이 없습니다.", ephemeral=True)
+async def on_ready():
+    """봇이 준비되었을 때 (재연결 시에도 호출되므로 가벼운 작업만 수행)"""
+    logger.info('%s 봇이 준비되었습니다!', bot.user)
+
+    # 출석 채널 인덱스 구성
+    report_channels.clear()
+    for guild in bot.guilds:
+        index_guild_channel(guild)
+
+    # 길드 구분 이전 데이터가 남아 있고 봇이 속한 길드가 하나뿐이면 그 길드에 배정
+    # (스케줄러가 배정 전의 세션을 자동 퇴근시키거나 길드 0의 실행 기록을 만들지 않도록 시작 전에)
+    if bot.legacy_rows_pending and len(bot.guilds) == 1:
+        await assign_legacy_rows(bot.guilds[0].id)
+
+    # 리포트를 보낼 채널을 알아야 하므로 첫 on_ready 이후에 스케줄러 시작 (이미 실행 중이면 그대로)
+    scheduler.start()
+
+async def on_guild_join(guild):
+    index_guild_channel(guild)
+
+async def on_guild_remove(guild):
+    report_channels.pop(guild.id, None)
+
+async def on_guild_channel_create(channel):
+    if channel.name == ALLOWED_CHANNEL_NAME:
+        index_guild_channel(channel.guild)
+
+async def on_guild_channel_update(before, after):
+    if ALLOWED_CHANNEL_NAME in (before.name, after.name):
+        index_guild_channel(after.guild)
+
+async def on_guild_channel_delete(channel):
+    if channel.id in report_channels.get(channel.guild.id, ()):
+        index_guild_channel(channel.guild)
+
+async def on_app_command_completion(interaction, command):
+    # 디스패치된 태스크는 명령어 태스크의 컨텍스트 복사본에서 실행되므로 측정값이 그대로 보임
+    finish_command_timing()
+
+# 길드별 시간대
+async def load_guild_settings():
+    rows = await db.run(lambda tx: tx.guild_settings())
+    guild_zones.clear()
+    for row in rows:
+        try:
+            guild_zones[row['guild_id']] = ZoneInfo(row['timezone'])
+        except (ZoneInfoNotFoundError, ValueError):
+            logger.warning('알 수 없는 시간대 무시 (길드 %s): %s', row['guild_id'], row['timezone'])
+
+# 스케줄 작업
+class ScheduledJob:
+    """스케줄러에 등록하는 작업
+
+    매일 at 시각(weekday를 주면 그 요일만)에 길드 시간대 기준으로 길드마다 한 번 실행됩니다.
+    per_guild가 False면 서버 로컬 시간대 기준으로 한 번만 실행됩니다(길드 ID 0).
+    after에 적은 작업이 같은 회차에 함께 실행될 때는 항상 그 작업 뒤에 실행됩니다.
+
+    실행 순서: prepare()(이벤트 루프) -> execute()(회차의 다른 작업들과 하나의 DB 트랜잭션에서)
+    -> complete()(커밋 이후). 트랜잭션이 실패하면 rollback()이 호출됩니다.
+    실행 기록은 handled()가 돌려준 (길드, 회차)에만 남습니다.
+    standalone 작업은 트랜잭션에 참여하지 않고 run()만 실행합니다.
+    """
+    name = None
+    at = dt_time(0, 0)
+    weekday = None
+    per_guild = True
+    after = ()
+    standalone = False
+
+    def period(self, now):
+        """now(시간대가 있는 시각) 기준 가장 최근 실행 예정일 ('YYYY-MM-DD')"""
+        day = now.date() if now.time() >= self.at else now.date() - timedelta(days=1)
+        if self.weekday is not None:
+            day -= timedelta(days=(day.weekday() - self.weekday) % 7)
+        return day.isoformat()
+
+    async def prepare(self, runs, now):
+        return None
+
+    def execute(self, tx, runs, state):
+        return None
+
+    async def complete(self, runs, state, result):
+        pass
+
+    def rollback(self, runs, state):
+        pass
+
+    def handled(self, runs, state):
+        """runs 중 이번에 실제로 처리해 실행 기록을 남길 (길드 ID, 회차) 목록
+
+        여기서 빠진 회차는 기록하지 않으므로 다음 검사 때 다시 실행됩니다.
+        """
+        return runs
+
+    async def run(self, runs, now):
+        pass
+
+def record_job_runs(tx, runs, finished_at):
+    """runs: (작업 이름, 길드 ID, 회차) 목록"""
+    tx.record_job_runs(runs, finished_at)
+
+def execute_scheduled_jobs(tx, batch, finished_at):
+    """한 회차의 작업들을 의존 순서대로 같은 트랜잭션에서 실행하고 실행 기록 갱신"""
+    results = []
+    for job, runs, state in batch:
+        results.append(job.execute(tx, runs, state))
+        record_job_runs(tx, [(job.name, guild_id, period) for guild_id, period in job.handled(runs, state)],
+                        finished_at)
+    return results
+
+class JobScheduler:
+    """길드 시간대에 맞춰 ScheduledJob을 실행하는 단일 스케줄러
+
+    interval초마다 깨어나 (작업, 길드)별로 가장 최근 실행 예정 회차를 계산하고, job_runs에 기록된
+    회차보다 새로우면 실행합니다. 봇이 꺼져 있던 동안 놓친 회차는 다시 켜진 뒤 한 번 실행되며
+    (밀린 여러 회차는 가장 최근 회차 하나로 합쳐짐), 처음 보는 (작업, 길드)는 현재 회차를 실행한
+    것으로 기록만 합니다.
+
+    같은 때 실행할 작업들은 의존 순서대로 하나의 DB 작업 안에서 실행되므로 같은 스냅샷을 보고,
+    주간 리포트는 같은 회차의 자동 퇴근 기록까지 읽습니다. 실행 기록도 같은 트랜잭션에서 갱신되므로
+    실패하면 아무것도 기록되지 않고 다음에 다시 시도합니다.
+    """
+
+    def __init__(self, database, jobs=(), interval=30.0):
+        self.db = database
+        self.jobs = self._ordered(jobs)
+        self.interval = interval
+        self.last_runs = {}
+        self._task = None
+
+    @staticmethod
+    def _ordered(jobs):
+        """after 의존 관계에 따라 정렬 (등록되지 않은 작업에 대한 의존은 무시)"""
+        by_name = {job.name: job for job in jobs}
+        ordered, visiting = [], set()
+
+        def visit(job):
+            if job in ordered:
+                return
+            if job.name in visiting:
+                raise ValueError(f'스케줄 작업 의존 관계에 순환이 있습니다: {job.name}')
+            visiting.add(job.name)
+            for name in job.after:
+                if name in by_name:
+                    visit(by_name[name])
+            ordered.append(job)
+
+        for job in jobs:
+            visit(job)
+        return ordered
+
+    def add_jobs(self, *jobs):
+        """작업 등록 (같은 이름의 작업은 교체). 실행 기록은 이름으로 찾으므로 교체해도 이어짐"""
+        names = {job.name for job in jobs}
+        self.jobs = self._ordered([job for job in self.jobs if job.name not in names] + list(jobs))
+
+    def remove_jobs(self, *names):
+        self.jobs = [job for job in self.jobs if job.name not in names]
+
+    async def load(self):
+        rows = await self.db.run(lambda tx: tx.job_runs())
+        self.last_runs = {(row['job'], row['guild_id']): row['period'] for row in rows}
+
+    def start(self):
+        """실행 루프 시작. 작업이 길드의 출석 채널과 세션을 보므로 봇이 준비된 뒤(on_ready)에 호출"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name='scheduler')
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_pending()
+            except Exception as e:
+                logger.exception('스케줄 작업 오류: %s', e)
+            await asyncio.sleep(self.interval)
+
+    def due(self, now):
+        """now(서버 로컬 시각) 기준 실행할 {작업: [(길드 ID, 회차)]}와 처음 보는 (작업, 길드 ID, 회차) 목록"""
+        guild_ids = set(report_channels) | {session.guild_id for session in sessions}
+        # 길드가 배정되지 않은 기존 세션(길드 ID 0)은 배정될 때까지 길드별 작업에서 제외
+        guild_ids.discard(0)
+        due = {}
+        unseen = []
+        for job in self.jobs:
+            for guild_id in (guild_ids if job.per_guild else (0,)):
+                period = job.period(now.astimezone(guild_zone(guild_id) if job.per_guild else None))
+                last = self.last_runs.get((job.name, guild_id))
+                if last is None:
+                    unseen.append((job.name, guild_id, period))
+                elif last < period:
+                    due.setdefault(job, []).append((guild_id, period))
+        return due, unseen
+
+    async def run_pending(self, now=None):
+        """지금 실행할 회차가 있으면 실행"""
+        now = now or datetime.now()
+        due, unseen = self.due(now)
+        if unseen:
+            await self.db.run(record_job_runs, unseen, to_epoch(now))
+            self.last_runs.update(((name, guild_id), period) for name, guild_id, period in unseen)
+        if not due:
             return
 
-    current_time = datetime.now()
-
-    # 출근 인원과 휴식 인원 분류
-    working = []
-    on_break = []
-
-    for record in all_users:
-        username = record['username']
-        start_time = datetime.fromisoformat(record['start_time'])
-        total_break = record['total_break_seconds']
-
-        elapsed = current_time - start_time
-        elapsed_seconds = int(elapsed.total_seconds()) - total_break
-        hours = elapsed_seconds // 3600
-        minutes = (elapsed_seconds % 3600) // 60
-
-        start_time_str = start_time.strftime('%H:%M')
+        with job_timer('scheduler_pass'):
+            batch = []
+            try:
+                for job in self.jobs:
+                    if job in due and not job.standalone:
+                        batch.append((job, due[job], await job.prepare(due[job], now)))
+                results = await self.db.run(execute_scheduled_jobs, batch, to_epoch(now))
+            except Exception:
+                for job, runs, state in reversed(batch):
+                    job.rollback(runs, state)
+                raise
+
+            for (job, runs, state), result in zip(batch, results):
+                self.last_runs.update(((job.name, guild_id), period)
+                                      for guild_id, period in job.handled(runs, state))
+                try:
+                    with job_timer(job.name):
+                        await job.complete(runs, state, result)
+                except Exception as e:
+                    logger.exception('스케줄 작업 후처리 오류 (%s): %s', job.name, e)
+
+        # 트랜잭션 밖에서 도는 작업은 성공한 뒤에 실행 기록
+        for job in self.jobs:
+            if job in due and job.standalone:
+                try:
+                    with job_timer(job.name):
+                        await job.run(due[job], now)
+                except Exception as e:
+                    logger.exception('스케줄 작업 오류 (%s): %s', job.name, e)
+                    continue
+                runs = [(job.name, guild_id, period) for guild_id, period in due[job]]
+                await self.db.run(record_job_runs, runs, to_epoch(now))
+                self.last_runs.update(((name, guild_id), period) for name, guild_id, period in runs)
+
+def owner_only():
+    """봇 소유자(애플리케이션 소유자 또는 팀원)만 사용 가능하도록 제한"""
+    async def predicate(interaction: discord.Interaction) -> bool:
+        if not await interaction.client.is_owner(interaction.user):
+            await interaction.response.send_message("❌ 봇 소유자만 사용할 수 있는 명령어입니다.", ephemeral=True)
+            return False
+        return True
+    return app_commands.check(predicate)
 
-        if record['break_time']:
-            break_start = datetime.fromisoformat(record['break_time'])
-            break_elapsed = int((current_time - break_start).total_seconds())
-            break_minutes = break_elapsed // 60
-            on_break.append(f"**{username}** - 출근: {start_time_str} (휴식 {break_minutes}분째)")
+@app_commands.command(name="리로드", description="확장 모듈 하나를 재시작 없이 다시 불러옵니다 (봇 소유자)")
+@app_commands.default_permissions(administrator=True)
+@owner_only()
+@app_commands.describe(확장="다시 불러올 확장")
+@app_commands.choices(확장=[app_commands.Choice(name=name.split('.')[-1], value=name) for name in EXTENSIONS])
+async def reload_extension(interaction: discord.Interaction, 확장: str):
+    """확장 다시 불러오기 명령어 (게이트웨이 연결과 메모리 상태는 그대로 유지)"""
+    await defer_response(interaction, ephemeral=True)
+    started = time.perf_counter()
+    try:
+        if 확장 in bot.extensions:
+            await bot.reload_extension(확장)
         else:
-            working.append(f"**{username}** - 출근: {start_time_str} (근무 {hours}시간 {minutes}분)")
-
-    embed = discord.Embed(
-        title="📊 출근 현황",
-        color=discord.Color.blue()
-    )
-
-    if working:
-        embed.add_field(
-            name=f"🟢 근무 중 ({len(working)}명)",
-            value="\n".join(working),
-            inline=False
-        )
-
-    if on_break:
-        embed.add_field(
-            name=f"🟡 휴식 중 ({len(on_break)}명)",
-            value="\n".join(on_break),
-            inline=False
-        )
-
-    embed.set_footer(text=f"총 {len(working) + len(on_break)}명 출근")
-
-    await interaction.followup.send(embed=embed)
-
-@bot.tree.command(name="상태", description="내 현재 출근 상태를 확인합니다")
-@channel_only()
-async def work_status(interaction: discord.Interaction):
-    """개인 상태 확인 명령어"""
-    # 먼저 응답 대기 상태로 전환 (3초 제한 회피)
-    await interaction.response.defer(ephemeral=True)
-
-    user_id = str(interaction.user.id)
-
-    with get_db() as conn:
-        cursor = conn.cursor()
-
-        # 출근 상태 조회
-        cursor.execute('SELECT * FROM current_work_status WHERE user_id = ?', (user_id,))
-        record = cursor.fetchone()
-
-        if not record:
-            await interaction.followup.send(
-                f"📊 {interaction.user.mention}님은 현재 **퇴근** 상태입니다.",
-                ephemeral=True
-            )
-            return
-
-    start_time = datetime.fromisoformat(record['start_time'])
-    current_time = datetime.now()
-    total_break = record['total_break_seconds']
-
-    # 순수 근무 시간 계산
-    total_duration = current_time - start_time
-    work_seconds = int(total_duration.total_seconds()) - total_break
-
-    # 휴식 중이면 현재 휴식 시간도 빼기
-    if record['break_time']:
-        break_start = datetime.fromisoformat(record['break_time'])
-        current_break = int((current_time - break_start).total_seconds())
-        work_seconds -= current_break
-
-    hours = work_seconds // 3600
-    minutes = (work_seconds % 3600) // 60
-
-    start_time_str = start_time.strftime('%H:%M:%S')
-
-    embed = discord.Embed(
-        title="📊 내 상태",
-        color=discord.Color.blue()
-    )
-
-    if record['break_time']:
-        embed.description = f"{interaction.user.mention}님은 현재 **휴식 중**입니다."
-        break_start = datetime.fromisoformat(record['break_time'])
-        break_elapsed = int((current_time - break_start).total_seconds())
-        break_minutes = break_elapsed // 60
-        embed.add_field(name="현재 휴식 시간", value=f"{break_minutes}분", inline=False)
-    else:
-        embed.description = f"{interaction.user.mention}님은 현재 **근무 중**입니다."
-
-    embed.add_field(name="출근 시간", value=start_time_str, inline=True)
-    embed.add_field(name="순수 근무 시간", value=f"{hours}시간 {minutes}분", inline=True)
-
-    if total_break > 0:
-        total_break_minutes = total_break // 60
-        embed.add_field(name="누적 휴식 시간", value=f"{total_break_minutes}분", inline=True)
-
-    await interaction.followup.send(embed=embed, ephemeral=True)
-
-@bot.tree.command(name="명령어", description="봇 사용법을 확인합니다")
-@channel_only()
-async def help_command(interaction: discord.Interaction):
-    """도움말 명령어"""
-    embed = discord.Embed(
-        title="📖 출퇴근 봇 사용 가이드",
-        description="출퇴근 기록 봇의 모든 명령어입니다.",
-        color=discord.Color.purple()
-    )
-
-    embed.add_field(
-        name="🟢 /출근",
-        value="출근을 기록합니다.",
-        inline=False
-    )
-
-    embed.add_field(
-        name="🔴 /퇴근",
-        value="퇴근을 기록하고 순수 근무 시간을 계산합니다.\n(휴식 시간은 자동으로 제외됩니다)",
-        inline=False
-    )
-
-    embed.add_field(
-        name="🟡 /휴식 [사유]",
-        value="휴식을 시작합니다. 사유를 입력해주세요.\n예: `/휴식 점심식사`",
-        inline=False
-    )
-
-    embed.add_field(
-        name="🟢 /복귀",
-        value="휴식을 종료하고 업무에 복귀합니다.",
-        inline=False
-    )
-
-    embed.add_field(
-        name="📊 /상태",
-        value="내 현재 출근 상태를 확인합니다.",
-        inline=False
-    )
-
-    embed.add_field(
-        name="📊 /현황",
-        value="현재 출근한 모든 인원의 현황을 확인합니다.",
-        inline=False
-    )
-
-    embed.add_field(
-        name="📖 /명령어",
-        value="이 도움말을 표시합니다.",
-        inline=False
-    )
-
-    embed.set_footer(text="💡 휴식 시간은 근무 시간에서 자동으로 제외됩니다!")
-
-    await interaction.response.send_message(embed=embed)
+            await bot.load_extension(확장)
+    except commands.ExtensionError as e:
+        # 다시 불러오기에 실패하면 discord.py가 이전 모듈을 그대로 복구
+        logger.exception('확장 다시 불러오기 실패 (%s): %s', 확장, e)
+        await send_followup(interaction, f"❌ `{확장}`을 불러오지 못해 이전 버전을 유지합니다: {e}", ephemeral=True)
+        return
+    elapsed = time.perf_counter() - started
+    logger.info('확장 다시 불러옴: %s (%.3f초)', 확장, elapsed)
+
+    # 명령어 이름/옵션이 바뀐 경우에만 동기화 (콜백만 바뀌었으면 동기화 없이 바로 적용)
+    await sync_command_tree(bot.tree)
+    await send_followup(interaction, f"✅ `{확장}`을 다시 불러왔습니다. ({elapsed:.3f}초)", ephemeral=True)
+
+# 봇과 공유 상태 (create_bot()이 만들고, 확장 모듈은 그 뒤에 `from bot import ...`로 가져감)
+# 이 모듈을 불러오기만 해서는 저장소, 전송 큐, 로그 파일이 생기지 않음
+bot = db = sessions = rankings = outbox = status_boards = scheduler = None
+
+def create_bot(storage=None):
+    """저장소와 공유 상태, 봇을 만들어 모듈 전역에 등록하고 봇 반환
+
+    storage를 주면 설정(STORAGE_BACKEND) 대신 그 저장소를 씁니다 (벤치마크, 테스트). 저장소 연결은 처음 사용할 때
+    (setup_hook의 마이그레이션) 맺습니다. 예약 작업은 cogs.jobs 확장이 불러올 때 스케줄러에 등록합니다.
+    여러 번 불러도 지표 수집 함수는 한 번만 등록됩니다.
+    """
+    global bot, db, sessions, rankings, outbox, status_boards, scheduler
+    db = storage or create_storage()
+    sessions = SessionStore(db)
+    rankings = RankingStore(db)
+    bot = AttendanceBot(command_prefix='/', intents=intents, shard_count=SHARD_COUNT, tree_cls=InstrumentedCommandTree)
+    outbox = MessageDispatcher(bot)
+    status_boards = StatusBoards(bot, db)
+    sessions.listeners.append(status_boards.mark)
+    scheduler = JobScheduler(db)
+    # collect_runtime_metrics는 호출 시점의 모듈 전역을 읽으므로 한 번만 등록하면 새 봇에도 적용됨
+    if collect_runtime_metrics not in metrics.collectors:
+        metrics.collectors.append(collect_runtime_metrics)
+
+    for handler in (on_ready, on_guild_join, on_guild_remove, on_guild_channel_create, on_guild_channel_update,
+                    on_guild_channel_delete, on_app_command_completion):
+        bot.event(handler)
+    bot.tree.add_command(reload_extension)
+    return bot
 
 # 봇 실행
 if __name__ == "__main__":
-    bot.run(TOKEN)
\ No newline at end of file
+    setup_logging()
+    # discord.py 기본 콘솔 핸들러 대신 위에서 설정한 큐 기반 로깅을 그대로 사용
+    create_bot().run(TOKEN, log_handler=None)
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""휴식 통계 리포트 (오프라인)
+
+봇의 /휴식통계와 같은 집계 함수로 데이터베이스 파일에서 직접 사용자별/사유별 휴식 통계를 만듭니다.
+읽기 전용 연결에서 읽으므로 봇이 실행 중이어도 사용할 수 있습니다. numpy가 필요합니다.
+
+사용 예:
+    python break_report.py --start 2025-10-01 --end 2025-10-31
+    python break_report.py --by reason --guild 123456789 --format json > breaks.json
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+import attendance
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def parse_args(argv=None):
+    today = datetime.now().date()
+    parser = argparse.ArgumentParser(description="휴식 통계 리포트")
+    parser.add_argument('--db', default=attendance.DB_FILE, help="데이터베이스 파일 경로")
+    parser.add_argument('--start', type=parse_date, default=today - timedelta(days=30), help="시작일 (YYYY-MM-DD, 기본: 30일 전)")
+    parser.add_argument('--end', type=parse_date, default=today, help="종료일 (YYYY-MM-DD, 기본: 오늘)")
+    parser.add_argument('--guild', type=int, help="길드 ID (생략하면 전체)")
+    parser.add_argument('--by', choices=('user', 'reason'), default='user', help="사용자별 또는 사유별")
+    parser.add_argument('--format', choices=('text', 'json'), default='text', help="출력 형식")
+    args = parser.parse_args(argv)
+    if args.start > args.end:
+        parser.error("시작일이 종료일보다 늦습니다.")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        stats, hourly = attendance.read_break_stats(args.db, args.start, args.end, args.guild, args.by)
+    except (RuntimeError, sqlite3.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - started
+
+    if args.format == 'json':
+        json.dump({'start': args.start.isoformat(), 'end': args.end.isoformat(), 'by': args.by,
+                   'hourly': hourly, 'stats': stats}, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+
+    print(f"휴식 통계 ({args.start} ~ {args.end}, {'사용자별' if args.by == 'user' else '사유별'})")
+    print(f"{'이름':<16}{'횟수':>6}{'합계':>12}{'중앙값':>10}  시간대(0~23시)")
+    for row in stats:
+        print(f"{row['name']:<16}{row['count']:>6}{attendance.format_duration(row['total_seconds']):>12}"
+              f"{attendance.format_duration(row['median_seconds']):>10}  {attendance.format_hourly(row['hourly'])}")
+    print(f"전체 {sum(hourly)}회  {attendance.format_hourly(hourly)}")
+    print(f"완료: {elapsed:.2f}초", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""봇 확장 모듈 (bot.EXTENSIONS 순서로 불러오며 /리로드로 하나씩 다시 불러올 수 있음)"""
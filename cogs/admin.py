@@ -0,0 +1,222 @@
+"""관리 명령어와 도움말 (/시간대, /집계재구성, /지표, /명령어)"""
+import time
+from datetime import datetime
+
+import discord
+from discord import app_commands
+
+from bot import (
+    channel_only, db, defer_response, guild_zone, guild_zones, maintenance_report, metrics, outbox, rankings,
+    send_followup, sessions, ZoneInfo, ZoneInfoNotFoundError,
+)
+
+@app_commands.command(name="시간대", description="이 서버의 자동 퇴근/리포트 기준 시간대를 확인하거나 바꿉니다 (관리자)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+@app_commands.describe(이름="IANA 시간대 이름 (예: Asia/Seoul, America/Los_Angeles). 비우면 현재 설정 확인")
+async def set_timezone(interaction: discord.Interaction, 이름: str = None):
+    """길드 시간대 설정 명령어"""
+    if 이름 is None:
+        zone = guild_zone(interaction.guild_id)
+        current = str(zone) if zone else f"서버 로컬 시간대 ({datetime.now().astimezone():%Z, UTC%z})"
+        await interaction.response.send_message(
+            f"🕛 현재 시간대: **{current}** (지금 {datetime.now().astimezone(zone):%Y-%m-%d %H:%M})",
+            ephemeral=True
+        )
+        return
+
+    try:
+        zone = ZoneInfo(이름)
+    except (ZoneInfoNotFoundError, ValueError):
+        await interaction.response.send_message(
+            "❌ 알 수 없는 시간대입니다. `Asia/Seoul` 같은 IANA 시간대 이름을 입력해주세요.", ephemeral=True
+        )
+        return
+
+    await db.run(lambda tx: tx.set_guild_timezone(interaction.guild_id, 이름))
+    guild_zones[interaction.guild_id] = zone
+    # 주/월 경계가 새 시간대 기준으로 바뀌므로 이 길드의 순위표를 다시 생성
+    await rankings.load(datetime.now(), interaction.guild_id)
+    await interaction.response.send_message(
+        f"✅ 시간대를 **{이름}**으로 바꿨습니다. (지금 {datetime.now().astimezone(zone):%Y-%m-%d %H:%M})\n"
+        "자동 퇴근과 주간 리포트는 이 시간대의 0시에 실행됩니다.",
+        ephemeral=True
+    )
+
+@app_commands.command(name="집계재구성", description="이 서버의 근무 기록으로 일별/주별 집계를 다시 생성합니다 (관리자)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+async def rebuild_summary(interaction: discord.Interaction):
+    """집계 테이블 재구성 명령어"""
+    await defer_response(interaction, ephemeral=True)
+
+    started = time.perf_counter()
+    days, weeks = await db.run(lambda tx: tx.rebuild_rollups(interaction.guild_id))
+    await rankings.load(datetime.now(), interaction.guild_id)
+    elapsed = time.perf_counter() - started
+
+    await send_followup(interaction,
+        f"✅ 집계를 다시 생성했습니다. (일별 {days}행, 주별 {weeks}행, {elapsed:.2f}초)",
+        ephemeral=True
+    )
+
+def format_seconds(value):
+    return '-' if value is None else f'{value * 1000:.1f}ms'
+
+@app_commands.command(name="지표", description="명령어 지연 시간과 DB/전송 큐 지표를 확인합니다 (관리자)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+async def show_metrics(interaction: discord.Interaction):
+    """성능 지표 요약 명령어"""
+    embed = discord.Embed(title="📈 성능 지표", color=discord.Color.dark_grey())
+
+    lines = []
+    for (command,), (_, _, count) in sorted(metrics.command_duration.series()):
+        lines.append(
+            f"`/{command}` {count}회 · p50 {format_seconds(metrics.command_duration.quantile(0.5, command))}"
+            f" · p95 {format_seconds(metrics.command_duration.quantile(0.95, command))}"
+            f" · DB p95 {format_seconds(metrics.command_db.quantile(0.95, command))}"
+            f" · defer→응답 p95 {format_seconds(metrics.defer_to_followup.quantile(0.95, command))}"
+        )
+    embed.add_field(name="명령어", value="\n".join(lines)[:1024] or "기록 없음", inline=False)
+
+    jobs = [
+        f"`{job}` {count}회 · 평균 {format_seconds(total / count)}"
+        for (job,), (_, total, count) in sorted(metrics.job_duration.series())
+    ]
+    embed.add_field(name="스케줄 작업", value="\n".join(jobs) or "기록 없음", inline=False)
+
+    batches = db.stats['batches']
+    embed.add_field(
+        name="DB",
+        value=(
+            f"작업 {db.stats['jobs']}개 / 커밋 {batches}회 (실패 {db.stats['failed_jobs']})\n"
+            f"커밋 평균 {format_seconds(db.stats['commit_seconds_total'] / batches if batches else None)}"
+            f" · 최대 {format_seconds(db.stats['commit_seconds_max'])}"
+        ),
+        inline=False
+    )
+    if maintenance_report:
+        report = maintenance_report
+        embed.add_field(
+            name="마지막 유지보수",
+            value=(
+                f"{datetime.fromtimestamp(report['finished_at']):%m-%d %H:%M}"
+                f" · 파일 {report['db_bytes'] / 1024 / 1024:.1f}MB"
+                f" · {report['page_count']}페이지 (빈 페이지 {report['free_pages']})\n"
+                + " · ".join(f"{step} {format_seconds(seconds)}" for step, seconds in report['steps'].items())
+                + (f" · 백업 {report['backup_bytes'] / 1024 / 1024:.1f}MB" if report['backup_bytes'] is not None else "")
+            ),
+            inline=False
+        )
+
+    outbox_stats = outbox.stats()
+    embed.add_field(
+        name="전송 큐",
+        value=(
+            f"대기 {outbox_stats['pending']} · 전송 {outbox_stats['sent']}"
+            f" · 재시도 {outbox_stats['retried']} · 실패 {outbox_stats['failed']}"
+        ),
+        inline=False
+    )
+    embed.add_field(
+        name="이벤트 루프 지연",
+        value=(
+            f"p50 {format_seconds(metrics.loop_lag.quantile(0.5))}"
+            f" · p99 {format_seconds(metrics.loop_lag.quantile(0.99))}"
+        ),
+        inline=True
+    )
+    embed.add_field(name="출근 중", value=f"{len(sessions)}명", inline=True)
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@app_commands.command(name="명령어", description="봇 사용법을 확인합니다")
+@channel_only()
+async def help_command(interaction: discord.Interaction):
+    """도움말 명령어"""
+    embed = discord.Embed(
+        title="📖 출퇴근 봇 사용 가이드",
+        description="출퇴근 기록 봇의 모든 명령어입니다.",
+        color=discord.Color.purple()
+    )
+
+    embed.add_field(
+        name="🟢 /출근",
+        value="출근을 기록합니다.",
+        inline=False
+    )
+
+    embed.add_field(
+        name="🔴 /퇴근",
+        value="퇴근을 기록하고 순수 근무 시간을 계산합니다.\n(휴식 시간은 자동으로 제외됩니다)",
+        inline=False
+    )
+
+    embed.add_field(
+        name="🟡 /휴식 [사유]",
+        value="휴식을 시작합니다. 사유를 입력해주세요.\n예: `/휴식 점심식사`",
+        inline=False
+    )
+
+    embed.add_field(
+        name="🟢 /복귀",
+        value="휴식을 종료하고 업무에 복귀합니다.",
+        inline=False
+    )
+
+    embed.add_field(
+        name="📊 /상태",
+        value="내 현재 출근 상태를 확인합니다.",
+        inline=False
+    )
+
+    embed.add_field(
+        name="📊 /현황",
+        value="현재 출근한 모든 인원의 현황을 확인합니다.",
+        inline=False
+    )
+
+    embed.add_field(
+        name="📌 /현황판 [켜기|끄기]",
+        value="출석 채널에 자동으로 갱신되는 현황판을 고정합니다. (관리자)",
+        inline=False
+    )
+
+    embed.add_field(
+        name="🕛 /시간대 [이름]",
+        value="자동 퇴근과 리포트 기준 시간대를 확인하거나 바꿉니다. (관리자)\n예: `/시간대 Asia/Seoul`",
+        inline=False
+    )
+
+    embed.add_field(
+        name="📜 /기록 [종류] [시작일] [종료일]",
+        value="내 지난 근무/휴식 기록을 페이지별로 확인합니다.\n예: `/기록 근무 2025-10-01 2025-10-31`",
+        inline=False
+    )
+
+    embed.add_field(
+        name="🏆 /랭킹 [기간] [인원]",
+        value="이번 주/이번 달 근무 시간 순위와 내 순위를 확인합니다.\n예: `/랭킹 월간 5`",
+        inline=False
+    )
+
+    embed.add_field(
+        name="☕ /휴식통계 [기준] [시작일] [종료일]",
+        value="사용자별/사유별 휴식 횟수, 합계, 중앙값과 시간대 분포를 확인합니다.\n예: `/휴식통계 사유`",
+        inline=False
+    )
+
+    embed.add_field(
+        name="📖 /명령어",
+        value="이 도움말을 표시합니다.",
+        inline=False
+    )
+
+    embed.set_footer(text="💡 휴식 시간은 근무 시간에서 자동으로 제외됩니다!")
+
+    await interaction.response.send_message(embed=embed)
+
+async def setup(bot):
+    for command in (set_timezone, rebuild_summary, show_metrics, help_command):
+        bot.tree.add_command(command)
@@ -0,0 +1,221 @@
+"""자정 자동 퇴근, 주간 리포트, 저널 스냅샷, 기록 보관, DB 유지보수 예약 작업
+
+작업 정의만 이 확장에 있고 실행 기록(job_runs)과 스케줄러는 bot 모듈에 있으므로,
+확장을 다시 불러와도 밀린 회차 판단은 그대로 이어집니다.
+"""
+import asyncio
+from datetime import datetime, timedelta, time as dt_time
+
+import discord
+
+from bot import (
+    aggregate_work_reports, ARCHIVE_AFTER_DAYS, ARCHIVE_DIR, archive_history, BACKUP_DIR, BACKUP_KEEP,
+    backup_database, checkpoint_wal, close_detached, database_file_sizes, database_pages, db, format_duration,
+    guild_date, guild_midnight, incremental_vacuum, job_timer, logger, maintenance_report, optimize_database,
+    OVERTIME_HOURS, rankings, report_channels, scheduler, ScheduledJob, send_report, sessions, to_epoch,
+)
+
+class AutoCheckoutJob(ScheduledJob):
+    """길드 시간대 0시: 그 전에 출근한 사람을 출근한 날 23:59:59로 퇴근 처리하고 일일 리포트 전송
+
+    봇이 꺼져 있어 며칠 뒤에 실행되더라도 각자 출근한 날짜로 기록됩니다.
+    """
+    name = 'auto_checkout'
+
+    async def prepare(self, runs, now):
+        closed = []
+        for guild_id, period in runs:
+            def end_of_day(session, guild_id=guild_id):
+                day = guild_date(guild_id, session.start_time)
+                return guild_midnight(guild_id, day + timedelta(days=1)) - timedelta(seconds=1), day.isoformat()
+
+            midnight = guild_midnight(guild_id, datetime.strptime(period, '%Y-%m-%d').date())
+            closed += sessions.close_started_before(guild_id, midnight, end_of_day)
+        return closed
+
+    def execute(self, tx, runs, closed):
+        if closed:
+            close_detached(tx, closed)
+
+    def rollback(self, runs, closed):
+        sessions.cancel_closing([session for session, *_ in closed])
+
+    async def complete(self, runs, closed, result):
+        # 커밋된 뒤에야 메모리에서 지움 (그때까지는 출근 중으로 보이고 명령어는 기다림)
+        sessions.finish_closing([session for session, *_ in closed])
+        if not closed:
+            return
+        logger.info('자동 퇴근 처리 완료: %d명', len(closed))
+
+        # 길드별 요약 정보 생성 (커밋 이후)
+        daily_summary = {}
+        for session, day, work_seconds, _, _ in closed:
+            rankings.record(session.guild_id, session.user_id, session.username, day, work_seconds)
+            daily_summary.setdefault(session.guild_id, []).append((day, session.username, work_seconds))
+        sessions.notify_changed(*daily_summary)
+
+        # 각 길드의 출석-기록 채널에 일일 리포트 전송
+        for guild_id, period in runs:
+            entries = daily_summary.get(guild_id)
+            if not entries:
+                continue
+            yesterday = (datetime.strptime(period, '%Y-%m-%d') - timedelta(days=1)).date().isoformat()
+            lines = [
+                f"**{username}**: {format_duration(work_seconds)}" + (f" ({day[5:]})" if day != yesterday else "")
+                for day, username, work_seconds in entries
+            ]
+            embed = discord.Embed(
+                title=f"📊 일일 근무 시간 리포트 ({datetime.strptime(yesterday, '%Y-%m-%d'):%Y년 %m월 %d일})",
+                description="\n".join(lines),
+                color=discord.Color.blue()
+            )
+            embed.set_footer(text=f"자동 퇴근 처리되었습니다. (23:59:59 기준 {len(entries)}명)")
+            await send_report(guild_id, embed)
+
+class WeeklyReportJob(ScheduledJob):
+    """길드 시간대 월요일 0시: 지난주(월~일) 주간 리포트 (같은 회차의 자동 퇴근 기록까지 포함)"""
+    name = 'weekly_report'
+    weekday = 0
+    after = ('auto_checkout',)
+
+    async def prepare(self, runs, now):
+        # 리포트를 보낼 채널이 있는 길드만 조회
+        return [(guild_id, period) for guild_id, period in runs if guild_id in report_channels]
+
+    def handled(self, runs, targets):
+        # 채널을 찾지 못한 길드는 실행 기록을 남기지 않아, 채널이 생기면 다음 검사 때 보냄
+        return targets
+
+    def execute(self, tx, runs, targets):
+        # 지난주 일별 집계를 report.py와 같은 리포트 엔진으로 묶음 (보관된 기록도 일별 집계에는 남아 있음)
+        reports = []
+        for guild_id, period in targets:
+            last_monday = (datetime.strptime(period, '%Y-%m-%d') - timedelta(days=7)).date()
+            rows = tx.daily_report_rows(guild_id, last_monday, last_monday + timedelta(days=6))
+            if rows:
+                engine = aggregate_work_reports([('daily_work_summary', rows)])
+                reports.append((guild_id, last_monday, engine.reports('week')))
+        return reports
+
+    async def complete(self, runs, targets, reports):
+        for guild_id, last_monday, weekly_stats in reports:
+            last_sunday = last_monday + timedelta(days=6)
+            embed = discord.Embed(
+                title=f"📈 주간 근무 시간 리포트",
+                description=f"{last_monday.strftime('%Y년 %m월 %d일')} ~ {last_sunday.strftime('%m월 %d일')}",
+                color=discord.Color.purple()
+            )
+
+            for stat in weekly_stats:
+                value = (f"총 근무: {format_duration(stat['work_seconds'])}\n"
+                         f"출근 일수: {stat['days']}일\n"
+                         f"평균 근무: {format_duration(stat['avg_day_seconds'])}")
+                if stat['overtime_seconds']:
+                    value += (f"\n{OVERTIME_HOURS:g}시간 초과: {format_duration(stat['overtime_seconds'])} "
+                              f"({stat['overtime_days']}일)")
+                embed.add_field(name=f"👤 {stat['username']}", value=value, inline=False)
+
+            embed.set_footer(text="수고하셨습니다!")
+            await send_report(guild_id, embed)
+
+class JournalCompactionJob(ScheduledJob):
+    """매일 4시(서버 로컬): 출퇴근 이벤트 저널을 현재 상태 스냅샷에 합쳐 시작할 때 재생할 이벤트를 줄임"""
+    name = 'journal_compaction'
+    at = dt_time(4, 0)
+    per_guild = False
+
+    def execute(self, tx, runs, state):
+        # 기록을 보관하면 반영된 이벤트는 그 달의 보관 파일로 옮겨지므로, 보관하지 않을 때만 여기서 지움
+        return tx.compact_journal(trim=not ARCHIVING)
+
+    async def complete(self, runs, state, folded):
+        if folded:
+            logger.info('저널 스냅샷 갱신: 이벤트 %d건 반영', folded)
+
+class ArchiveJob(ScheduledJob):
+    """매일 4시(서버 로컬): ARCHIVE_AFTER_DAYS보다 오래된 달의 기록을 월별 보관 파일로 이동"""
+    name = 'archive_history'
+    at = dt_time(4, 0)
+    per_guild = False
+    standalone = True
+
+    async def run(self, runs, now):
+        cutoff = (now - timedelta(days=ARCHIVE_AFTER_DAYS)).date().replace(day=1)
+
+        # 이동은 DB 워커와 별도의 연결에서 한 달씩 짧은 트랜잭션으로 처리
+        moved = await asyncio.to_thread(archive_history, db.path, ARCHIVE_DIR, cutoff)
+        for month, work_rows, break_rows in moved:
+            logger.info('기록 보관: %s (근무 %d건, 휴식 %d건)', month, work_rows, break_rows)
+
+class MaintenanceJob(ScheduledJob):
+    """매일 4시(서버 로컬, 기록 보관 다음): 빈 페이지 정리, 쿼리 통계 갱신, 온라인 백업, WAL 체크포인트
+
+    빈 페이지 정리와 통계 갱신은 DB 워커에서 짧은 작업으로 나눠, 백업과 체크포인트는 별도 연결에서
+    실행하므로 명령어 처리를 오래 막지 않습니다. 단계별 시간은 db_<단계> 작업 지표로 남습니다.
+    """
+    name = 'db_maintenance'
+    at = dt_time(4, 0)
+    per_guild = False
+    standalone = True
+    after = ('archive_history',)
+
+    async def run(self, runs, now):
+        steps = {}
+        _, _, free_before = await db.run(lambda tx: database_pages(tx.conn))
+
+        # 1) 빈 페이지를 조금씩 잘라냄 (작업 사이사이에 명령어의 쓰기가 끼어듦)
+        with job_timer('db_vacuum') as timer:
+            free = free_before
+            while free:
+                remaining = await db.run(incremental_vacuum)
+                if remaining >= free:
+                    # auto_vacuum이 꺼진 파일이면 줄지 않음
+                    break
+                free = remaining
+        steps['vacuum'] = timer.elapsed
+        logger.info('DB 유지보수: 빈 페이지 정리 %.3f초 (빈 페이지 %d -> %d개)', timer.elapsed, free_before, free)
+
+        # 2) 쿼리 계획 통계 갱신
+        with job_timer('db_optimize') as timer:
+            method = await db.run(optimize_database)
+        steps['optimize'] = timer.elapsed
+        logger.info('DB 유지보수: 통계 갱신(%s) %.3f초', method, timer.elapsed)
+
+        # 3) 온라인 백업
+        backup_bytes = None
+        if BACKUP_KEEP > 0:
+            with job_timer('db_backup') as timer:
+                path, backup_bytes, pages, copy_steps = await asyncio.to_thread(
+                    backup_database, db.path, BACKUP_DIR, BACKUP_KEEP, now=now
+                )
+            steps['backup'] = timer.elapsed
+            logger.info('DB 유지보수: 백업 %.3f초 (%s, %.0fKB, %d페이지를 %d단계로 복사)',
+                        timer.elapsed, path, backup_bytes / 1024, pages, copy_steps)
+
+        # 4) WAL 체크포인트 (백업의 읽기 스냅샷이 끝난 뒤라야 WAL을 비울 수 있음)
+        with job_timer('db_checkpoint') as timer:
+            complete, wal_frames, checkpointed = await asyncio.to_thread(checkpoint_wal, db.path)
+        steps['checkpoint'] = timer.elapsed
+        logger.info('DB 유지보수: WAL 체크포인트 %.3f초 (프레임 %d개 중 %d개 반영%s)', timer.elapsed,
+                    wal_frames, checkpointed, '' if complete else ', 사용 중이라 WAL 파일은 다음에 비움')
+
+        page_size, page_count, free_pages = await db.run(lambda tx: database_pages(tx.conn))
+        db_bytes, wal_bytes = database_file_sizes(db.path)
+        maintenance_report.update(
+            finished_at=to_epoch(datetime.now()), page_size=page_size, page_count=page_count, free_pages=free_pages,
+            db_bytes=db_bytes, wal_bytes=wal_bytes, backup_bytes=backup_bytes, steps=steps,
+        )
+        logger.info('DB 유지보수 완료: 파일 %.0fKB, WAL %.0fKB, %d페이지 x %dB (빈 페이지 %d개)',
+                    db_bytes / 1024, wal_bytes / 1024, page_count, page_size, free_pages)
+
+# 기록 보관과 유지보수는 데이터베이스 파일을 직접 다루므로 SQLite 저장소에서만 실행
+ARCHIVING = bool(db.path) and ARCHIVE_AFTER_DAYS > 0
+JOBS = [AutoCheckoutJob(), WeeklyReportJob(), JournalCompactionJob()]
+if db.path:
+    JOBS += ([ArchiveJob()] if ARCHIVING else []) + [MaintenanceJob()]
+
+async def setup(bot):
+    scheduler.add_jobs(*JOBS)
+
+async def teardown(bot):
+    scheduler.remove_jobs(*(job.name for job in JOBS))
@@ -0,0 +1,275 @@
+"""지난 기록 조회와 통계 명령어 (/기록, /내보내기, /랭킹, /휴식통계)"""
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import discord
+from discord import app_commands
+
+from bot import (
+    ARCHIVE_DIR, break_reasons, channel_only, db, defer_response, export_history, format_duration,
+    format_hourly, from_epoch, guild_date, rankings, read_break_stats, read_history_page, send_followup,
+)
+
+class HistoryView(discord.ui.View):
+    """/기록 결과를 한 페이지씩 넘겨 보는 버튼 (누를 때마다 해당 페이지만 조회)"""
+
+    PAGE_SIZE = 10
+
+    def __init__(self, owner, kind, guild_id, start_date, end_date, archive_before=None):
+        super().__init__(timeout=300)
+        self.owner = owner
+        self.kind = kind
+        self.guild_id = guild_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.archive_before = archive_before
+        self.page = 0
+        self.rows = []
+        self.message = None
+
+    async def load(self, after=None, before=None):
+        """현재 페이지 기준 다음(after) 또는 이전(before) 페이지 조회"""
+        if self.archive_before and self.start_date.isoformat() < self.archive_before:
+            # 보관된 달에 걸치면 별도 스레드의 읽기 전용 연결에서 보관 파일까지 읽음
+            rows, has_more = await asyncio.to_thread(
+                read_history_page, db.path, ARCHIVE_DIR, self.archive_before, self.kind, self.guild_id,
+                self.owner.id, self.start_date, self.end_date, self.PAGE_SIZE, after, before
+            )
+        else:
+            rows, has_more = await db.run(lambda tx: tx.history_page(
+                self.kind, self.guild_id, self.owner.id, self.start_date, self.end_date, self.PAGE_SIZE, after, before
+            ))
+        if before is not None:
+            self.page -= 1
+            has_prev, has_next = has_more, True
+        else:
+            self.page += 1
+            has_prev, has_next = self.page > 1, has_more
+        self.rows = rows
+        self.previous_page.disabled = not has_prev
+        self.next_page.disabled = not has_next
+
+    def embed(self):
+        if self.kind == '근무':
+            lines = [
+                f"`{date}` {from_epoch(start_time):%H:%M}~{from_epoch(end_time):%H:%M} · 근무 {format_duration(work_seconds)}"
+                + (f" · 휴식 {format_duration(break_seconds)}" if break_seconds else "")
+                for _, date, start_time, end_time, work_seconds, break_seconds in self.rows
+            ]
+        else:
+            # 휴식 기록은 복귀할 때 끝난 행으로만 추가되므로 진행 중인 휴식은 없음
+            lines = [
+                f"`{from_epoch(start_time):%Y-%m-%d %H:%M}` {reason} · {format_duration(duration_seconds)}"
+                for _, start_time, _, reason, duration_seconds in self.rows
+            ]
+
+        embed = discord.Embed(
+            title=f"📜 {self.owner.display_name}님의 {self.kind} 기록",
+            description="\n".join(lines) or "해당 기간에 기록이 없습니다.",
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"{self.start_date} ~ {self.end_date} · {self.page}페이지")
+        return embed
+
+    async def interaction_check(self, interaction):
+        return interaction.user.id == self.owner.id
+
+    async def on_timeout(self):
+        if self.message:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
+
+    @discord.ui.button(label="◀ 이전", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        first = self.rows[0]
+        await self.load(before=(first[1], first[0]))
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="다음 ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        last = self.rows[-1]
+        await self.load(after=(last[1], last[0]))
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+@app_commands.command(name="기록", description="내 지난 근무/휴식 기록을 확인합니다")
+@channel_only()
+@app_commands.describe(
+    종류="볼 기록 종류",
+    시작일="조회 시작일 (YYYY-MM-DD, 기본: 30일 전)",
+    종료일="조회 종료일 (YYYY-MM-DD, 기본: 오늘)"
+)
+@app_commands.choices(종류=[
+    app_commands.Choice(name="근무", value="근무"),
+    app_commands.Choice(name="휴식", value="휴식"),
+])
+async def work_history(interaction: discord.Interaction, 종류: str = "근무", 시작일: str = None, 종료일: str = None):
+    """개인 기록 조회 명령어"""
+    await defer_response(interaction, ephemeral=True)
+
+    try:
+        end_date = datetime.strptime(종료일, '%Y-%m-%d').date() if 종료일 else guild_date(interaction.guild_id)
+        start_date = datetime.strptime(시작일, '%Y-%m-%d').date() if 시작일 else end_date - timedelta(days=30)
+    except ValueError:
+        await send_followup(interaction, "❌ 날짜는 `YYYY-MM-DD` 형식으로 입력해주세요.", ephemeral=True)
+        return
+
+    if start_date > end_date:
+        await send_followup(interaction, "❌ 시작일이 종료일보다 늦습니다.", ephemeral=True)
+        return
+
+    archive_before = await db.run(lambda tx: tx.get_meta('archive_before'))
+    view = HistoryView(interaction.user, 종류, interaction.guild_id, start_date, end_date, archive_before)
+    await view.load()
+    view.message = await send_followup(interaction, embed=view.embed(), view=view, ephemeral=True, wait=True)
+
+@app_commands.command(name="내보내기", description="이 서버의 근무/휴식 기록을 파일로 내보냅니다 (관리자)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+@app_commands.describe(
+    시작일="시작일 (YYYY-MM-DD, 기본: 지난달 1일)",
+    종료일="종료일 (YYYY-MM-DD, 기본: 지난달 말일)",
+    형식="파일 형식"
+)
+@app_commands.choices(형식=[
+    app_commands.Choice(name="CSV (gzip)", value="csv"),
+    app_commands.Choice(name="Parquet", value="parquet"),
+])
+async def export_records(interaction: discord.Interaction, 시작일: str = None, 종료일: str = None, 형식: str = "csv"):
+    """기록 내보내기 명령어"""
+    await defer_response(interaction, ephemeral=True)
+
+    this_month = guild_date(interaction.guild_id).replace(day=1)
+    try:
+        end_date = datetime.strptime(종료일, '%Y-%m-%d').date() if 종료일 else this_month - timedelta(days=1)
+        start_date = datetime.strptime(시작일, '%Y-%m-%d').date() if 시작일 else end_date.replace(day=1)
+    except ValueError:
+        await send_followup(interaction, "❌ 날짜는 `YYYY-MM-DD` 형식으로 입력해주세요.", ephemeral=True)
+        return
+
+    if start_date > end_date:
+        await send_followup(interaction, "❌ 시작일이 종료일보다 늦습니다.", ephemeral=True)
+        return
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        # 파일 쓰기와 압축은 별도 스레드의 읽기 전용 연결에서 처리
+        started = time.perf_counter()
+        try:
+            results = await asyncio.to_thread(
+                export_history, db.path, out_dir, start_date, end_date, interaction.guild_id, 형식
+            )
+        except RuntimeError as e:
+            await send_followup(interaction, f"❌ {e}", ephemeral=True)
+            return
+        elapsed = time.perf_counter() - started
+
+        limit = interaction.guild.filesize_limit if interaction.guild else 8 * 1024 * 1024
+        if sum(os.path.getsize(dest) for dest, _ in results) > limit:
+            await send_followup(interaction,
+                "❌ 파일이 Discord 첨부 용량을 넘습니다. 기간을 나누거나 서버에서 `python export.py`를 사용해주세요.",
+                ephemeral=True
+            )
+            return
+
+        summary = ", ".join(f"{os.path.basename(dest)} {count}행" for dest, count in results)
+        await send_followup(interaction,
+            f"📦 {start_date} ~ {end_date} 기록을 내보냈습니다. ({summary}, {elapsed:.2f}초)",
+            files=[discord.File(dest) for dest, _ in results],
+            ephemeral=True
+        )
+
+@app_commands.command(name="랭킹", description="이번 주/이번 달 근무 시간 순위를 확인합니다")
+@channel_only()
+@app_commands.describe(기간="순위 기간", 인원="표시할 인원 수 (기본 10명)")
+@app_commands.choices(기간=[
+    app_commands.Choice(name="주간", value="week"),
+    app_commands.Choice(name="월간", value="month"),
+])
+async def ranking(interaction: discord.Interaction, 기간: str = "week", 인원: app_commands.Range[int, 1, 25] = 10):
+    """근무 시간 랭킹 명령어 (메모리 순위표만 읽음)"""
+    board = rankings.current(interaction.guild_id, 기간, guild_date(interaction.guild_id))
+    label = "주간" if 기간 == "week" else "월간"
+
+    lines = [
+        f"{position}. **{name}** {format_duration(seconds)}"
+        for position, (name, seconds) in enumerate(board.top(인원), start=1)
+    ]
+    embed = discord.Embed(
+        title=f"🏆 {label} 근무 시간 랭킹 ({board.period})",
+        description="\n".join(lines) or "아직 퇴근 기록이 없습니다.",
+        color=discord.Color.gold()
+    )
+
+    mine = board.rank(interaction.user.id)
+    if mine:
+        position, seconds = mine
+        embed.set_footer(text=f"내 순위: {position}위 / {len(board)}명 · {format_duration(seconds)}")
+    else:
+        embed.set_footer(text=f"{label} 기록이 아직 없습니다. (퇴근한 근무만 집계됩니다)")
+
+    await interaction.response.send_message(embed=embed)
+
+@app_commands.command(name="휴식통계", description="이 서버의 사용자별/사유별 휴식 통계를 확인합니다")
+@channel_only()
+@app_commands.describe(
+    기준="묶어서 볼 기준",
+    시작일="조회 시작일 (YYYY-MM-DD, 기본: 30일 전)",
+    종료일="조회 종료일 (YYYY-MM-DD, 기본: 오늘)"
+)
+@app_commands.choices(기준=[
+    app_commands.Choice(name="사용자", value="user"),
+    app_commands.Choice(name="사유", value="reason"),
+])
+async def break_stats(interaction: discord.Interaction, 기준: str = "user", 시작일: str = None, 종료일: str = None):
+    """휴식 통계 명령어"""
+    await defer_response(interaction, ephemeral=True)
+
+    try:
+        end_date = datetime.strptime(종료일, '%Y-%m-%d').date() if 종료일 else guild_date(interaction.guild_id)
+        start_date = datetime.strptime(시작일, '%Y-%m-%d').date() if 시작일 else end_date - timedelta(days=30)
+    except ValueError:
+        await send_followup(interaction, "❌ 날짜는 `YYYY-MM-DD` 형식으로 입력해주세요.", ephemeral=True)
+        return
+
+    if start_date > end_date:
+        await send_followup(interaction, "❌ 시작일이 종료일보다 늦습니다.", ephemeral=True)
+        return
+
+    # 집계는 별도 스레드의 읽기 전용 연결에서 처리
+    started = time.perf_counter()
+    try:
+        stats, hourly = await asyncio.to_thread(
+            read_break_stats, db.path, start_date, end_date, interaction.guild_id, 기준, break_reasons
+        )
+    except RuntimeError as e:
+        await send_followup(interaction, f"❌ {e}", ephemeral=True)
+        return
+    elapsed = time.perf_counter() - started
+
+    lines = [
+        f"**{row['name']}** {row['count']}회 · 총 {format_duration(row['total_seconds'])}"
+        f" · 중앙값 {format_duration(row['median_seconds'])}"
+        f" · 주로 {max(range(24), key=row['hourly'].__getitem__)}시"
+        for row in stats[:15]
+    ]
+    if len(stats) > 15:
+        lines.append(f"… 외 {len(stats) - 15}개")
+
+    embed = discord.Embed(
+        title=f"☕ {'사용자별' if 기준 == 'user' else '사유별'} 휴식 통계",
+        description="\n".join(lines) or "해당 기간에 끝난 휴식 기록이 없습니다.",
+        color=discord.Color.orange()
+    )
+    if stats:
+        embed.add_field(name="시간대별 휴식 횟수 (0시 → 23시)", value=f"`{format_hourly(hourly)}`", inline=False)
+    embed.set_footer(text=f"{start_date} ~ {end_date} · 휴식 {sum(hourly)}회 · {elapsed:.2f}초")
+
+    await send_followup(interaction, embed=embed, ephemeral=True)
+
+async def setup(bot):
+    for command in (work_history, export_records, ranking, break_stats):
+        bot.tree.add_command(command)
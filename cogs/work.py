@@ -0,0 +1,322 @@
+"""출퇴근/휴식 명령어와 현황 조회 (/출근, /퇴근, /휴식, /복귀, /현황, /현황판, /상태)"""
+from datetime import datetime
+
+import discord
+from discord import app_commands
+
+from bot import (
+    build_status_embeds, channel_only, defer_response, guild_date, rankings, send_followup,
+    sessions, status_boards,
+)
+
+@app_commands.command(name="출근", description="출근을 기록합니다")
+@channel_only()
+async def work_start(interaction: discord.Interaction):
+    """출근 명령어"""
+    # 먼저 응답 대기 상태로 전환 (3초 제한 회피)
+    await defer_response(interaction)
+
+    user_id = interaction.user.id
+    username = interaction.user.display_name
+    current_time = datetime.now()
+
+    # 이미 출근한 경우 확인
+    if await sessions.settled(interaction.guild_id, user_id):
+        await send_followup(interaction,
+            f"❌ {interaction.user.mention}님은 이미 출근 상태입니다!",
+            ephemeral=True
+        )
+        return
+
+    # 출근 기록
+    await sessions.start(interaction.guild_id, user_id, username, current_time)
+
+    time_str = current_time.strftime('%Y년 %m월 %d일 %H:%M:%S')
+
+    embed = discord.Embed(
+        title="🟢 출근",
+        description=f"{interaction.user.mention}님이 출근했습니다.",
+        color=discord.Color.green()
+    )
+    embed.add_field(name="출근 시간", value=time_str, inline=False)
+    embed.set_footer(text="출근 기록됨")
+
+    await send_followup(interaction, embed=embed)
+
+@app_commands.command(name="퇴근", description="퇴근을 기록하고 근무 시간을 계산합니다")
+@channel_only()
+async def work_end(interaction: discord.Interaction):
+    """퇴근 명령어"""
+    # 먼저 응답 대기 상태로 전환 (3초 제한 회피)
+    await defer_response(interaction)
+
+    username = interaction.user.display_name
+    current_time = datetime.now()
+
+    # 출근 기록 조회
+    session = await sessions.settled(interaction.guild_id, interaction.user.id)
+
+    if not session:
+        await send_followup(interaction,
+            f"❌ {interaction.user.mention}님은 출근 기록이 없습니다!",
+            ephemeral=True
+        )
+        return
+
+    # 히스토리에 저장하고 현재 상태에서 삭제
+    work_day = guild_date(interaction.guild_id, current_time)
+    work_seconds, total_break = await sessions.finish(session, username, current_time, work_day)
+    rankings.record(interaction.guild_id, interaction.user.id, username, work_day.isoformat(), work_seconds)
+
+    # 시간 계산
+    hours = work_seconds // 3600
+    minutes = (work_seconds % 3600) // 60
+    break_hours = total_break // 3600
+    break_minutes = (total_break % 3600) // 60
+
+    time_str = current_time.strftime('%Y년 %m월 %d일 %H:%M:%S')
+
+    embed = discord.Embed(
+        title="🔴 퇴근",
+        description=f"{interaction.user.mention}님이 퇴근했습니다.",
+        color=discord.Color.red()
+    )
+    embed.add_field(name="퇴근 시간", value=time_str, inline=False)
+    embed.add_field(name="순수 근무 시간", value=f"{hours}시간 {minutes}분", inline=True)
+    if total_break > 0:
+        embed.add_field(name="휴식 시간", value=f"{break_hours}시간 {break_minutes}분", inline=True)
+    embed.set_footer(text="퇴근 기록됨")
+
+    await send_followup(interaction, embed=embed)
+
+@app_commands.command(name="휴식", description="휴식을 시작합니다")
+@channel_only()
+@app_commands.describe(사유="휴식 사유를 입력하세요")
+async def work_break(interaction: discord.Interaction, 사유: str):
+    """휴식 명령어"""
+    # 먼저 응답 대기 상태로 전환 (3초 제한 회피)
+    await defer_response(interaction)
+
+    username = interaction.user.display_name
+    current_time = datetime.now()
+
+    # 출근 상태 확인
+    session = await sessions.settled(interaction.guild_id, interaction.user.id)
+
+    if not session:
+        await send_followup(interaction,
+            f"❌ {interaction.user.mention}님은 출근 상태가 아닙니다!",
+            ephemeral=True
+        )
+        return
+
+    # 이미 휴식 중인 경우
+    if session.break_time:
+        await send_followup(interaction,
+            f"❌ {interaction.user.mention}님은 이미 휴식 중입니다!",
+            ephemeral=True
+        )
+        return
+
+    # 휴식 시작
+    await sessions.begin_break(session, username, 사유, current_time)
+
+    time_str = current_time.strftime('%Y년 %m월 %d일 %H:%M:%S')
+
+    embed = discord.Embed(
+        title="🟡 휴식 시작",
+        description=f"{interaction.user.mention}님이 **{사유}** 사유로 휴식합니다.",
+        color=discord.Color.gold()
+    )
+    embed.add_field(name="시간", value=time_str, inline=False)
+    embed.set_footer(text="휴식 기록됨")
+
+    await send_followup(interaction, embed=embed)
+
+@app_commands.command(name="복귀", description="휴식을 종료하고 업무에 복귀합니다")
+@channel_only()
+async def work_return(interaction: discord.Interaction):
+    """복귀 명령어"""
+    # 먼저 응답 대기 상태로 전환 (3초 제한 회피)
+    await defer_response(interaction)
+
+    current_time = datetime.now()
+
+    # 출근 상태 및 휴식 정보 조회
+    session = await sessions.settled(interaction.guild_id, interaction.user.id)
+
+    if not session:
+        await send_followup(interaction,
+            f"❌ {interaction.user.mention}님은 출근 상태가 아닙니다!",
+            ephemeral=True
+        )
+        return
+
+    # 휴식 중이 아닌 경우
+    if not session.break_time:
+        await send_followup(interaction,
+            f"❌ {interaction.user.mention}님은 휴식 중이 아닙니다!",
+            ephemeral=True
+        )
+        return
+
+    # 휴식 종료 기록
+    break_duration = await sessions.end_break(session, current_time)
+
+    # 휴식 시간 표시
+    break_minutes = break_duration // 60
+    break_seconds = break_duration % 60
+
+    time_str = current_time.strftime('%Y년 %m월 %d일 %H:%M:%S')
+
+    embed = discord.Embed(
+        title="🟢 업무 복귀",
+        description=f"{interaction.user.mention}님이 업무에 복귀했습니다.",
+        color=discord.Color.green()
+    )
+    embed.add_field(name="복귀 시간", value=time_str, inline=False)
+    embed.add_field(name="휴식 시간", value=f"{break_minutes}분 {break_seconds}초", inline=False)
+    embed.set_footer(text="복귀 기록됨")
+
+    await send_followup(interaction, embed=embed)
+
+@app_commands.command(name="현황", description="현재 출근한 인원을 확인합니다")
+@channel_only()
+async def work_status_all(interaction: discord.Interaction):
+    """전체 현황 명령어"""
+    # 실시간 현황판이 있으면 같은 내용을 다시 만들지 않고 현황판으로 안내
+    if interaction.guild_id in status_boards.boards:
+        await interaction.response.send_message(
+            f"📌 실시간 현황판에서 확인해주세요: {status_boards.jump_url(interaction.guild_id)}",
+            ephemeral=True
+        )
+        return
+
+    # 먼저 응답 대기 상태로 전환 (3초 제한 회피)
+    await defer_response(interaction)
+
+    guild_sessions = sessions.in_guild(interaction.guild_id)
+
+    if not guild_sessions:
+        await send_followup(interaction, "📊 현재 출근한 인원이 없습니다.", ephemeral=True)
+        return
+
+    current_time = datetime.now()
+
+    # 출근 인원과 휴식 인원 분류
+    working = []
+    on_break = []
+
+    for session in guild_sessions:
+        elapsed = current_time - session.start_time
+        elapsed_seconds = int(elapsed.total_seconds()) - session.total_break_seconds
+        hours = elapsed_seconds // 3600
+        minutes = (elapsed_seconds % 3600) // 60
+
+        start_time_str = session.start_time.strftime('%H:%M')
+
+        if session.break_time:
+            break_elapsed = int((current_time - session.break_time).total_seconds())
+            break_minutes = break_elapsed // 60
+            on_break.append(f"**{session.username}** - 출근: {start_time_str} (휴식 {break_minutes}분째)")
+        else:
+            working.append(f"**{session.username}** - 출근: {start_time_str} (근무 {hours}시간 {minutes}분)")
+
+    # 인원이 많으면 필드/임베드로 나눔 (필드 하나는 1024자까지)
+    embeds = build_status_embeds("📊 출근 현황", [
+        (f"🟢 근무 중 ({len(working)}명)", discord.Color.green(), working),
+        (f"🟡 휴식 중 ({len(on_break)}명)", discord.Color.gold(), on_break),
+    ], f"총 {len(working) + len(on_break)}명 출근")
+
+    await send_followup(interaction, embeds=embeds)
+
+@app_commands.command(name="현황판", description="출석 채널에 자동으로 갱신되는 출근 현황판을 고정합니다 (관리자)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+@channel_only()
+@app_commands.describe(동작="현황판 켜기/끄기")
+@app_commands.choices(동작=[
+    app_commands.Choice(name="켜기", value="on"),
+    app_commands.Choice(name="끄기", value="off"),
+])
+async def status_board(interaction: discord.Interaction, 동작: str = "on"):
+    """실시간 현황판 설정 명령어"""
+    await defer_response(interaction, ephemeral=True)
+
+    if 동작 == "off":
+        if await status_boards.disable(interaction.guild_id):
+            await send_followup(interaction, "✅ 실시간 현황판을 껐습니다.", ephemeral=True)
+        else:
+            await send_followup(interaction, "❌ 켜져 있는 현황판이 없습니다.", ephemeral=True)
+        return
+
+    try:
+        pinned = await status_boards.enable(interaction.guild_id, interaction.channel)
+    except discord.HTTPException as e:
+        await send_followup(interaction, f"❌ 현황판 메시지를 보내지 못했습니다: {e}", ephemeral=True)
+        return
+
+    note = "" if pinned else "\n⚠️ 메시지 고정 권한이 없어 고정하지 못했습니다. (메시지 관리 권한 필요)"
+    await send_followup(interaction, f"✅ 실시간 현황판을 만들었습니다: {status_boards.jump_url(interaction.guild_id)}{note}",
+                        ephemeral=True)
+
+@app_commands.command(name="상태", description="내 현재 출근 상태를 확인합니다")
+@channel_only()
+async def work_status(interaction: discord.Interaction):
+    """개인 상태 확인 명령어"""
+    # 먼저 응답 대기 상태로 전환 (3초 제한 회피)
+    await defer_response(interaction, ephemeral=True)
+
+    # 출근 상태 조회
+    session = sessions.get(interaction.guild_id, interaction.user.id)
+
+    if not session:
+        await send_followup(interaction,
+            f"📊 {interaction.user.mention}님은 현재 **퇴근** 상태입니다.",
+            ephemeral=True
+        )
+        return
+
+    start_time = session.start_time
+    current_time = datetime.now()
+    total_break = session.total_break_seconds
+
+    # 순수 근무 시간 계산
+    total_duration = current_time - start_time
+    work_seconds = int(total_duration.total_seconds()) - total_break
+
+    # 휴식 중이면 현재 휴식 시간도 빼기
+    if session.break_time:
+        current_break = int((current_time - session.break_time).total_seconds())
+        work_seconds -= current_break
+
+    hours = work_seconds // 3600
+    minutes = (work_seconds % 3600) // 60
+
+    start_time_str = start_time.strftime('%H:%M:%S')
+
+    embed = discord.Embed(
+        title="📊 내 상태",
+        color=discord.Color.blue()
+    )
+
+    if session.break_time:
+        embed.description = f"{interaction.user.mention}님은 현재 **휴식 중**입니다."
+        break_elapsed = int((current_time - session.break_time).total_seconds())
+        break_minutes = break_elapsed // 60
+        embed.add_field(name="현재 휴식 시간", value=f"{break_minutes}분", inline=False)
+    else:
+        embed.description = f"{interaction.user.mention}님은 현재 **근무 중**입니다."
+
+    embed.add_field(name="출근 시간", value=start_time_str, inline=True)
+    embed.add_field(name="순수 근무 시간", value=f"{hours}시간 {minutes}분", inline=True)
+
+    if total_break > 0:
+        total_break_minutes = total_break // 60
+        embed.add_field(name="누적 휴식 시간", value=f"{total_break_minutes}분", inline=True)
+
+    await send_followup(interaction, embed=embed, ephemeral=True)
+
+async def setup(bot):
+    for command in (work_start, work_end, work_break, work_return, work_status_all, status_board, work_status):
+        bot.tree.add_command(command)
@@ -0,0 +1,54 @@
+"""근무/휴식 기록 내보내기 (오프라인)
+
+봇과 같은 내보내기 함수를 사용해 데이터베이스 파일에서 직접 기록을 내보냅니다.
+읽기 전용 스냅샷에서 읽으므로 봇이 실행 중이어도 사용할 수 있습니다.
+
+사용 예:
+    python export.py --start 2025-10-01 --end 2025-10-31
+    python export.py --start 2025-10-01 --end 2025-10-31 --guild 123456789 --format parquet --output-dir exports
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+import attendance
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def parse_args(argv=None):
+    last_month_end = datetime.now().date().replace(day=1) - timedelta(days=1)
+    parser = argparse.ArgumentParser(description="근무/휴식 기록 내보내기")
+    parser.add_argument('--db', default=attendance.DB_FILE, help="데이터베이스 파일 경로")
+    parser.add_argument('--start', type=parse_date, default=last_month_end.replace(day=1), help="시작일 (YYYY-MM-DD, 기본: 지난달 1일)")
+    parser.add_argument('--end', type=parse_date, default=last_month_end, help="종료일 (YYYY-MM-DD, 기본: 지난달 말일)")
+    parser.add_argument('--guild', type=int, help="길드 ID (생략하면 전체)")
+    parser.add_argument('--format', choices=('csv', 'parquet'), default='csv', help="csv(gzip 압축) 또는 parquet")
+    parser.add_argument('--output-dir', default='.', help="파일을 저장할 디렉터리")
+    args = parser.parse_args(argv)
+    if args.start > args.end:
+        parser.error("시작일이 종료일보다 늦습니다.")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    started = time.perf_counter()
+    try:
+        results = attendance.export_history(args.db, args.output_dir, args.start, args.end, args.guild, args.format)
+    except (RuntimeError, sqlite3.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    for dest, count in results:
+        print(f"{dest}: {count}행, {os.path.getsize(dest) / 1024:.0f}KB")
+    print(f"완료: {time.perf_counter() - started:.2f}초")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
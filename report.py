@@ -0,0 +1,90 @@
+"""근무 리포트 (오프라인)
+
+봇의 주간 리포트와 같은 리포트 엔진으로 데이터베이스 파일에서 직접 일별/주별/월별 사용자 리포트를
+만듭니다. 두 히스토리 테이블을 한 번씩만 읽어 날짜별로 누적한 뒤 선택한 기간 종류로 묶으며, 읽기
+전용 연결을 쓰므로 봇이 실행 중이어도 사용할 수 있습니다. Discord 연결은 필요 없습니다.
+
+사용 예:
+    python report.py --start 2025-10-01 --end 2025-10-31 --period month
+    python report.py --period week month --overtime-hours 9 --guild 123456789
+    python report.py --start 2025-01-01 --end 2025-12-31 --workers 4 --format json > report.json
+"""
+import argparse
+import gc
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+import attendance
+
+PERIOD_TITLES = {'day': '일별', 'week': '주별', 'month': '월별'}
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def parse_args(argv=None):
+    today = datetime.now().date()
+    parser = argparse.ArgumentParser(description="근무 리포트")
+    parser.add_argument('--db', default=attendance.DB_FILE, help="데이터베이스 파일 경로")
+    parser.add_argument('--start', type=parse_date, default=today - timedelta(days=30), help="시작일 (YYYY-MM-DD, 기본: 30일 전)")
+    parser.add_argument('--end', type=parse_date, default=today, help="종료일 (YYYY-MM-DD, 기본: 오늘)")
+    parser.add_argument('--guild', type=int, help="길드 ID (생략하면 전체)")
+    parser.add_argument('--period', nargs='+', choices=attendance.REPORT_PERIODS, default=list(attendance.REPORT_PERIODS),
+                        help="기간 종류 (여러 개 지정 가능, 기본: 모두)")
+    parser.add_argument('--overtime-hours', type=float, default=attendance.OVERTIME_HOURS,
+                        help=f"하루 근무가 이 시간을 넘은 만큼을 초과 근무로 집계 (기본: {attendance.OVERTIME_HOURS:g})")
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f"사용자별로 나눠 집계할 프로세스 수 (기간이 길 때, 이 서버: {os.cpu_count()}코어)")
+    parser.add_argument('--format', choices=('text', 'json'), default='text', help="출력 형식")
+    args = parser.parse_args(argv)
+    if args.start > args.end:
+        parser.error("시작일이 종료일보다 늦습니다.")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    periods = tuple(period for period in attendance.REPORT_PERIODS if period in args.period)
+    started = time.perf_counter()
+    # 집계 중에는 순환 참조가 생기지 않으므로, 수백만 개의 날짜별 값을 GC가 반복해서 훑지 않게 집계하는 동안만 끔
+    gc.disable()
+    try:
+        engine = attendance.build_work_reports(args.db, args.start, args.end, args.guild, args.workers)
+        overtime_seconds = int(args.overtime_hours * 3600)
+        reports = {period: engine.reports(period, overtime_seconds) for period in periods}
+    except (RuntimeError, sqlite3.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        gc.enable()
+    elapsed = time.perf_counter() - started
+
+    if args.format == 'json':
+        json.dump({'start': args.start.isoformat(), 'end': args.end.isoformat(), 'guild': args.guild,
+                   'overtime_hours': args.overtime_hours, 'reports': reports},
+                  sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+
+    fmt = attendance.format_duration
+    for period in periods:
+        print(f"{PERIOD_TITLES[period]} 근무 리포트 ({args.start} ~ {args.end}, 초과 근무 기준 {args.overtime_hours:g}시간)")
+        print(f"{'기간':<12}{'이름':<16}{'근무':>12}{'일수':>6}{'일 평균':>12}{'초과':>12}{'자정 넘김':>8}{'휴식':>6}  요일별 평균(시간)")
+        current = None
+        for row in reports[period]:
+            if args.guild is None and (row['period'], row['guild_id']) != current:
+                current = (row['period'], row['guild_id'])
+                print(f"[길드 {row['guild_id']}]")
+            print(f"{row['period']:<12}{row['username']:<16}{fmt(row['work_seconds']):>12}{row['days']:>6}"
+                  f"{fmt(row['avg_day_seconds']):>12}{fmt(row['overtime_seconds']):>12}{row['overnight_sessions']:>8}"
+                  f"{row['breaks']:>6}  {attendance.format_weekdays(row['weekday_avg_seconds'])}")
+        print()
+    print(f"완료: {elapsed:.2f}초", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
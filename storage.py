@@ -0,0 +1,1691 @@
+"""근무 기록 저장소
+
+Storage/StorageTransaction 인터페이스와 SQLite(Database), 메모리(MemoryStorage), PostgreSQL(PostgresStorage)
+구현, SQLite 스키마 마이그레이션(v1~v9), 출퇴근 이벤트 저널 재생(fold_journal)을 담습니다.
+봇이 쓰는 저장소 인스턴스(db)는 bot.py의 create_bot()이 create_storage()로 만듭니다.
+"""
+import abc
+import asyncio
+import contextvars
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from attendance import (
+    DB_FILE, fetch_history_page, from_epoch, get_meta, HISTORY_KINDS, iso_week_key, metrics, set_meta, to_epoch,
+)
+
+# 저장소 설정
+load_dotenv()
+# 저장소: sqlite(기본, DB_FILE), memory(테스트/벤치마크용, 종료하면 사라짐), postgres(DATABASE_URL의 서버)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'sqlite').lower()
+DATABASE_URL = os.getenv('DATABASE_URL', '')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+# 그룹 커밋 대기 시간(ms), 0이면 작업마다 바로 커밋 (예: 5~20)
+DB_GROUP_COMMIT_MS = float(os.getenv('DB_GROUP_COMMIT_MS', '0'))
+
+# 현재 태스크에서 처리 중인 명령어의 측정값 (봇의 interaction_check에서 설정, 저장소 작업 시간을 더함)
+current_timing = contextvars.ContextVar('current_timing', default=None)
+
+# 비동기 저장소 계층
+class Storage(abc.ABC):
+    """근무 기록 저장소의 공통 부분
+
+    모든 저장소는 run(func, *args)로 func(tx, *args)를 하나의 트랜잭션으로 실행합니다.
+    tx는 저장소별 StorageTransaction 구현으로, 출퇴근/휴식/히스토리/집계/리포트 작업을 메서드로 제공합니다.
+    path는 SQLite 저장소에서만 값이 있으며, 데이터베이스 파일을 직접 여는 기능
+    (기록 보관, 내보내기, 휴식 통계)은 이 값이 있을 때만 사용할 수 있습니다.
+    """
+
+    path = None
+
+    # 배치 크기 분포를 기록할 구간 (이하)
+    BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+    def __init__(self):
+        self.stats = {
+            'batches': 0,
+            'jobs': 0,
+            'failed_jobs': 0,
+            'max_batch_size': 0,
+            'commit_seconds_total': 0.0,
+            'commit_seconds_max': 0.0,
+            'batch_sizes': dict.fromkeys(self.BATCH_SIZE_BUCKETS, 0),
+        }
+
+    def _record_batch(self, size, commit_seconds, failed):
+        stats = self.stats
+        stats['batches'] += 1
+        stats['jobs'] += size
+        stats['failed_jobs'] += failed
+        stats['max_batch_size'] = max(stats['max_batch_size'], size)
+        stats['commit_seconds_total'] += commit_seconds
+        stats['commit_seconds_max'] = max(stats['commit_seconds_max'], commit_seconds)
+        bucket = next((b for b in self.BATCH_SIZE_BUCKETS if size <= b), self.BATCH_SIZE_BUCKETS[-1])
+        stats['batch_sizes'][bucket] += 1
+
+    def _observe(self, func, started):
+        """func 실행 시간을 작업별 히스토그램과 현재 명령어의 DB 시간에 기록"""
+        elapsed = time.perf_counter() - started
+        metrics.db_call.observe(elapsed, func.__qualname__.replace('.<locals>', ''))
+        timing = current_timing.get()
+        if timing:
+            timing.db_seconds += elapsed
+
+    def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def migrate(self):
+        """스키마를 최신 구조로 맞추고 새로 적용된 (버전, 설명) 목록 반환"""
+        return []
+
+    @abc.abstractmethod
+    async def run(self, func, *args):
+        """func(tx, *args)를 하나의 트랜잭션으로 실행하고 결과 반환 (예외가 나면 롤백)"""
+
+class Database(Storage):
+    """전용 워커 스레드가 하나의 SQLite 연결을 소유하는 저장소
+
+    모든 쿼리는 워커 스레드에서 실행되므로 이벤트 루프가 디스크 I/O로 블로킹되지 않습니다.
+    연결은 프로세스 수명 동안 유지되며 WAL 모드와 준비된 문장 캐시를 사용합니다.
+
+    group_commit_ms가 0보다 크면 그룹 커밋 모드로 동작합니다. 첫 작업이 도착한 뒤
+    해당 시간 동안 들어온 작업을 각각 SAVEPOINT로 감싸 실행하고 한 번에 커밋하므로,
+    동시에 들어온 쓰기들이 fsync 한 번을 공유합니다. 각 작업의 결과는 커밋 이후에 전달됩니다.
+    """
+
+    def __init__(self, path, cached_statements=256, group_commit_ms=0, max_batch_size=256):
+        super().__init__()
+        self.path = path
+        self.cached_statements = cached_statements
+        self.group_commit_window = group_commit_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._jobs = queue.SimpleQueue()
+        self._thread = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def _worker(self):
+        """작업 큐를 순서대로 처리하는 워커 스레드 본체"""
+        conn = None
+        stopping = False
+        while not stopping:
+            job = self._jobs.get()
+            if job is None:
+                break
+
+            # 그룹 커밋 창 안에 도착한 작업을 모음
+            batch = [job]
+            if self.group_commit_window > 0:
+                deadline = time.monotonic() + self.group_commit_window
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        job = self._jobs.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        stopping = True
+                        break
+                    batch.append(job)
+
+            try:
+                if conn is None:
+                    conn = self._connect()
+            except BaseException as e:
+                results = [(None, e)] * len(batch)
+            else:
+                results = self._run_batch(conn, batch)
+
+            for (_, _, future, loop), (result, error) in zip(batch, results):
+                loop.call_soon_threadsafe(_resolve_future, future, result, error)
+
+        if conn is not None:
+            conn.close()
+
+    def _run_batch(self, conn, batch):
+        """작업 묶음을 하나의 트랜잭션으로 실행하고 작업별 (결과, 오류) 목록 반환"""
+        tx = SQLiteTransaction(conn)
+        results = []
+        try:
+            if len(batch) == 1:
+                func, args, _, _ = batch[0]
+                try:
+                    results.append((func(tx, *args), None))
+                except BaseException as e:
+                    conn.rollback()
+                    results.append((None, e))
+            else:
+                # 작업 하나가 실패해도 나머지는 커밋되도록 SAVEPOINT로 격리
+                if not conn.in_transaction:
+                    conn.execute('BEGIN')
+                for func, args, _, _ in batch:
+                    conn.execute('SAVEPOINT job')
+                    try:
+                        result = func(tx, *args)
+                    except BaseException as e:
+                        conn.execute('ROLLBACK TO SAVEPOINT job')
+                        conn.execute('RELEASE SAVEPOINT job')
+                        results.append((None, e))
+                    else:
+                        conn.execute('RELEASE SAVEPOINT job')
+                        results.append((result, None))
+
+            commit_started = time.perf_counter()
+            conn.commit()
+            commit_seconds = time.perf_counter() - commit_started
+        except BaseException as e:
+            conn.rollback()
+            results = [(None, e)] * len(batch)
+            commit_seconds = 0.0
+
+        self._record_batch(len(batch), commit_seconds, sum(1 for _, error in results if error is not None))
+        return results
+
+    def start(self):
+        """워커 스레드 시작 (이미 실행 중이면 무시)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._worker, name='db-worker', daemon=True)
+            self._thread.start()
+
+    async def close(self):
+        """대기 중인 작업을 모두 처리한 뒤 연결 종료"""
+        if self._thread is None:
+            return
+        self._jobs.put(None)
+        await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+        self._thread = None
+
+    async def run(self, func, *args):
+        """func(tx, *args)를 하나의 트랜잭션으로 워커 스레드에서 실행하고 결과 반환 (tx.conn은 SQLite 연결)"""
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        started = time.perf_counter()
+        self._jobs.put((func, args, future, loop))
+        try:
+            return await future
+        finally:
+            self._observe(func, started)
+
+    async def migrate(self):
+        applied = await self.run(lambda tx: run_migrations(tx.conn))
+        if applied:
+            # 테이블을 다시 만든 뒤 남은 빈 페이지를 파일에서 정리
+            await self.run(lambda tx: vacuum_database(tx.conn))
+        return applied
+
+def _resolve_future(future, result, error):
+    """워커 스레드의 결과를 이벤트 루프 쪽 Future에 전달"""
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+# 스키마 마이그레이션 (schema_version 테이블에 기록된 버전 이후 것만 순서대로 한 번씩 실행)
+def migration_base_tables(conn):
+    """v1: 기본 테이블 (v2.0.0 구조)"""
+    cursor = conn.cursor()
+
+    # 현재 출근 상태 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS current_work_status (
+            user_id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            break_time TEXT,
+            total_break_seconds INTEGER DEFAULT 0
+        )
+    ''')
+
+    # 출퇴근 히스토리 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS work_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            username TEXT NOT NULL,
+            date TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            work_seconds INTEGER NOT NULL,
+            break_seconds INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 휴식 기록 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS break_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            username TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT,
+            duration_seconds INTEGER,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 인덱스 생성
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_work_history_user_date ON work_history(user_id, date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_work_history_date ON work_history(date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_break_history_user ON break_history(user_id, start_time)')
+
+def migration_guild_partition(conn):
+    """v2: 모든 테이블에 guild_id 추가, 인덱스는 guild_id로 시작
+
+    기존 행은 guild_id = 0으로 표시되며, adopt_legacy_rows()로 실제 길드에 배정됩니다.
+    """
+    columns = [row['name'] for row in conn.execute('PRAGMA table_info(work_history)')]
+    if 'guild_id' not in columns:
+        conn.execute('ALTER TABLE work_history ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0')
+        conn.execute('ALTER TABLE break_history ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0')
+
+        # 기본 키가 바뀌므로 현재 상태 테이블은 다시 생성
+        conn.execute('ALTER TABLE current_work_status RENAME TO current_work_status_old')
+        conn.execute('''
+            CREATE TABLE current_work_status (
+                guild_id INTEGER NOT NULL,
+                user_id TEXT NOT NULL,
+                username TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                break_time TEXT,
+                total_break_seconds INTEGER DEFAULT 0,
+                PRIMARY KEY (guild_id, user_id)
+            )
+        ''')
+        conn.execute('''
+            INSERT INTO current_work_status (guild_id, user_id, username, start_time, break_time, total_break_seconds)
+            SELECT 0, user_id, username, start_time, break_time, total_break_seconds FROM current_work_status_old
+        ''')
+        conn.execute('DROP TABLE current_work_status_old')
+
+        # 길드 구분 없는 인덱스와 집계 테이블은 제거 (집계는 v3에서 히스토리로 다시 채움)
+        conn.execute('DROP INDEX IF EXISTS idx_work_history_user_date')
+        conn.execute('DROP INDEX IF EXISTS idx_work_history_date')
+        conn.execute('DROP INDEX IF EXISTS idx_break_history_user')
+        conn.execute('DROP TABLE IF EXISTS daily_work_summary')
+        conn.execute('DROP TABLE IF EXISTS weekly_work_summary')
+
+    # 인덱스 생성 (모두 guild_id로 시작)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_work_history_user_date ON work_history(guild_id, user_id, date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_work_history_date ON work_history(guild_id, date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_break_history_user ON break_history(guild_id, user_id, start_time)')
+
+def migration_rollup_tables(conn):
+    """v3: 일별/주별 집계 테이블 생성 후 기존 히스토리로 채움"""
+    cursor = conn.cursor()
+
+    # 일별 집계 테이블 (work_history와 같은 트랜잭션에서 갱신)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_work_summary (
+            guild_id INTEGER NOT NULL,
+            user_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            username TEXT NOT NULL,
+            work_seconds INTEGER NOT NULL DEFAULT 0,
+            break_seconds INTEGER NOT NULL DEFAULT 0,
+            session_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id, date)
+        )
+    ''')
+
+    # ISO 주차별 집계 테이블 (week 예: 2025-W43)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS weekly_work_summary (
+            guild_id INTEGER NOT NULL,
+            user_id TEXT NOT NULL,
+            week TEXT NOT NULL,
+            username TEXT NOT NULL,
+            work_seconds INTEGER NOT NULL DEFAULT 0,
+            break_seconds INTEGER NOT NULL DEFAULT 0,
+            session_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id, week)
+        )
+    ''')
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_daily_summary_date ON daily_work_summary(guild_id, date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_weekly_summary_week ON weekly_work_summary(guild_id, week)')
+
+    # 이 버전의 테이블 구조로 채움 (rebuild_rollups()는 최신 구조 기준이므로 사용하지 않음)
+    # 이름은 가장 최근 기록(MAX(id))의 값을 사용
+    conn.create_function('iso_week', 1, iso_week_key, deterministic=True)
+    cursor.execute('''
+        INSERT INTO daily_work_summary (guild_id, user_id, date, username, work_seconds, break_seconds, session_count)
+        SELECT guild_id, user_id, date, username, total_work, total_break, sessions FROM (
+            SELECT guild_id, user_id, date, username, MAX(id),
+                   SUM(work_seconds) AS total_work,
+                   SUM(COALESCE(break_seconds, 0)) AS total_break,
+                   COUNT(*) AS sessions
+            FROM work_history
+            GROUP BY guild_id, user_id, date
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO weekly_work_summary (guild_id, user_id, week, username, work_seconds, break_seconds, session_count)
+        SELECT guild_id, user_id, week, username, total_work, total_break, sessions FROM (
+            SELECT guild_id, user_id, iso_week(date) AS week, username, MAX(date),
+                   SUM(work_seconds) AS total_work,
+                   SUM(break_seconds) AS total_break,
+                   SUM(session_count) AS sessions
+            FROM daily_work_summary
+            GROUP BY guild_id, user_id, week
+        )
+    ''')
+
+def migration_bot_meta(conn):
+    """v4: 봇 메타데이터 키-값 테이블 (명령어 트리 해시 등)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bot_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    ''')
+
+def migration_compact_schema(conn):
+    """v5: 정수 사용자 ID, epoch 정수 시각, 표시 이름은 users 테이블 한 곳에만 저장
+
+    모든 테이블을 새 구조로 다시 만들어 복사합니다. 기본 키가 곧 조회 순서인 테이블
+    (현재 상태, 사용자, 집계)은 WITHOUT ROWID로 만들어 별도 인덱스 없이 기본 키로 바로 찾습니다.
+    히스토리 행의 id는 그대로 유지됩니다.
+    """
+    conn.create_function('iso_to_epoch', 1, lambda value: to_epoch(datetime.fromisoformat(value)) if value else None,
+                         deterministic=True)
+
+    # 서버별 최신 표시 이름 (가장 나중에 기록된 이름이 남도록 오래된 출처부터 덮어씀)
+    conn.execute('''
+        CREATE TABLE users (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            PRIMARY KEY (guild_id, user_id)
+        ) WITHOUT ROWID
+    ''')
+    for table in ('work_history', 'break_history', 'current_work_status'):
+        conn.execute(f'''
+            INSERT OR REPLACE INTO users (guild_id, user_id, username)
+            SELECT guild_id, user_id, username FROM (
+                SELECT guild_id, CAST(user_id AS INTEGER) AS user_id, username, MAX(rowid)
+                FROM {table}
+                GROUP BY guild_id, user_id
+            )
+        ''')
+
+    conn.execute('''
+        CREATE TABLE current_work_status_new (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            start_time INTEGER NOT NULL,
+            break_time INTEGER,
+            total_break_seconds INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        INSERT INTO current_work_status_new (guild_id, user_id, start_time, break_time, total_break_seconds)
+        SELECT guild_id, CAST(user_id AS INTEGER), iso_to_epoch(start_time), iso_to_epoch(break_time),
+               COALESCE(total_break_seconds, 0)
+        FROM current_work_status
+    ''')
+
+    conn.execute('''
+        CREATE TABLE work_history_new (
+            id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            start_time INTEGER NOT NULL,
+            end_time INTEGER NOT NULL,
+            work_seconds INTEGER NOT NULL,
+            break_seconds INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO work_history_new (id, guild_id, user_id, date, start_time, end_time, work_seconds, break_seconds)
+        SELECT id, guild_id, CAST(user_id AS INTEGER), date, iso_to_epoch(start_time), iso_to_epoch(end_time),
+               work_seconds, COALESCE(break_seconds, 0)
+        FROM work_history
+    ''')
+
+    conn.execute('''
+        CREATE TABLE break_history_new (
+            id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            start_time INTEGER NOT NULL,
+            end_time INTEGER,
+            duration_seconds INTEGER
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO break_history_new (id, guild_id, user_id, reason, start_time, end_time, duration_seconds)
+        SELECT id, guild_id, CAST(user_id AS INTEGER), reason, iso_to_epoch(start_time), iso_to_epoch(end_time),
+               duration_seconds
+        FROM break_history
+    ''')
+
+    # 집계 테이블은 리포트가 읽는 순서((길드, 날짜/주차)별 전체 사용자)로 클러스터링
+    conn.execute('''
+        CREATE TABLE daily_work_summary_new (
+            guild_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            work_seconds INTEGER NOT NULL DEFAULT 0,
+            break_seconds INTEGER NOT NULL DEFAULT 0,
+            session_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, date, user_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE weekly_work_summary_new (
+            guild_id INTEGER NOT NULL,
+            week TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            work_seconds INTEGER NOT NULL DEFAULT 0,
+            break_seconds INTEGER NOT NULL DEFAULT 0,
+            session_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, week, user_id)
+        ) WITHOUT ROWID
+    ''')
+    for table, key in (('daily_work_summary', 'date'), ('weekly_work_summary', 'week')):
+        conn.execute(f'''
+            INSERT INTO {table}_new (guild_id, {key}, user_id, work_seconds, break_seconds, session_count)
+            SELECT guild_id, {key}, CAST(user_id AS INTEGER), work_seconds, break_seconds, session_count FROM {table}
+        ''')
+
+    # 기존 테이블을 지우고 새 테이블로 교체 (인덱스는 테이블과 함께 삭제됨)
+    for table in ('current_work_status', 'work_history', 'break_history', 'daily_work_summary', 'weekly_work_summary'):
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+
+    conn.execute('CREATE INDEX idx_work_history_user_date ON work_history(guild_id, user_id, date)')
+    conn.execute('CREATE INDEX idx_work_history_date ON work_history(guild_id, date)')
+    conn.execute('CREATE INDEX idx_break_history_user ON break_history(guild_id, user_id, start_time)')
+
+def migration_status_boards(conn):
+    """v6: 길드별 실시간 현황판 메시지 위치"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS status_boards (
+            guild_id INTEGER PRIMARY KEY,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL
+        )
+    ''')
+
+def migration_scheduler_tables(conn):
+    """v7: 길드별 설정(시간대)과 스케줄 작업별 마지막 실행 회차"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id INTEGER PRIMARY KEY,
+            timezone TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_runs (
+            job TEXT NOT NULL,
+            guild_id INTEGER NOT NULL,
+            period TEXT NOT NULL,
+            finished_at INTEGER NOT NULL,
+            PRIMARY KEY (job, guild_id)
+        ) WITHOUT ROWID
+    ''')
+
+def migration_incremental_vacuum(conn):
+    """v8: 빈 페이지를 유지보수 작업에서 조금씩 잘라낼 수 있도록 auto_vacuum=INCREMENTAL
+
+    설정은 마이그레이션 뒤에 실행되는 VACUUM에서 파일에 적용됩니다.
+    """
+    conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+
+def migration_event_journal(conn):
+    """v9: 출퇴근 이벤트 저널 (추가만 하는 테이블). current_work_status는 저널의 스냅샷이 됨
+
+    휴식 기록은 이제 복귀(또는 퇴근)할 때 완성된 행으로 한 번에 추가되므로, 지금 휴식 중인 사람의
+    끝나지 않은 휴식 행은 사유와 함께 스냅샷으로 옮깁니다.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS attendance_events (
+            id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            kind INTEGER NOT NULL,
+            at INTEGER NOT NULL,
+            detail TEXT
+        )
+    ''')
+    conn.execute('ALTER TABLE current_work_status ADD COLUMN break_reason TEXT')
+    conn.execute('''
+        UPDATE current_work_status
+        SET break_reason = COALESCE((
+            SELECT b.reason FROM break_history b
+            WHERE b.guild_id = current_work_status.guild_id AND b.user_id = current_work_status.user_id
+              AND b.start_time = current_work_status.break_time AND b.end_time IS NULL
+            ORDER BY b.id DESC
+            LIMIT 1
+        ), '')
+        WHERE break_time IS NOT NULL
+    ''')
+    conn.execute('''
+        DELETE FROM break_history
+        WHERE end_time IS NULL AND EXISTS (
+            SELECT 1 FROM current_work_status s
+            WHERE s.guild_id = break_history.guild_id AND s.user_id = break_history.user_id
+              AND s.break_time = break_history.start_time
+        )
+    ''')
+
+MIGRATIONS = [
+    (1, '기본 테이블', migration_base_tables),
+    (2, '길드별 데이터 분리', migration_guild_partition),
+    (3, '일별/주별 집계 테이블', migration_rollup_tables),
+    (4, '봇 메타데이터 테이블', migration_bot_meta),
+    (5, '정수 ID/시각 압축 스키마', migration_compact_schema),
+    (6, '실시간 현황판 테이블', migration_status_boards),
+    (7, '길드 설정/스케줄 실행 기록 테이블', migration_scheduler_tables),
+    (8, '점진적 빈 페이지 정리(auto_vacuum)', migration_incremental_vacuum),
+    (9, '출퇴근 이벤트 저널', migration_event_journal),
+]
+
+def run_migrations(conn):
+    """아직 적용되지 않은 마이그레이션을 하나의 트랜잭션으로 실행하고 적용된 (버전, 설명) 목록 반환"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    current = conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        if not conn.in_transaction:
+            conn.execute('BEGIN')
+        migrate(conn)
+        conn.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)', (version, description))
+        applied.append((version, description))
+    return applied
+
+def vacuum_database(conn):
+    """빈 페이지를 정리해 파일 크기를 줄임 (트랜잭션 밖에서 실행되어야 함)"""
+    conn.execute('VACUUM')
+
+def count_legacy_rows(conn):
+    """길드가 배정되지 않은(guild_id = 0) 기존 행 수"""
+    return sum(conn.execute(f'SELECT COUNT(*) FROM {table} WHERE guild_id = 0').fetchone()[0]
+               for table in ('current_work_status', 'work_history', 'break_history'))
+
+def adopt_legacy_rows(conn, guild_id, jobs=()):
+    """길드 구분 없이 저장된 기존 행(guild_id = 0)을 지정한 길드로 배정하고 배정된 행 수 반환
+
+    jobs는 길드별 예약 작업 이름 목록입니다. 길드 ID 0은 길드 구분 없는 작업의 실행 기록이기도
+    하므로 job_runs는 이 작업들의 행만 옮깁니다.
+    """
+    moved = 0
+    for table in ('current_work_status', 'work_history', 'break_history',
+                  'daily_work_summary', 'weekly_work_summary', 'attendance_events'):
+        moved += conn.execute(f'UPDATE {table} SET guild_id = ? WHERE guild_id = 0', (guild_id,)).rowcount
+
+    # 그 길드에 이미 실행 기록이 있으면 기존 값을 유지
+    placeholders = ', '.join('?' * len(jobs))
+    conn.execute(f'UPDATE OR IGNORE job_runs SET guild_id = ? WHERE guild_id = 0 AND job IN ({placeholders})',
+                 (guild_id, *jobs))
+    conn.execute(f'DELETE FROM job_runs WHERE guild_id = 0 AND job IN ({placeholders})', jobs)
+
+    # 이름은 이미 그 길드에 있는 사용자면 기존 값을 유지
+    conn.execute('UPDATE OR IGNORE users SET guild_id = ? WHERE guild_id = 0', (guild_id,))
+    conn.execute('DELETE FROM users WHERE guild_id = 0')
+    return moved
+
+def upsert_users(conn, rows):
+    """rows: (guild_id, user_id, username) 목록. 이름이 바뀐 경우에만 기록"""
+    conn.executemany('''
+        INSERT INTO users (guild_id, user_id, username) VALUES (?, ?, ?)
+        ON CONFLICT (guild_id, user_id) DO UPDATE SET username = excluded.username
+        WHERE username != excluded.username
+    ''', rows)
+
+def insert_history(conn, rows):
+    """work_history 삽입과 일별/주별 집계 갱신을 함께 수행
+
+    rows: (guild_id, user_id, date, start_time, end_time, work_seconds, break_seconds) 튜플 목록
+    (시각은 epoch 초). 호출자의 트랜잭션 안에서 실행되어야 합니다.
+    """
+    conn.executemany('''
+        INSERT INTO work_history (guild_id, user_id, date, start_time, end_time, work_seconds, break_seconds)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+
+    conn.executemany('''
+        INSERT INTO daily_work_summary (guild_id, date, user_id, work_seconds, break_seconds, session_count)
+        VALUES (?, ?, ?, ?, ?, 1)
+        ON CONFLICT (guild_id, date, user_id) DO UPDATE SET
+            work_seconds = work_seconds + excluded.work_seconds,
+            break_seconds = break_seconds + excluded.break_seconds,
+            session_count = session_count + 1
+    ''', [(row[0], row[2], row[1], row[5], row[6]) for row in rows])
+
+    conn.executemany('''
+        INSERT INTO weekly_work_summary (guild_id, week, user_id, work_seconds, break_seconds, session_count)
+        VALUES (?, ?, ?, ?, ?, 1)
+        ON CONFLICT (guild_id, week, user_id) DO UPDATE SET
+            work_seconds = work_seconds + excluded.work_seconds,
+            break_seconds = break_seconds + excluded.break_seconds,
+            session_count = session_count + 1
+    ''', [(row[0], iso_week_key(row[2]), row[1], row[5], row[6]) for row in rows])
+
+def rebuild_rollups(conn, guild_id=None):
+    """work_history로부터 일별/주별 집계 테이블을 다시 생성 (guild_id를 주면 해당 길드만)
+
+    보관 파일로 옮겨진 기간(archive_before 이전)의 일별 집계는 그대로 두고,
+    주별 집계는 일별 집계 전체에서 다시 만듭니다.
+    """
+    conn.create_function('iso_week', 1, iso_week_key, deterministic=True)
+    where, params = ('WHERE guild_id = ?', (guild_id,)) if guild_id is not None else ('', ())
+    hot_where = f"{where} {'AND' if where else 'WHERE'} date >= ?"
+    hot_params = (*params, get_meta(conn, 'archive_before') or '')
+
+    conn.execute(f'DELETE FROM daily_work_summary {hot_where}', hot_params)
+    conn.execute(f'DELETE FROM weekly_work_summary {where}', params)
+
+    conn.execute(f'''
+        INSERT INTO daily_work_summary (guild_id, date, user_id, work_seconds, break_seconds, session_count)
+        SELECT guild_id, date, user_id, SUM(work_seconds), SUM(break_seconds), COUNT(*)
+        FROM work_history
+        {hot_where}
+        GROUP BY guild_id, date, user_id
+    ''', hot_params)
+
+    conn.execute(f'''
+        INSERT INTO weekly_work_summary (guild_id, week, user_id, work_seconds, break_seconds, session_count)
+        SELECT guild_id, iso_week(date) AS week, user_id, SUM(work_seconds), SUM(break_seconds), SUM(session_count)
+        FROM daily_work_summary
+        {where}
+        GROUP BY guild_id, week, user_id
+    ''', params)
+
+    days = conn.execute(f'SELECT COUNT(*) FROM daily_work_summary {where}', params).fetchone()[0]
+    weeks = conn.execute(f'SELECT COUNT(*) FROM weekly_work_summary {where}', params).fetchone()[0]
+    return days, weeks
+
+# 저장소별 트랜잭션
+# 출퇴근 이벤트 저널의 이벤트 종류 (attendance_events.kind)
+EVENT_START = 1        # 출근
+EVENT_BREAK = 2        # 휴식 시작 (detail: 사유)
+EVENT_RETURN = 3       # 복귀
+EVENT_FINISH = 4       # 퇴근 (detail: 근무 날짜)
+EVENT_AUTO_FINISH = 5  # 자정 자동 퇴근 (detail: 근무 날짜)
+
+class StorageTransaction(abc.ABC):
+    """저장소 트랜잭션 하나 안에서 쓰는 작업 (Storage.run()이 func의 첫 인자로 넘김)
+
+    시각은 epoch 초 정수, 날짜는 'YYYY-MM-DD' 문자열입니다. 여러 행을 돌려주는 메서드는
+    이름으로 읽을 수 있는 행(sqlite3.Row 또는 dict) 목록을, history_page()는 열 순서대로
+    인덱스로 읽는 행 목록을 반환합니다.
+    """
+
+    # 출근 상태 (이벤트 저널과 스냅샷)
+    @abc.abstractmethod
+    def load_journal(self):
+        """(스냅샷 행 목록, 스냅샷 이후 이벤트 목록)
+
+        스냅샷 행: guild_id, user_id, username, start_time, break_time, break_reason, total_break_seconds
+        이벤트: id, guild_id, user_id, username, kind, at, detail (id 순서)
+        """
+
+    @abc.abstractmethod
+    def append_events(self, events):
+        """events: (guild_id, user_id, kind, at, detail) 목록을 저널 끝에 추가"""
+
+    @abc.abstractmethod
+    def save_snapshot(self, sessions, last_event_id):
+        """스냅샷을 sessions(WorkSession)로 바꾸고 last_event_id까지 반영됐다고 기록"""
+
+    @abc.abstractmethod
+    def trim_journal(self):
+        """스냅샷에 이미 반영된 이벤트를 저널에서 지우고 지운 수 반환
+
+        모든 저장소에서 id < journal_snapshot인 이벤트만 지웁니다. 마지막으로 반영된 이벤트 한 건은 남겨
+        새 이벤트의 id가 (SQLite처럼 남은 행의 최댓값 다음으로 매기는 저장소에서도) 스냅샷 아래로 되돌아가지
+        않게 합니다. 남은 한 건은 다음 압축 때 지워지고, 재생은 journal_snapshot 이후만 하므로 영향이 없습니다.
+        """
+
+    def compact_journal(self, trim=False):
+        """스냅샷 이후 이벤트를 스냅샷에 합쳐 다음 시작 때 재생할 이벤트를 줄이고 합친 이벤트 수 반환
+
+        trim이면 스냅샷에 반영된 이벤트를 저널에서 지웁니다 (기록 보관을 하지 않아 보관 파일로 옮겨지지 않을 때).
+        """
+        snapshot, events = self.load_journal()
+        if events:
+            self.save_snapshot(fold_journal(snapshot, events).values(), events[-1]['id'])
+        if trim:
+            self.trim_journal()
+        return len(events)
+
+    # 이름, 히스토리, 집계
+    @abc.abstractmethod
+    def upsert_users(self, rows):
+        """rows: (guild_id, user_id, username) 목록"""
+
+    @abc.abstractmethod
+    def insert_history(self, rows):
+        """rows: (guild_id, user_id, date, start_time, end_time, work_seconds, break_seconds) 목록"""
+
+    @abc.abstractmethod
+    def insert_breaks(self, rows):
+        """rows: (guild_id, user_id, reason, start_time, end_time, duration_seconds) 목록 (끝난 휴식만)"""
+
+    @abc.abstractmethod
+    def rebuild_rollups(self, guild_id=None):
+        """히스토리로 일별/주별 집계를 다시 만들고 (일별 행 수, 주별 행 수) 반환"""
+
+    # 조회, 리포트
+    @abc.abstractmethod
+    def history_page(self, kind, guild_id, user_id, start_date, end_date, limit, after=None, before=None):
+        """fetch_history_page()와 같은 규칙의 한 페이지 (행 목록, 더 있는지 여부)"""
+
+    @abc.abstractmethod
+    def daily_report_rows(self, guild_id, start_date, end_date):
+        """리포트 엔진에 넣을 기간(근무 날짜, 포함) 내 일별 집계를 열 순서대로 읽는 행 목록
+
+        (guild_id, user_id, username, date, work_seconds, break_seconds, session_count).
+        일별 집계는 기록 보관 후에도 남으므로 보관된 달의 주간 리포트도 같은 값이 나옵니다.
+        """
+
+    @abc.abstractmethod
+    def ranking_totals(self, week, month):
+        """(주간 행 목록, 월간 행 목록). 각 행은 guild_id, user_id, username, work_seconds"""
+
+    # 봇 상태
+    @abc.abstractmethod
+    def get_meta(self, key):
+        ...
+
+    @abc.abstractmethod
+    def set_meta(self, key, value):
+        ...
+
+    @abc.abstractmethod
+    def job_runs(self):
+        """스케줄 작업 실행 기록 (job, guild_id, period)"""
+
+    @abc.abstractmethod
+    def record_job_runs(self, runs, finished_at):
+        """runs: (작업 이름, 길드 ID, 회차) 목록"""
+
+    @abc.abstractmethod
+    def guild_settings(self):
+        """시간대가 설정된 길드 (guild_id, timezone)"""
+
+    @abc.abstractmethod
+    def set_guild_timezone(self, guild_id, timezone):
+        ...
+
+    @abc.abstractmethod
+    def status_boards(self):
+        """현황판 위치 (guild_id, channel_id, message_id)"""
+
+    @abc.abstractmethod
+    def save_status_board(self, guild_id, channel_id, message_id):
+        ...
+
+    @abc.abstractmethod
+    def delete_status_board(self, guild_id):
+        ...
+
+    # 길드 구분 이전 데이터 (v2.0.0 SQLite 파일에만 있음)
+    def count_legacy_rows(self):
+        return 0
+
+    def adopt_legacy_rows(self, guild_id, jobs=()):
+        """기존 행을 guild_id로 배정 (jobs: 실행 기록을 함께 옮길 길드별 예약 작업 이름)"""
+        return 0
+
+class SQLiteTransaction(StorageTransaction):
+    """Database 워커 스레드의 SQLite 연결 위에서 실행되는 트랜잭션"""
+    __slots__ = ('conn',)
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def load_journal(self):
+        snapshot = self.conn.execute('''
+            SELECT s.guild_id, s.user_id, COALESCE(u.username, CAST(s.user_id AS TEXT)) AS username,
+                   s.start_time, s.break_time, s.break_reason, s.total_break_seconds
+            FROM current_work_status s
+            LEFT JOIN users u ON u.guild_id = s.guild_id AND u.user_id = s.user_id
+        ''').fetchall()
+        # id(rowid) 범위 탐색이라 별도 인덱스가 필요 없음
+        events = self.conn.execute('''
+            SELECT e.id, e.guild_id, e.user_id, COALESCE(u.username, CAST(e.user_id AS TEXT)) AS username,
+                   e.kind, e.at, e.detail
+            FROM attendance_events e
+            LEFT JOIN users u ON u.guild_id = e.guild_id AND u.user_id = e.user_id
+            WHERE e.id > ?
+            ORDER BY e.id
+        ''', (int(get_meta(self.conn, 'journal_snapshot') or 0),)).fetchall()
+        return snapshot, events
+
+    def append_events(self, events):
+        self.conn.executemany('''
+            INSERT INTO attendance_events (guild_id, user_id, kind, at, detail) VALUES (?, ?, ?, ?, ?)
+        ''', events)
+
+    def save_snapshot(self, sessions, last_event_id):
+        self.conn.execute('DELETE FROM current_work_status')
+        self.conn.executemany('''
+            INSERT INTO current_work_status (guild_id, user_id, start_time, break_time, break_reason, total_break_seconds)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [session.snapshot_row() for session in sessions])
+        set_meta(self.conn, 'journal_snapshot', str(last_event_id))
+
+    def trim_journal(self):
+        return self.conn.execute('DELETE FROM attendance_events WHERE id < ?',
+                                 (int(get_meta(self.conn, 'journal_snapshot') or 0),)).rowcount
+
+    def upsert_users(self, rows):
+        upsert_users(self.conn, rows)
+
+    def insert_history(self, rows):
+        insert_history(self.conn, rows)
+
+    def insert_breaks(self, rows):
+        self.conn.executemany('''
+            INSERT INTO break_history (guild_id, user_id, reason, start_time, end_time, duration_seconds)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+    def rebuild_rollups(self, guild_id=None):
+        return rebuild_rollups(self.conn, guild_id)
+
+    def history_page(self, kind, guild_id, user_id, start_date, end_date, limit, after=None, before=None):
+        return fetch_history_page(self.conn, kind, guild_id, user_id, start_date, end_date, limit, after, before)
+
+    def daily_report_rows(self, guild_id, start_date, end_date):
+        # 기본 키 (guild_id, date, user_id) 범위 탐색
+        return self.conn.execute('''
+            SELECT d.guild_id, d.user_id, COALESCE(u.username, CAST(d.user_id AS TEXT)), d.date,
+                   d.work_seconds, d.break_seconds, d.session_count
+            FROM daily_work_summary d
+            LEFT JOIN users u ON u.guild_id = d.guild_id AND u.user_id = d.user_id
+            WHERE d.guild_id = ? AND d.date >= ? AND d.date <= ?
+        ''', (guild_id, start_date.isoformat(), end_date.isoformat())).fetchall()
+
+    def ranking_totals(self, week, month):
+        weekly = self.conn.execute('''
+            SELECT w.guild_id, w.user_id, COALESCE(u.username, CAST(w.user_id AS TEXT)) AS username, w.work_seconds
+            FROM weekly_work_summary w
+            LEFT JOIN users u ON u.guild_id = w.guild_id AND u.user_id = w.user_id
+            WHERE w.week = ?
+        ''', (week,)).fetchall()
+        monthly = self.conn.execute('''
+            SELECT d.guild_id, d.user_id, COALESCE(u.username, CAST(d.user_id AS TEXT)) AS username,
+                   SUM(d.work_seconds) AS work_seconds
+            FROM daily_work_summary d
+            LEFT JOIN users u ON u.guild_id = d.guild_id AND u.user_id = d.user_id
+            WHERE d.date >= ? AND d.date < ?
+            GROUP BY d.guild_id, d.user_id
+        ''', (f'{month}-01', f'{month}-32')).fetchall()
+        return weekly, monthly
+
+    def get_meta(self, key):
+        return get_meta(self.conn, key)
+
+    def set_meta(self, key, value):
+        set_meta(self.conn, key, value)
+
+    def job_runs(self):
+        return self.conn.execute('SELECT job, guild_id, period FROM job_runs').fetchall()
+
+    def record_job_runs(self, runs, finished_at):
+        self.conn.executemany('INSERT OR REPLACE INTO job_runs (job, guild_id, period, finished_at) VALUES (?, ?, ?, ?)',
+                              [(*run, finished_at) for run in runs])
+
+    def guild_settings(self):
+        return self.conn.execute('SELECT guild_id, timezone FROM guild_settings WHERE timezone IS NOT NULL').fetchall()
+
+    def set_guild_timezone(self, guild_id, timezone):
+        self.conn.execute('INSERT OR REPLACE INTO guild_settings (guild_id, timezone) VALUES (?, ?)',
+                          (guild_id, timezone))
+
+    def status_boards(self):
+        return self.conn.execute('SELECT guild_id, channel_id, message_id FROM status_boards').fetchall()
+
+    def save_status_board(self, guild_id, channel_id, message_id):
+        self.conn.execute('INSERT OR REPLACE INTO status_boards (guild_id, channel_id, message_id) VALUES (?, ?, ?)',
+                          (guild_id, channel_id, message_id))
+
+    def delete_status_board(self, guild_id):
+        self.conn.execute('DELETE FROM status_boards WHERE guild_id = ?', (guild_id,))
+
+    def count_legacy_rows(self):
+        return count_legacy_rows(self.conn)
+
+    def adopt_legacy_rows(self, guild_id, jobs=()):
+        return adopt_legacy_rows(self.conn, guild_id, jobs)
+
+# 메모리 저장소 (테스트, 벤치마크용)
+_MISSING = object()
+
+class MemoryStorage(Storage):
+    """프로세스 메모리에만 보관하는 저장소 (종료하면 사라짐)
+
+    테이블마다 딕셔너리 하나를 두고 이벤트 루프에서 바로 실행하므로 디스크나 스레드를 쓰지 않습니다.
+    트랜잭션이 예외로 끝나면 그 안에서 바꾼 값을 되돌립니다.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.users = {}                # (guild_id, user_id) -> username
+        self.current_work_status = {}  # (guild_id, user_id) -> (start_time, break_time, break_reason, total_break_seconds)
+        self.attendance_events = []    # (id, guild_id, user_id, kind, at, detail)
+        self.work_history = {}         # (guild_id, user_id) -> [(id, date, start_time, end_time, work, break)]
+        self.break_history = {}        # (guild_id, user_id) -> [(id, start_time, end_time, reason, duration)]
+        self.daily_work_summary = {}   # (guild_id, date, user_id) -> (work, break, session_count)
+        self.weekly_work_summary = {}  # (guild_id, week, user_id) -> (work, break, session_count)
+        self.bot_meta = {}
+        self.job_runs = {}             # (job, guild_id) -> (period, finished_at)
+        self.guild_settings = {}       # guild_id -> timezone
+        self.status_boards = {}        # guild_id -> (channel_id, message_id)
+        self.last_ids = {'work_history': 0, 'break_history': 0, 'attendance_events': 0}
+
+    async def run(self, func, *args):
+        started = time.perf_counter()
+        tx = MemoryTransaction(self)
+        try:
+            result = func(tx, *args)
+        except BaseException:
+            tx.rollback()
+            self._record_batch(1, 0.0, 1)
+            raise
+        else:
+            self._record_batch(1, 0.0, 0)
+            return result
+        finally:
+            self._observe(func, started)
+
+class MemoryTransaction(StorageTransaction):
+    """MemoryStorage의 트랜잭션 (바꾼 값의 이전 값을 기록해 두었다가 실패하면 되돌림)"""
+
+    def __init__(self, store):
+        self.store = store
+        self.undo = []
+
+    def _set(self, container, key, value):
+        self.undo.append((container, key, container.get(key, _MISSING)))
+        container[key] = value
+
+    def _pop(self, container, key):
+        if key in container:
+            self.undo.append((container, key, container.pop(key)))
+
+    def _append(self, items, value):
+        self.undo.append((items, len(items), _MISSING))
+        items.append(value)
+
+    def _list(self, container, key):
+        """container[key] 목록 (없으면 만든 것도 되돌릴 수 있도록 기록)"""
+        if key not in container:
+            self._set(container, key, [])
+        return container[key]
+
+    def rollback(self):
+        for container, key, old in reversed(self.undo):
+            if old is _MISSING:
+                del container[key]
+            else:
+                container[key] = old
+        self.undo.clear()
+
+    def _next_id(self, table):
+        self._set(self.store.last_ids, table, self.store.last_ids[table] + 1)
+        return self.store.last_ids[table]
+
+    def _username(self, guild_id, user_id):
+        return self.store.users.get((guild_id, user_id), str(user_id))
+
+    def load_journal(self):
+        snapshot = [
+            {'guild_id': guild_id, 'user_id': user_id, 'username': self._username(guild_id, user_id),
+             'start_time': start_time, 'break_time': break_time, 'break_reason': break_reason,
+             'total_break_seconds': total_break}
+            for (guild_id, user_id), (start_time, break_time, break_reason, total_break)
+            in self.store.current_work_status.items()
+        ]
+        last_id = int(self.store.bot_meta.get('journal_snapshot', 0))
+        events = [
+            {'id': event_id, 'guild_id': guild_id, 'user_id': user_id, 'username': self._username(guild_id, user_id),
+             'kind': kind, 'at': at, 'detail': detail}
+            for event_id, guild_id, user_id, kind, at, detail in self.store.attendance_events
+            if event_id > last_id
+        ]
+        return snapshot, events
+
+    def append_events(self, events):
+        for guild_id, user_id, kind, at, detail in events:
+            self._append(self.store.attendance_events,
+                         (self._next_id('attendance_events'), guild_id, user_id, kind, at, detail))
+
+    def save_snapshot(self, sessions, last_event_id):
+        for key in list(self.store.current_work_status):
+            self._pop(self.store.current_work_status, key)
+        for guild_id, user_id, *state in (session.snapshot_row() for session in sessions):
+            self._set(self.store.current_work_status, (guild_id, user_id), tuple(state))
+        self._set(self.store.bot_meta, 'journal_snapshot', str(last_event_id))
+
+    def trim_journal(self):
+        # 이벤트는 id 순서이므로 반영된 이벤트는 목록 앞부분 (되돌릴 때는 앞에 다시 끼워 넣음)
+        last_id = int(self.store.bot_meta.get('journal_snapshot', 0))
+        events = self.store.attendance_events
+        count = next((i for i, event in enumerate(events) if event[0] >= last_id), len(events))
+        if count:
+            self.undo.append((events, slice(0, 0), events[:count]))
+            del events[:count]
+        return count
+
+    def upsert_users(self, rows):
+        for guild_id, user_id, username in rows:
+            if self.store.users.get((guild_id, user_id)) != username:
+                self._set(self.store.users, (guild_id, user_id), username)
+
+    def _add_rollup(self, table, key, work_seconds, break_seconds, session_count=1):
+        work, breaks, count = table.get(key, (0, 0, 0))
+        self._set(table, key, (work + work_seconds, breaks + break_seconds, count + session_count))
+
+    def insert_history(self, rows):
+        for guild_id, user_id, date, start_time, end_time, work_seconds, break_seconds in rows:
+            history = self._list(self.store.work_history, (guild_id, user_id))
+            self._append(history, (self._next_id('work_history'), date, start_time, end_time, work_seconds,
+                                   break_seconds))
+            self._add_rollup(self.store.daily_work_summary, (guild_id, date, user_id), work_seconds, break_seconds)
+            self._add_rollup(self.store.weekly_work_summary, (guild_id, iso_week_key(date), user_id),
+                             work_seconds, break_seconds)
+
+    def insert_breaks(self, rows):
+        for guild_id, user_id, reason, start_time, end_time, duration_seconds in rows:
+            breaks = self._list(self.store.break_history, (guild_id, user_id))
+            self._append(breaks, (self._next_id('break_history'), start_time, end_time, reason, duration_seconds))
+
+    def rebuild_rollups(self, guild_id=None):
+        for table in (self.store.daily_work_summary, self.store.weekly_work_summary):
+            for key in [key for key in table if guild_id is None or key[0] == guild_id]:
+                self._pop(table, key)
+        for (row_guild_id, user_id), history in self.store.work_history.items():
+            if guild_id is not None and row_guild_id != guild_id:
+                continue
+            for _, date, _, _, work_seconds, break_seconds in history:
+                self._add_rollup(self.store.daily_work_summary, (row_guild_id, date, user_id),
+                                 work_seconds, break_seconds)
+        for (row_guild_id, date, user_id), (work, breaks, count) in list(self.store.daily_work_summary.items()):
+            if guild_id is None or row_guild_id == guild_id:
+                self._add_rollup(self.store.weekly_work_summary, (row_guild_id, iso_week_key(date), user_id),
+                                 work, breaks, count)
+        return tuple(sum(1 for key in table if guild_id is None or key[0] == guild_id)
+                     for table in (self.store.daily_work_summary, self.store.weekly_work_summary))
+
+    def history_page(self, kind, guild_id, user_id, start_date, end_date, limit, after=None, before=None):
+        # 두 종류 모두 행의 두 번째 값이 정렬 키 (근무: date, 휴식: start_time)
+        table, _, _, bound = HISTORY_KINDS[kind]
+        low, high = bound(guild_id, start_date), bound(guild_id, end_date + timedelta(days=1))
+        rows = sorted((row for row in getattr(self.store, table).get((guild_id, user_id), ())
+                       if low <= row[1] < high), key=lambda row: (row[1], row[0]))
+        if before is not None:
+            rows = [row for row in rows if (row[1], row[0]) > tuple(before)][:limit + 1]
+        else:
+            if after is not None:
+                rows = [row for row in rows if (row[1], row[0]) < tuple(after)]
+            rows = rows[::-1][:limit + 1]
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if before is not None:
+            rows.reverse()
+        return rows, has_more
+
+    def daily_report_rows(self, guild_id, start_date, end_date):
+        first, last = start_date.isoformat(), end_date.isoformat()
+        return [
+            (guild_id, user_id, self._username(guild_id, user_id), date, work, break_seconds, count)
+            for (row_guild_id, date, user_id), (work, break_seconds, count) in self.store.daily_work_summary.items()
+            if row_guild_id == guild_id and first <= date <= last
+        ]
+
+    def ranking_totals(self, week, month):
+        weekly = [
+            {'guild_id': guild_id, 'user_id': user_id, 'username': self._username(guild_id, user_id),
+             'work_seconds': work}
+            for (guild_id, row_week, user_id), (work, _, _) in self.store.weekly_work_summary.items()
+            if row_week == week
+        ]
+        totals = {}
+        for (guild_id, date, user_id), (work, _, _) in self.store.daily_work_summary.items():
+            if date.startswith(month):
+                totals[(guild_id, user_id)] = totals.get((guild_id, user_id), 0) + work
+        monthly = [
+            {'guild_id': guild_id, 'user_id': user_id, 'username': self._username(guild_id, user_id),
+             'work_seconds': work}
+            for (guild_id, user_id), work in totals.items()
+        ]
+        return weekly, monthly
+
+    def get_meta(self, key):
+        return self.store.bot_meta.get(key)
+
+    def set_meta(self, key, value):
+        self._set(self.store.bot_meta, key, value)
+
+    def job_runs(self):
+        return [{'job': job, 'guild_id': guild_id, 'period': period}
+                for (job, guild_id), (period, _) in self.store.job_runs.items()]
+
+    def record_job_runs(self, runs, finished_at):
+        for job, guild_id, period in runs:
+            self._set(self.store.job_runs, (job, guild_id), (period, finished_at))
+
+    def guild_settings(self):
+        return [{'guild_id': guild_id, 'timezone': timezone}
+                for guild_id, timezone in self.store.guild_settings.items() if timezone is not None]
+
+    def set_guild_timezone(self, guild_id, timezone):
+        self._set(self.store.guild_settings, guild_id, timezone)
+
+    def status_boards(self):
+        return [{'guild_id': guild_id, 'channel_id': channel_id, 'message_id': message_id}
+                for guild_id, (channel_id, message_id) in self.store.status_boards.items()]
+
+    def save_status_board(self, guild_id, channel_id, message_id):
+        self._set(self.store.status_boards, guild_id, (channel_id, message_id))
+
+    def delete_status_board(self, guild_id):
+        self._pop(self.store.status_boards, guild_id)
+
+# PostgreSQL 저장소
+# SQLite 마이그레이션과 같은 방식으로 schema_version에 기록된 버전 이후의 것만 한 번씩 실행합니다.
+# 최신 버전은 현재 SQLite 스키마(v9)와 같은 구조이며 시각은 epoch 초, 날짜/주차는 문자열 그대로 사용합니다.
+# SQLite의 v1~v7 변경은 처음 만드는 테이블에 이미 반영되어 있고, v8(auto_vacuum)은 PostgreSQL의 autovacuum이
+# 대신하므로 해당하는 마이그레이션이 없습니다. 이전 버전(버전 기록 없이 테이블만 만들던 때)의 데이터베이스에도
+# 그대로 적용되도록 모두 IF NOT EXISTS로 작성합니다.
+POSTGRES_MIGRATIONS = [
+    (1, '기본 테이블 (SQLite v7 구조)', [
+        '''CREATE TABLE IF NOT EXISTS users (
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            username TEXT NOT NULL,
+            PRIMARY KEY (guild_id, user_id)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS current_work_status (
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            start_time BIGINT NOT NULL,
+            break_time BIGINT,
+            total_break_seconds BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS work_history (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            date TEXT NOT NULL,
+            start_time BIGINT NOT NULL,
+            end_time BIGINT NOT NULL,
+            work_seconds BIGINT NOT NULL,
+            break_seconds BIGINT NOT NULL DEFAULT 0
+        )''',
+        '''CREATE TABLE IF NOT EXISTS break_history (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            reason TEXT NOT NULL,
+            start_time BIGINT NOT NULL,
+            end_time BIGINT,
+            duration_seconds BIGINT
+        )''',
+        '''CREATE TABLE IF NOT EXISTS daily_work_summary (
+            guild_id BIGINT NOT NULL,
+            date TEXT NOT NULL,
+            user_id BIGINT NOT NULL,
+            work_seconds BIGINT NOT NULL DEFAULT 0,
+            break_seconds BIGINT NOT NULL DEFAULT 0,
+            session_count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, date, user_id)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS weekly_work_summary (
+            guild_id BIGINT NOT NULL,
+            week TEXT NOT NULL,
+            user_id BIGINT NOT NULL,
+            work_seconds BIGINT NOT NULL DEFAULT 0,
+            break_seconds BIGINT NOT NULL DEFAULT 0,
+            session_count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, week, user_id)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS bot_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )''',
+        '''CREATE TABLE IF NOT EXISTS status_boards (
+            guild_id BIGINT PRIMARY KEY,
+            channel_id BIGINT NOT NULL,
+            message_id BIGINT NOT NULL
+        )''',
+        '''CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id BIGINT PRIMARY KEY,
+            timezone TEXT
+        )''',
+        '''CREATE TABLE IF NOT EXISTS job_runs (
+            job TEXT NOT NULL,
+            guild_id BIGINT NOT NULL,
+            period TEXT NOT NULL,
+            finished_at BIGINT NOT NULL,
+            PRIMARY KEY (job, guild_id)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_work_history_user_date ON work_history (guild_id, user_id, date)',
+        'CREATE INDEX IF NOT EXISTS idx_work_history_date ON work_history (guild_id, date)',
+        'CREATE INDEX IF NOT EXISTS idx_break_history_user ON break_history (guild_id, user_id, start_time)',
+    ]),
+    (2, '출퇴근 이벤트 저널 (SQLite v9)', [
+        '''CREATE TABLE IF NOT EXISTS attendance_events (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            kind SMALLINT NOT NULL,
+            at BIGINT NOT NULL,
+            detail TEXT
+        )''',
+        'ALTER TABLE current_work_status ADD COLUMN IF NOT EXISTS break_reason TEXT',
+        # 끝나지 않은 휴식 행은 사유와 함께 스냅샷으로 옮김 (SQLite v9와 같음)
+        '''UPDATE current_work_status s
+        SET break_reason = COALESCE((
+            SELECT b.reason FROM break_history b
+            WHERE b.guild_id = s.guild_id AND b.user_id = s.user_id
+              AND b.start_time = s.break_time AND b.end_time IS NULL
+            ORDER BY b.id DESC
+            LIMIT 1
+        ), '')
+        WHERE s.break_time IS NOT NULL AND s.break_reason IS NULL''',
+        '''DELETE FROM break_history b
+        USING current_work_status s
+        WHERE b.end_time IS NULL AND s.guild_id = b.guild_id AND s.user_id = b.user_id
+          AND s.break_time = b.start_time''',
+    ]),
+]
+
+class PostgresStorage(Storage):
+    """PostgreSQL 서버 저장소 (psycopg 연결 풀 필요)
+
+    트랜잭션마다 풀에서 연결을 빌려 별도 스레드에서 실행하므로 이벤트 루프를 막지 않고,
+    서로 다른 사용자의 쓰기는 풀 크기만큼 동시에 처리됩니다 (SQLite는 쓰기 하나씩).
+    """
+
+    def __init__(self, dsn, pool_size=10):
+        super().__init__()
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _open_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                try:
+                    from psycopg.rows import dict_row
+                    from psycopg_pool import ConnectionPool
+                except ImportError:
+                    raise RuntimeError('PostgreSQL 저장소에는 psycopg가 필요합니다. (pip install "psycopg[pool]")')
+                pool = ConnectionPool(self.dsn, min_size=1, max_size=self.pool_size,
+                                      kwargs={'row_factory': dict_row}, open=False)
+                pool.open(wait=True)
+                self._pool = pool
+        return self._pool
+
+    def _transact(self, func, args):
+        pool = self._open_pool()
+        with pool.connection() as conn:
+            result = func(PostgresTransaction(conn), *args)
+            commit_started = time.perf_counter()
+            conn.commit()
+            return result, time.perf_counter() - commit_started
+
+    async def run(self, func, *args):
+        started = time.perf_counter()
+        try:
+            # 풀의 연결은 예외가 나면 롤백된 뒤 반환됨
+            result, commit_seconds = await asyncio.to_thread(self._transact, func, args)
+        except BaseException:
+            self._record_batch(1, 0.0, 1)
+            raise
+        else:
+            self._record_batch(1, commit_seconds, 0)
+            return result
+        finally:
+            self._observe(func, started)
+
+    async def migrate(self):
+        def apply_migrations(tx):
+            tx.conn.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ DEFAULT now()
+                )
+            ''')
+            # 봇 여러 개가 같은 서버에 동시에 붙어도 마이그레이션은 한 번만 실행되도록 잠금
+            tx.conn.execute('LOCK TABLE schema_version IN EXCLUSIVE MODE')
+            current = tx.conn.execute('SELECT COALESCE(MAX(version), 0) AS version FROM schema_version').fetchone()
+            applied = []
+            for version, description, statements in POSTGRES_MIGRATIONS:
+                if version <= current['version']:
+                    continue
+                for statement in statements:
+                    tx.conn.execute(statement)
+                tx.conn.execute('INSERT INTO schema_version (version, description) VALUES (%s, %s)',
+                                (version, description))
+                applied.append((version, description))
+            return applied
+        return await self.run(apply_migrations)
+
+    async def close(self):
+        if self._pool is not None:
+            await asyncio.to_thread(self._pool.close)
+            self._pool = None
+
+class PostgresTransaction(StorageTransaction):
+    """PostgresStorage 풀 연결 하나 위의 트랜잭션 (행은 dict)"""
+    __slots__ = ('conn',)
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def load_journal(self):
+        snapshot = self.conn.execute('''
+            SELECT s.guild_id, s.user_id, COALESCE(u.username, s.user_id::TEXT) AS username,
+                   s.start_time, s.break_time, s.break_reason, s.total_break_seconds
+            FROM current_work_status s
+            LEFT JOIN users u ON u.guild_id = s.guild_id AND u.user_id = s.user_id
+        ''').fetchall()
+        events = self.conn.execute('''
+            SELECT e.id, e.guild_id, e.user_id, COALESCE(u.username, e.user_id::TEXT) AS username,
+                   e.kind, e.at, e.detail
+            FROM attendance_events e
+            LEFT JOIN users u ON u.guild_id = e.guild_id AND u.user_id = e.user_id
+            WHERE e.id > %s
+            ORDER BY e.id
+        ''', (int(self.get_meta('journal_snapshot') or 0),)).fetchall()
+        return snapshot, events
+
+    def append_events(self, events):
+        with self.conn.cursor() as cursor:
+            cursor.executemany('''
+                INSERT INTO attendance_events (guild_id, user_id, kind, at, detail) VALUES (%s, %s, %s, %s, %s)
+            ''', events)
+
+    def save_snapshot(self, sessions, last_event_id):
+        self.conn.execute('DELETE FROM current_work_status')
+        with self.conn.cursor() as cursor:
+            cursor.executemany('''
+                INSERT INTO current_work_status
+                    (guild_id, user_id, start_time, break_time, break_reason, total_break_seconds)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            ''', [session.snapshot_row() for session in sessions])
+        self.set_meta('journal_snapshot', str(last_event_id))
+
+    def trim_journal(self):
+        return self.conn.execute('DELETE FROM attendance_events WHERE id < %s',
+                                 (int(self.get_meta('journal_snapshot') or 0),)).rowcount
+
+    def upsert_users(self, rows):
+        with self.conn.cursor() as cursor:
+            cursor.executemany('''
+                INSERT INTO users (guild_id, user_id, username) VALUES (%s, %s, %s)
+                ON CONFLICT (guild_id, user_id) DO UPDATE SET username = EXCLUDED.username
+                WHERE users.username <> EXCLUDED.username
+            ''', rows)
+
+    def insert_history(self, rows):
+        with self.conn.cursor() as cursor:
+            cursor.executemany('''
+                INSERT INTO work_history (guild_id, user_id, date, start_time, end_time, work_seconds, break_seconds)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ''', rows)
+            for table, key, key_of in (('daily_work_summary', 'date', lambda row: row[2]),
+                                       ('weekly_work_summary', 'week', lambda row: iso_week_key(row[2]))):
+                cursor.executemany(f'''
+                    INSERT INTO {table} (guild_id, {key}, user_id, work_seconds, break_seconds, session_count)
+                    VALUES (%s, %s, %s, %s, %s, 1)
+                    ON CONFLICT (guild_id, {key}, user_id) DO UPDATE SET
+                        work_seconds = {table}.work_seconds + EXCLUDED.work_seconds,
+                        break_seconds = {table}.break_seconds + EXCLUDED.break_seconds,
+                        session_count = {table}.session_count + 1
+                ''', [(row[0], key_of(row), row[1], row[5], row[6]) for row in rows])
+
+    def insert_breaks(self, rows):
+        with self.conn.cursor() as cursor:
+            cursor.executemany('''
+                INSERT INTO break_history (guild_id, user_id, reason, start_time, end_time, duration_seconds)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            ''', rows)
+
+    def rebuild_rollups(self, guild_id=None):
+        where, params = ('WHERE guild_id = %s', (guild_id,)) if guild_id is not None else ('', ())
+        self.conn.execute(f'DELETE FROM daily_work_summary {where}', params)
+        self.conn.execute(f'DELETE FROM weekly_work_summary {where}', params)
+        self.conn.execute(f'''
+            INSERT INTO daily_work_summary (guild_id, date, user_id, work_seconds, break_seconds, session_count)
+            SELECT guild_id, date, user_id, SUM(work_seconds), SUM(break_seconds), COUNT(*)
+            FROM work_history
+            {where}
+            GROUP BY guild_id, date, user_id
+        ''', params)
+        self.conn.execute(f'''
+            INSERT INTO weekly_work_summary (guild_id, week, user_id, work_seconds, break_seconds, session_count)
+            SELECT guild_id, to_char(date::DATE, 'IYYY-"W"IW'), user_id,
+                   SUM(work_seconds), SUM(break_seconds), SUM(session_count)
+            FROM daily_work_summary
+            {where}
+            GROUP BY 1, 2, 3
+        ''', params)
+        return tuple(self.conn.execute(f'SELECT COUNT(*) AS count FROM {table} {where}', params).fetchone()['count']
+                     for table in ('daily_work_summary', 'weekly_work_summary'))
+
+    def history_page(self, kind, guild_id, user_id, start_date, end_date, limit, after=None, before=None):
+        from psycopg.rows import tuple_row
+
+        table, key, columns, bound = HISTORY_KINDS[kind]
+        where = f'WHERE guild_id = %s AND user_id = %s AND {key} >= %s AND {key} < %s'
+        params = [guild_id, user_id, bound(guild_id, start_date), bound(guild_id, end_date + timedelta(days=1))]
+        if before is not None:
+            where += f' AND ({key}, id) > (%s, %s)'
+            params += list(before)
+            order = f'ORDER BY {key} ASC, id ASC'
+        else:
+            if after is not None:
+                where += f' AND ({key}, id) < (%s, %s)'
+                params += list(after)
+            order = f'ORDER BY {key} DESC, id DESC'
+
+        with self.conn.cursor(row_factory=tuple_row) as cursor:
+            rows = cursor.execute(f'SELECT {columns} FROM {table} {where} {order} LIMIT %s',
+                                  [*params, limit + 1]).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if before is not None:
+            rows.reverse()
+        return rows, has_more
+
+    def daily_report_rows(self, guild_id, start_date, end_date):
+        from psycopg.rows import tuple_row
+
+        with self.conn.cursor(row_factory=tuple_row) as cursor:
+            return cursor.execute('''
+                SELECT d.guild_id, d.user_id, COALESCE(u.username, d.user_id::TEXT), d.date,
+                       d.work_seconds, d.break_seconds, d.session_count
+                FROM daily_work_summary d
+                LEFT JOIN users u ON u.guild_id = d.guild_id AND u.user_id = d.user_id
+                WHERE d.guild_id = %s AND d.date >= %s AND d.date <= %s
+            ''', (guild_id, start_date.isoformat(), end_date.isoformat())).fetchall()
+
+    def ranking_totals(self, week, month):
+        weekly = self.conn.execute('''
+            SELECT w.guild_id, w.user_id, COALESCE(u.username, w.user_id::TEXT) AS username, w.work_seconds
+            FROM weekly_work_summary w
+            LEFT JOIN users u ON u.guild_id = w.guild_id AND u.user_id = w.user_id
+            WHERE w.week = %s
+        ''', (week,)).fetchall()
+        monthly = self.conn.execute('''
+            SELECT d.guild_id, d.user_id, COALESCE(MAX(u.username), d.user_id::TEXT) AS username,
+                   SUM(d.work_seconds)::BIGINT AS work_seconds
+            FROM daily_work_summary d
+            LEFT JOIN users u ON u.guild_id = d.guild_id AND u.user_id = d.user_id
+            WHERE d.date >= %s AND d.date < %s
+            GROUP BY d.guild_id, d.user_id
+        ''', (f'{month}-01', f'{month}-32')).fetchall()
+        return weekly, monthly
+
+    def get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM bot_meta WHERE key = %s', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute('''
+            INSERT INTO bot_meta (key, value) VALUES (%s, %s)
+            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+        ''', (key, value))
+
+    def job_runs(self):
+        return self.conn.execute('SELECT job, guild_id, period FROM job_runs').fetchall()
+
+    def record_job_runs(self, runs, finished_at):
+        with self.conn.cursor() as cursor:
+            cursor.executemany('''
+                INSERT INTO job_runs (job, guild_id, period, finished_at) VALUES (%s, %s, %s, %s)
+                ON CONFLICT (job, guild_id) DO UPDATE SET period = EXCLUDED.period, finished_at = EXCLUDED.finished_at
+            ''', [(*run, finished_at) for run in runs])
+
+    def guild_settings(self):
+        return self.conn.execute('SELECT guild_id, timezone FROM guild_settings WHERE timezone IS NOT NULL').fetchall()
+
+    def set_guild_timezone(self, guild_id, timezone):
+        self.conn.execute('''
+            INSERT INTO guild_settings (guild_id, timezone) VALUES (%s, %s)
+            ON CONFLICT (guild_id) DO UPDATE SET timezone = EXCLUDED.timezone
+        ''', (guild_id, timezone))
+
+    def status_boards(self):
+        return self.conn.execute('SELECT guild_id, channel_id, message_id FROM status_boards').fetchall()
+
+    def save_status_board(self, guild_id, channel_id, message_id):
+        self.conn.execute('''
+            INSERT INTO status_boards (guild_id, channel_id, message_id) VALUES (%s, %s, %s)
+            ON CONFLICT (guild_id) DO UPDATE SET channel_id = EXCLUDED.channel_id, message_id = EXCLUDED.message_id
+        ''', (guild_id, channel_id, message_id))
+
+    def delete_status_board(self, guild_id):
+        self.conn.execute('DELETE FROM status_boards WHERE guild_id = %s', (guild_id,))
+
+def create_storage(backend=STORAGE_BACKEND):
+    """설정(STORAGE_BACKEND)에 맞는 저장소 생성 (연결은 처음 사용할 때 맺음)"""
+    if backend == 'sqlite':
+        return Database(DB_FILE, group_commit_ms=DB_GROUP_COMMIT_MS)
+    if backend == 'memory':
+        return MemoryStorage()
+    if backend == 'postgres':
+        if not DATABASE_URL:
+            raise RuntimeError('STORAGE_BACKEND=postgres에는 DATABASE_URL이 필요합니다.')
+        return PostgresStorage(DATABASE_URL, pool_size=DB_POOL_SIZE)
+    raise RuntimeError(f'알 수 없는 STORAGE_BACKEND: {backend} (sqlite, memory, postgres 중 하나)')
+
+# 출근 상태 (저널 재생과 봇의 SessionStore가 함께 씀)
+class WorkSession:
+    """출근 중인 사용자 한 명의 상태 (시각은 초 단위로 저장된 값과 같은 정밀도)
+
+    상태를 바꾸는 메서드는 명령어를 처리할 때와 저널을 재생할 때(fold_journal) 똑같이 쓰이므로
+    재시작 전후의 상태가 같습니다.
+    """
+    __slots__ = ('guild_id', 'user_id', 'username', 'start_time', 'break_time', 'break_reason', 'total_break_seconds')
+
+    def __init__(self, guild_id, user_id, username, start_time, break_time=None, break_reason=None,
+                 total_break_seconds=0):
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.username = username
+        self.start_time = start_time
+        self.break_time = break_time
+        self.break_reason = break_reason
+        self.total_break_seconds = total_break_seconds
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            row['guild_id'],
+            row['user_id'],
+            row['username'],
+            from_epoch(row['start_time']),
+            from_epoch(row['break_time']) if row['break_time'] is not None else None,
+            row['break_reason'],
+            row['total_break_seconds']
+        )
+
+    def snapshot_row(self):
+        """(guild_id, user_id, start_time, break_time, break_reason, total_break_seconds)"""
+        return (self.guild_id, self.user_id, to_epoch(self.start_time),
+                to_epoch(self.break_time) if self.break_time else None, self.break_reason, self.total_break_seconds)
+
+    def begin_break(self, break_time, reason):
+        self.break_time = break_time
+        self.break_reason = reason
+
+    def end_break(self, return_time):
+        """휴식을 끝내고 이번 휴식 시간(초) 반환"""
+        duration = max(0, int((return_time - self.break_time).total_seconds()))
+        self.total_break_seconds += duration
+        self.break_time = self.break_reason = None
+        return duration
+
+    def totals_at(self, end_time):
+        """end_time에 퇴근하면 (순수 근무 시간, 휴식 시간). 휴식 중이면 그 휴식도 end_time에 끝난 것으로 봄"""
+        total_break = self.total_break_seconds
+        if self.break_time:
+            total_break += max(0, int((end_time - self.break_time).total_seconds()))
+        return int((end_time - self.start_time).total_seconds()) - total_break, total_break
+
+def fold_journal(snapshot, events):
+    """스냅샷 행에 그 뒤의 저널 이벤트를 순서대로 적용한 출근 상태 {(길드 ID, 사용자 ID): WorkSession}"""
+    state = {(row['guild_id'], row['user_id']): WorkSession.from_row(row) for row in snapshot}
+    for event in events:
+        key = (event['guild_id'], event['user_id'])
+        at = from_epoch(event['at'])
+        if event['kind'] == EVENT_START:
+            state[key] = WorkSession(*key, event['username'], at)
+            continue
+        session = state.get(key)
+        if session is None:
+            continue
+        if event['kind'] == EVENT_BREAK:
+            session.begin_break(at, event['detail'])
+        elif event['kind'] == EVENT_RETURN:
+            if session.break_time:
+                session.end_break(at)
+        else:
+            del state[key]
+    return state
@@ -0,0 +1,31 @@
+"""테스트 공용 설정
+
+저장소 루트의 bot.py/attendance.py를 그대로 가져다 쓰며, Discord 연결 없이 메모리 저장소(MemoryStorage)로
+실행합니다. 비동기 코드는 테스트마다 asyncio.run()으로 실행합니다.
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot  # noqa: E402
+
+@pytest.fixture
+def memory():
+    """비어 있는 메모리 저장소"""
+    storage = bot.MemoryStorage()
+    storage.start()
+    asyncio.run(storage.migrate())
+    return storage
+
+@pytest.fixture(autouse=True)
+def isolated_guild_state(monkeypatch):
+    """모듈 전역(출석 채널 인덱스, 출근 상태, 길드 시간대)을 테스트마다 비움"""
+    monkeypatch.setattr(bot, 'report_channels', {})
+    monkeypatch.setattr(bot, 'sessions', [])
+    bot.guild_zones.clear()
+    yield
+    bot.guild_zones.clear()
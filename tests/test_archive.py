@@ -0,0 +1,111 @@
+"""월별 기록 보관(archive_history): 지난달까지 보관 파일로 옮기기, 복사 뒤에 들어온 행 보존"""
+import asyncio
+import sqlite3
+from datetime import date, datetime
+
+import attendance
+import bot
+
+def epoch(*args):
+    return bot.to_epoch(datetime(*args))
+
+def make_database(path):
+    """9월과 10월의 근무/휴식 기록, 9월에 스냅샷으로 압축된 저널 이벤트"""
+    async def scenario():
+        storage = bot.Database(path)
+        storage.start()
+        try:
+            await storage.migrate()
+            await storage.run(lambda tx: tx.upsert_users([(1, 10, 'kim')]))
+            await storage.run(lambda tx: tx.insert_history([
+                (1, 10, '2025-09-29', epoch(2025, 9, 29, 9), epoch(2025, 9, 29, 18), 32400, 0),
+                (1, 10, '2025-09-30', epoch(2025, 9, 30, 9), epoch(2025, 9, 30, 18), 32400, 0),
+                (1, 10, '2025-10-01', epoch(2025, 10, 1, 9), epoch(2025, 10, 1, 18), 32400, 0),
+            ]))
+            await storage.run(lambda tx: tx.insert_breaks([
+                (1, 10, '커피', epoch(2025, 9, 30, 15), epoch(2025, 9, 30, 15, 10), 600),
+                (1, 10, '점심', epoch(2025, 10, 1, 12), epoch(2025, 10, 1, 13), 3600),
+            ]))
+            await storage.run(lambda tx: tx.append_events([
+                (1, 10, bot.EVENT_START, epoch(2025, 9, 30, 9), None),
+                (1, 10, bot.EVENT_FINISH, epoch(2025, 9, 30, 18), '2025-09-30'),
+                (1, 10, bot.EVENT_START, epoch(2025, 10, 1, 9), None),
+            ]))
+            await storage.run(lambda tx: tx.compact_journal())
+        finally:
+            await storage.close()
+
+    asyncio.run(scenario())
+
+def rows(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+def test_moves_months_before_cutoff(tmp_path):
+    path, archive_dir = str(tmp_path / 'work_records.db'), str(tmp_path / 'archive')
+    make_database(path)
+
+    moved = attendance.archive_history(path, archive_dir, date(2025, 10, 1))
+    assert moved == [('2025-09', 2, 1)]
+
+    assert rows(path, 'SELECT date FROM work_history') == [('2025-10-01',)]
+    assert rows(path, 'SELECT reason FROM break_history') == [('점심',)]
+    # 10월 이벤트는 남고, 9월 이벤트는 보관 파일로 옮겨짐
+    assert rows(path, 'SELECT id FROM attendance_events') == [(3,)]
+    assert rows(path, "SELECT value FROM bot_meta WHERE key = 'archive_before'") == [('2025-10-01',)]
+
+    archive = attendance.archive_path(archive_dir, '2025-09')
+    assert rows(archive, 'SELECT date FROM work_history ORDER BY date') == [('2025-09-29',), ('2025-09-30',)]
+    assert rows(archive, 'SELECT id FROM attendance_events ORDER BY id') == [(1,), (2,)]
+    assert rows(archive, 'SELECT username FROM users') == [('kim',)]
+
+    # 다시 실행해도 옮길 것이 없음
+    assert attendance.archive_history(path, archive_dir, date(2025, 10, 1)) == []
+
+def test_rows_written_after_copy_are_kept(tmp_path, monkeypatch):
+    """보관 파일 복사를 커밋한 직후 같은 달 기록이 들어와도 지워지지 않고 다음 보관 때 옮겨짐"""
+    path, archive_dir = str(tmp_path / 'work_records.db'), str(tmp_path / 'archive')
+    make_database(path)
+    connect = sqlite3.connect
+
+    class LateWriter:
+        """첫 COMMIT 뒤에 다른 연결에서 9월 기록을 하나씩 추가하는 연결"""
+
+        def __init__(self, *args, **kwargs):
+            self.conn = connect(*args, **kwargs)
+            self.written = False
+
+        def execute(self, sql, *args):
+            result = self.conn.execute(sql, *args)
+            if sql == 'COMMIT' and not self.written:
+                self.written = True
+                other = connect(path)
+                other.execute('''
+                    INSERT INTO work_history (guild_id, user_id, date, start_time, end_time, work_seconds, break_seconds)
+                    VALUES (1, 10, '2025-09-28', ?, ?, 3600, 0)
+                ''', (epoch(2025, 9, 28, 9), epoch(2025, 9, 28, 10)))
+                other.execute('''
+                    INSERT INTO break_history (guild_id, user_id, reason, start_time, end_time, duration_seconds)
+                    VALUES (1, 10, '산책', ?, ?, 600)
+                ''', (epoch(2025, 9, 28, 9, 30), epoch(2025, 9, 28, 9, 40)))
+                other.commit()
+                other.close()
+            return result
+
+        def __getattr__(self, name):
+            return getattr(self.conn, name)
+
+    monkeypatch.setattr(attendance.sqlite3, 'connect', LateWriter)
+    assert attendance.archive_history(path, archive_dir, date(2025, 10, 1)) == [('2025-09', 2, 1)]
+    monkeypatch.undo()
+
+    assert rows(path, 'SELECT date FROM work_history ORDER BY date') == [('2025-09-28',), ('2025-10-01',)]
+    assert rows(path, 'SELECT reason FROM break_history ORDER BY start_time') == [('산책',), ('점심',)]
+
+    assert attendance.archive_history(path, archive_dir, date(2025, 10, 1)) == [('2025-09', 1, 1)]
+    assert rows(path, 'SELECT date FROM work_history') == [('2025-10-01',)]
+    archive = attendance.archive_path(archive_dir, '2025-09')
+    assert len(rows(archive, 'SELECT id FROM work_history')) == 3
@@ -0,0 +1,69 @@
+"""자정 자동 퇴근(AutoCheckoutJob): 커밋 전까지 세션 유지, 명령어 대기, 실패 시 출근 상태 유지"""
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+import bot
+
+RUNS = [(1, '2025-10-14')]
+NOW = datetime(2025, 10, 14, 0, 0, 5)
+
+@pytest.fixture
+def jobs(memory, monkeypatch):
+    """cogs.jobs를 메모리 저장소의 SessionStore/RankingStore로 실행"""
+    for name in ('bot', 'db', 'sessions', 'rankings', 'outbox', 'status_boards', 'scheduler'):
+        monkeypatch.setattr(bot, name, getattr(bot, name))
+    bot.create_bot(memory)
+    from cogs import jobs
+    monkeypatch.setattr(jobs, 'sessions', bot.SessionStore(memory))
+    monkeypatch.setattr(jobs, 'rankings', bot.RankingStore(memory))
+    return jobs
+
+def test_sessions_stay_until_commit(jobs, memory):
+    store = jobs.sessions
+
+    async def scenario():
+        kim = await store.start(1, 10, 'kim', datetime(2025, 10, 13, 9, 0))
+        job = jobs.AutoCheckoutJob()
+        closed = await job.prepare(RUNS, NOW)
+        assert [session for session, *_ in closed] == [kim]
+
+        # 커밋 전: 조회에는 출근 중으로 보이고, 상태를 바꾸는 명령어는 기다림
+        assert store.get(1, 10) is kim and store.in_guild(1) == [kim]
+        waiter = asyncio.create_task(store.settled(1, 10))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        # 같은 세션을 다음 회차가 다시 표시하지 않음
+        assert await job.prepare(RUNS, NOW) == []
+
+        await memory.run(job.execute, RUNS, closed)
+        assert store.get(1, 10) is kim
+        await job.complete(RUNS, closed, None)
+        return await waiter
+
+    assert asyncio.run(scenario()) is None
+    assert jobs.sessions.get(1, 10) is None
+
+    rows, _ = asyncio.run(memory.run(lambda tx: tx.history_page(
+        '근무', 1, 10, date(2025, 10, 1), date(2025, 10, 31), 10)))
+    assert [(row[1], row[3]) for row in rows] == [('2025-10-13', bot.to_epoch(datetime(2025, 10, 13, 23, 59, 59)))]
+    assert jobs.rankings.current(1, 'week', date(2025, 10, 13)).rank(10) == (1, 53999)
+
+def test_failed_commit_keeps_session(jobs):
+    store = jobs.sessions
+
+    async def scenario():
+        kim = await store.start(1, 10, 'kim', datetime(2025, 10, 13, 9, 0))
+        job = jobs.AutoCheckoutJob()
+        closed = await job.prepare(RUNS, NOW)
+        waiter = asyncio.create_task(store.settled(1, 10))
+        await asyncio.sleep(0)
+
+        job.rollback(RUNS, closed)
+        assert await waiter is kim
+        # 다음 회차에 다시 처리됨
+        return kim, await job.prepare(RUNS, NOW)
+
+    kim, again = asyncio.run(scenario())
+    assert [session for session, *_ in again] == [kim]
@@ -0,0 +1,77 @@
+"""휴식 통계(aggregate_breaks, read_break_stats): 키별 횟수/합계/중앙값/시간대 분포, 사유 정규화, 길드 시간대"""
+import asyncio
+import random
+import statistics
+from collections import Counter
+from datetime import date, datetime, timezone
+
+import pytest
+
+import attendance
+import bot
+
+np = pytest.importorskip('numpy')
+
+def test_matches_plain_python():
+    rng = random.Random(7)
+    rows = [(rng.choice([3, 1, 8]), rng.randrange(60, 3600), rng.randrange(24)) for _ in range(500)]
+    keys, durations, hours = (np.array(column, dtype=np.int64) for column in zip(*rows))
+    groups, counts, totals, medians, hourly = attendance.aggregate_breaks(keys, durations, hours)
+
+    assert groups.tolist() == [1, 3, 8]
+    for i, key in enumerate(groups.tolist()):
+        mine = [(duration, hour) for k, duration, hour in rows if k == key]
+        assert counts[i] == len(mine)
+        assert totals[i] == sum(duration for duration, _ in mine)
+        assert medians[i] == statistics.median(duration for duration, _ in mine)
+        by_hour = Counter(hour for _, hour in mine)
+        assert hourly[i].tolist() == [by_hour[hour] for hour in range(24)]
+
+def test_even_count_median_and_empty_input():
+    groups, counts, totals, medians, hourly = attendance.aggregate_breaks(
+        np.array([5, 5, 5, 5]), np.array([100, 400, 200, 300]), np.array([9, 9, 10, 23]))
+    assert (counts.tolist(), totals.tolist(), medians.tolist()) == ([4], [1000], [250.0])
+    assert hourly.shape == (1, 24) and hourly[0, 9] == 2
+
+    empty = np.empty(0, dtype=np.int64)
+    groups, counts, totals, medians, hourly = attendance.aggregate_breaks(empty, empty, empty)
+    assert len(groups) == 0 and hourly.shape == (0, 24)
+
+def server_epoch(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+@pytest.fixture
+def database(tmp_path):
+    """서울 시간대 길드 1의 10월 휴식 (UTC 9월 30일 15:30 = 서울 10월 1일 00:30)"""
+    path = str(tmp_path / 'work_records.db')
+
+    async def scenario():
+        storage = bot.Database(path)
+        storage.start()
+        try:
+            await storage.migrate()
+            await storage.run(lambda tx: tx.set_guild_timezone(1, 'Asia/Seoul'))
+            await storage.run(lambda tx: tx.upsert_users([(1, 10, 'kim'), (1, 11, 'lee')]))
+            await storage.run(lambda tx: tx.insert_breaks([
+                (1, 10, '점심', server_epoch(2025, 10, 1, 3), server_epoch(2025, 10, 1, 4), 3600),
+                (1, 10, 'Coffee!', server_epoch(2025, 9, 30, 15, 30), server_epoch(2025, 9, 30, 15, 40), 600),
+                (1, 11, '커피', server_epoch(2025, 10, 2, 1), server_epoch(2025, 10, 2, 1, 20), 1200),
+                (1, 11, '밥', server_epoch(2025, 9, 30, 14), server_epoch(2025, 9, 30, 15), 3600),
+            ]))
+        finally:
+            await storage.close()
+
+    asyncio.run(scenario())
+    return path
+
+def test_read_stats_by_user_and_reason(database, tmp_path):
+    args = (database, date(2025, 10, 1), date(2025, 10, 31), 1)
+    stats, hourly = attendance.read_break_stats(*args, archive_dir=str(tmp_path / 'archive'))
+    # 서울 9월 30일 23시의 휴식은 기간 밖
+    assert [(row['name'], row['count'], row['total_seconds']) for row in stats] == [('kim', 2, 4200),
+                                                                                    ('lee', 1, 1200)]
+    assert stats[0]['median_seconds'] == 2100 and stats[0]['hourly'][0] == 1 and stats[0]['hourly'][12] == 1
+    assert sum(hourly) == 3 and hourly[10] == 1
+
+    stats, _ = attendance.read_break_stats(*args, by='reason', archive_dir=str(tmp_path / 'archive'))
+    assert [(row['key'], row['count']) for row in stats] == [('식사', 1), ('커피', 2)]
@@ -0,0 +1,103 @@
+"""발신 메시지 전송 큐(MessageDispatcher): 429/5xx 재시도와 지수 백오프, 재시도하지 않는 오류, 종료 시 처리"""
+import asyncio
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+import bot
+
+def http_error(status):
+    return discord.HTTPException(SimpleNamespace(status=status, reason='error'), 'error')
+
+class FakeChannel:
+    """errors에 든 예외를 차례로 던진 뒤에는 보낸 내용을 기록하는 채널"""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    async def send(self, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(kwargs)
+        return kwargs
+
+class FakeClient:
+    def __init__(self, channels):
+        self.channels = channels
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(bot.random, 'uniform', lambda low, high: 0)
+
+def dispatcher_for(channel, **options):
+    """재시도 지연을 기록하고 실제로는 기다리지 않는 전송 큐"""
+    dispatcher = bot.MessageDispatcher(FakeClient({1: channel}), workers=1, global_rate=1000,
+                                       channel_rate=1000, channel_burst=1000, **options)
+    dispatcher.delays = []
+    requeue = dispatcher._requeue
+
+    async def record(message, delay):
+        dispatcher.delays.append(delay)
+        await requeue(message, 0)
+
+    dispatcher._requeue = record
+    return dispatcher
+
+def send(dispatcher, **kwargs):
+    async def scenario():
+        message = await dispatcher.enqueue(1, **kwargs)
+        delivered = await message.wait()
+        await dispatcher.stop()
+        return message, delivered
+
+    return asyncio.run(scenario())
+
+def test_retries_with_exponential_backoff():
+    channel = FakeChannel([http_error(503), http_error(502), http_error(500)])
+    dispatcher = dispatcher_for(channel, base_backoff=1.0)
+    message, delivered = send(dispatcher, content='hi')
+
+    assert delivered and message.status == 'sent' and message.attempts == 4
+    assert dispatcher.delays == [1.0, 2.0, 4.0]
+    assert channel.sent == [{'content': 'hi'}]
+    assert dispatcher.stats() == {'queued': 1, 'sent': 1, 'retried': 3, 'failed': 0, 'pending': 0}
+
+def test_rate_limit_uses_retry_after():
+    channel = FakeChannel([discord.RateLimited(7.5)])
+    dispatcher = dispatcher_for(channel)
+    message, delivered = send(dispatcher, content='hi')
+    assert delivered and dispatcher.delays == [7.5]
+
+def test_gives_up_after_max_attempts():
+    channel = FakeChannel([http_error(503)] * 5)
+    dispatcher = dispatcher_for(channel, max_attempts=3, base_backoff=1.0)
+    message, delivered = send(dispatcher, content='hi')
+
+    assert not delivered and message.status == 'failed' and message.attempts == 3
+    assert message.error.status == 503 and dispatcher.delays == [1.0, 2.0]
+    assert channel.sent == [] and dispatcher.counters['failed'] == 1
+
+def test_client_errors_are_not_retried():
+    dispatcher = dispatcher_for(FakeChannel([http_error(403)]))
+    message, delivered = send(dispatcher, content='hi')
+    assert not delivered and message.attempts == 1 and dispatcher.delays == []
+
+def test_stop_fails_pending_retries():
+    """종료 시간 안에 다시 보내지 못한 메시지는 실패로 끝나 기다리던 쪽이 풀림"""
+    dispatcher = bot.MessageDispatcher(FakeClient({1: FakeChannel([http_error(503)])}), workers=1,
+                                       base_backoff=60.0)
+
+    async def scenario():
+        message = await dispatcher.enqueue(1, content='hi')
+        while message.status != 'retrying':
+            await asyncio.sleep(0)
+        await dispatcher.stop(timeout=0.01)
+        return message, await message.wait()
+
+    message, delivered = asyncio.run(scenario())
+    assert not delivered and message.status == 'failed' and not dispatcher.is_running()
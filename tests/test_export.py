@@ -0,0 +1,74 @@
+"""기록 내보내기(export_history): 길드 시간대 기준 기간, 보관 파일과 현재 데이터베이스 이어 읽기"""
+import asyncio
+import csv
+import gzip
+from datetime import date, datetime, timezone
+
+import attendance
+import bot
+
+def server_epoch(*args):
+    """UTC 시각의 epoch 초"""
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+def make_database(path):
+    """서울 시간대 길드 1과 시간대를 정하지 않은 길드 2의 9월 말~10월 초 기록"""
+    async def scenario():
+        storage = bot.Database(path)
+        storage.start()
+        try:
+            await storage.migrate()
+            await storage.run(lambda tx: tx.set_guild_timezone(1, 'Asia/Seoul'))
+            await storage.run(lambda tx: tx.upsert_users([(1, 10, 'kim'), (2, 20, 'park')]))
+            await storage.run(lambda tx: tx.insert_history([
+                (1, 10, '2025-09-30', 0, 3600, 3600, 0),
+                (1, 10, '2025-10-01', 0, 3600, 3600, 0),
+                (2, 20, '2025-10-01', 0, 3600, 3600, 0),
+            ]))
+            # 서울 9월 30일 23:30, 서울 10월 1일 00:30 (UTC로는 둘 다 9월 30일), 서울 11월 1일 00:30
+            await storage.run(lambda tx: tx.insert_breaks([
+                (1, 10, '커피', server_epoch(2025, 9, 30, 14, 30), server_epoch(2025, 9, 30, 14, 40), 600),
+                (1, 10, '산책', server_epoch(2025, 9, 30, 15, 30), server_epoch(2025, 9, 30, 15, 40), 600),
+                (1, 10, '점심', server_epoch(2025, 10, 31, 15, 30), server_epoch(2025, 10, 31, 15, 40), 600),
+            ]))
+        finally:
+            await storage.close()
+
+    asyncio.run(scenario())
+
+def read_csv(dest):
+    with gzip.open(dest, 'rt', encoding='utf-8', newline='') as f:
+        return list(csv.reader(f))
+
+def export(tmp_path, guild_id):
+    path = str(tmp_path / 'work_records.db')
+    results = attendance.export_history(path, str(tmp_path), date(2025, 10, 1), date(2025, 10, 31), guild_id,
+                                        archive_dir=str(tmp_path / 'archive'))
+    return {dest.rsplit('/', 1)[-1].split('_2025')[0]: (read_csv(dest), count) for dest, count in results}
+
+def test_guild_export_uses_guild_days(tmp_path):
+    make_database(str(tmp_path / 'work_records.db'))
+    files = export(tmp_path, 1)
+
+    (header, *work), count = files['work_history']
+    assert header[:5] == ['id', 'guild_id', 'user_id', 'username', 'date'] and count == 1
+    assert [(row[3], row[4]) for row in work] == [('kim', '2025-10-01')]
+    (header, *breaks), count = files['break_history']
+    assert header[4] == 'reason'
+    assert [row[4] for row in breaks] == ['산책'] and count == 1
+
+def test_archived_rows_are_included(tmp_path):
+    """서버 날짜로 9월이라 9월 보관 파일로 옮겨진 휴식도 서울 10월 기간에 포함"""
+    path = str(tmp_path / 'work_records.db')
+    make_database(path)
+    attendance.archive_history(path, str(tmp_path / 'archive'), date(2025, 11, 1))
+
+    files = export(tmp_path, 1)
+    assert [row[4] for row in files['work_history'][0][1:]] == ['2025-10-01']
+    assert [row[4] for row in files['break_history'][0][1:]] == ['산책']
+
+def test_all_guild_export(tmp_path):
+    make_database(str(tmp_path / 'work_records.db'))
+    files = export(tmp_path, None)
+    assert sorted((row[1], row[4]) for row in files['work_history'][0][1:]) == [('1', '2025-10-01'),
+                                                                                   ('2', '2025-10-01')]
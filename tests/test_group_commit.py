@@ -0,0 +1,56 @@
+"""SQLite 그룹 커밋(Database group_commit_ms): 한 커밋으로 묶기, 실패한 작업만 SAVEPOINT로 되돌리기"""
+import asyncio
+import sqlite3
+
+import pytest
+
+import bot
+
+def add_user(tx, user_id, fail=False):
+    tx.upsert_users([(1, user_id, f'user{user_id}')])
+    if fail:
+        raise ValueError(user_id)
+    return user_id
+
+def usernames(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute('SELECT username FROM users ORDER BY user_id')]
+    finally:
+        conn.close()
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'work_records.db')
+
+def run_jobs(path, jobs, group_commit_ms):
+    """jobs를 동시에 실행하고 (작업별 결과 또는 예외, 저장소 통계) 반환"""
+    async def scenario():
+        storage = bot.Database(path, group_commit_ms=group_commit_ms)
+        storage.start()
+        try:
+            await storage.migrate()
+            storage.stats['batches'] = storage.stats['jobs'] = storage.stats['failed_jobs'] = 0
+            results = await asyncio.gather(*(storage.run(add_user, *job) for job in jobs), return_exceptions=True)
+            return results, dict(storage.stats)
+        finally:
+            await storage.close()
+
+    return asyncio.run(scenario())
+
+def test_failed_job_does_not_roll_back_batch(path):
+    results, stats = run_jobs(path, [(10,), (11, True), (12,)], group_commit_ms=200)
+
+    assert results[0] == 10 and results[2] == 12
+    assert isinstance(results[1], ValueError)
+    assert (stats['batches'], stats['jobs'], stats['failed_jobs']) == (1, 3, 1)
+    assert usernames(path) == ['user10', 'user12']
+
+def test_single_job_failure_rolls_back(path):
+    results, stats = run_jobs(path, [(10, True)], group_commit_ms=0)
+    assert isinstance(results[0], ValueError) and stats['failed_jobs'] == 1
+    assert usernames(path) == []
+
+def test_without_window_each_job_commits_alone(path):
+    results, stats = run_jobs(path, [(10,), (11, True), (12,)], group_commit_ms=0)
+    assert stats['batches'] == 3 and usernames(path) == ['user10', 'user12']
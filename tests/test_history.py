@@ -0,0 +1,87 @@
+"""개인 기록 페이지 (fetch_history_page와 같은 규칙): 기간 경계, 페이지 경계, 앞뒤 이동"""
+import asyncio
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import bot
+
+PAGE = 3
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def storage(request, tmp_path):
+    """같은 테스트를 메모리 저장소와 SQLite 저장소(fetch_history_page)에서 실행"""
+    if request.param == 'memory':
+        storage = bot.MemoryStorage()
+    else:
+        storage = bot.Database(str(tmp_path / 'work_records.db'))
+    storage.start()
+    asyncio.run(storage.migrate())
+    yield storage
+    asyncio.run(storage.close())
+
+def run(storage, func):
+    return asyncio.run(storage.run(func))
+
+def page(storage, kind, start, end, after=None, before=None, guild_id=1, user_id=10):
+    rows, has_more = run(storage, lambda tx: tx.history_page(kind, guild_id, user_id, start, end, PAGE, after, before))
+    return [tuple(row) for row in rows], has_more
+
+def key(row):
+    """다음/이전 페이지를 가리키는 (정렬 키, id)"""
+    return row[1], row[0]
+
+def seed_work(storage):
+    """사용자 10의 10월 1~7일 근무 (10월 3일은 두 번), 다른 사용자/길드의 같은 날 기록"""
+    rows = []
+    for day in range(1, 8):
+        for start_hour in ((9, 14) if day == 3 else (9,)):
+            start = bot.to_epoch(datetime(2025, 10, day, start_hour))
+            rows.append((1, 10, f'2025-10-{day:02d}', start, start + 3600, 3600, 0))
+    rows += [(1, 11, '2025-10-04', 0, 3600, 3600, 0), (2, 10, '2025-10-04', 0, 3600, 3600, 0)]
+    run(storage, lambda tx: tx.insert_history(rows))
+
+def test_date_range_is_inclusive(storage):
+    seed_work(storage)
+    rows, has_more = page(storage, '근무', date(2025, 10, 7), date(2025, 10, 7))
+    assert [row[1] for row in rows] == ['2025-10-07'] and not has_more
+    rows, has_more = page(storage, '근무', date(2025, 10, 8), date(2025, 10, 31))
+    assert rows == [] and not has_more
+
+def test_pages_walk_forward_and_back(storage):
+    seed_work(storage)
+    start, end = date(2025, 10, 2), date(2025, 10, 6)
+
+    first, has_more = page(storage, '근무', start, end)
+    assert [row[1] for row in first] == ['2025-10-06', '2025-10-05', '2025-10-04'] and has_more
+    second, has_more = page(storage, '근무', start, end, after=key(first[-1]))
+    # 같은 날의 두 기록은 id로 나뉘어 빠지거나 겹치지 않음
+    assert [row[1] for row in second] == ['2025-10-03', '2025-10-03', '2025-10-02'] and not has_more
+    assert second[0][0] > second[1][0]
+
+    back, has_more = page(storage, '근무', start, end, before=key(second[0]))
+    assert back == first and not has_more
+    # 앞쪽 페이지가 PAGE개보다 많으면 바로 앞 PAGE개와 더 있는지 여부
+    back, has_more = page(storage, '근무', start, end, before=key(second[-1]))
+    assert [row[1] for row in back] == ['2025-10-04', '2025-10-03', '2025-10-03'] and has_more
+
+def test_exactly_full_page_has_no_more(storage):
+    seed_work(storage)
+    rows, has_more = page(storage, '근무', date(2025, 10, 5), date(2025, 10, 7))
+    assert len(rows) == PAGE and not has_more
+    rows, has_more = page(storage, '근무', date(2025, 10, 5), date(2025, 10, 7), after=key(rows[-1]))
+    assert rows == [] and not has_more
+
+def test_break_days_follow_guild_time_zone(storage):
+    bot.guild_zones[1] = ZoneInfo('Asia/Seoul')
+    # 서울 13일 00:30과 12일 23:30 (UTC로는 둘 다 12일)
+    late = bot.to_epoch(datetime(2025, 10, 12, 15, 30, tzinfo=timezone.utc).astimezone().replace(tzinfo=None))
+    early = late - 3600
+    run(storage, lambda tx: tx.insert_breaks([(1, 10, '커피', early, early + 600, 600),
+                                              (1, 10, '산책', late, late + 600, 600)]))
+
+    rows, _ = page(storage, '휴식', date(2025, 10, 13), date(2025, 10, 13))
+    assert [row[3] for row in rows] == ['산책']
+    rows, _ = page(storage, '휴식', date(2025, 10, 12), date(2025, 10, 12))
+    assert [row[3] for row in rows] == ['커피']
@@ -0,0 +1,86 @@
+"""출퇴근 이벤트 저널: 재시작(스냅샷 + 이벤트 재생) 전후의 출근 상태가 같은지"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import bot
+
+def at(hour, minute=0):
+    return datetime(2025, 10, 13, hour, minute)
+
+async def record_day(store):
+    """여러 사용자가 출근/휴식/복귀/퇴근을 섞어 한 스토리지에 기록"""
+    kim = await store.start(1, 10, 'kim', at(9))
+    lee = await store.start(1, 11, 'lee', at(9, 5))
+    park = await store.start(2, 10, 'park', at(9, 10))
+    await store.begin_break(kim, 'kim', '점심', at(12))
+    await store.begin_break(lee, 'lee', '커피', at(12, 30))
+    await store.end_break(kim, at(13))
+    await store.finish(park, 'park', at(15))
+    await store.begin_break(kim, 'kim', '회의', at(16))
+    # 퇴근한 뒤 다시 출근하면 새 세션
+    await store.start(2, 10, 'park', at(17))
+
+def state(store):
+    return sorted((session.username, *session.snapshot_row()) for session in store)
+
+def test_reload_restores_same_state(memory):
+    async def scenario():
+        live = bot.SessionStore(memory)
+        await record_day(live)
+        restarted = bot.SessionStore(memory)
+        replayed = await restarted.load()
+        return live, restarted, replayed
+
+    live, restarted, replayed = asyncio.run(scenario())
+    assert replayed == 9
+    assert state(restarted) == state(live)
+    assert state(live) == [
+        ('kim', 1, 10, bot.to_epoch(at(9)), bot.to_epoch(at(16)), '회의', 3600),
+        ('lee', 1, 11, bot.to_epoch(at(9, 5)), bot.to_epoch(at(12, 30)), '커피', 0),
+        ('park', 2, 10, bot.to_epoch(at(17)), None, None, 0),
+    ]
+
+@pytest.mark.parametrize('trim', [False, True])
+def test_compaction_at_any_point_keeps_state(trim):
+    """저널을 어느 이벤트에서 스냅샷으로 합쳐도 재시작 후 상태가 같음"""
+    async def events_of_day():
+        storage = bot.MemoryStorage()
+        await record_day(bot.SessionStore(storage))
+        return storage.attendance_events
+
+    events = asyncio.run(events_of_day())
+
+    async def replay(split):
+        storage = bot.MemoryStorage()
+        storage.users.update({(1, 10): 'kim', (1, 11): 'lee', (2, 10): 'park'})
+        await storage.run(lambda tx: tx.append_events([event[1:] for event in events[:split]]))
+        folded = await storage.run(lambda tx: tx.compact_journal(trim=trim))
+        await storage.run(lambda tx: tx.append_events([event[1:] for event in events[split:]]))
+        store = bot.SessionStore(storage)
+        replayed = await store.load()
+        return folded, replayed, state(store), len(storage.attendance_events)
+
+    results = [asyncio.run(replay(split)) for split in range(len(events) + 1)]
+    expected = results[0][2]
+    for split, (folded, replayed, restored, kept) in enumerate(results):
+        assert (folded, replayed) == (split, len(events) - split)
+        assert restored == expected
+        # 스냅샷에 반영된 마지막 이벤트 한 건은 지우지 않고 남김
+        assert kept == (len(events) - max(split - 1, 0) if trim else len(events))
+
+def test_failed_compaction_rolls_back(memory):
+    async def scenario():
+        await record_day(bot.SessionStore(memory))
+
+        def compact_then_fail(tx):
+            tx.compact_journal(trim=True)
+            raise RuntimeError('boom')
+
+        with pytest.raises(RuntimeError):
+            await memory.run(compact_then_fail)
+        store = bot.SessionStore(memory)
+        return await store.load(), len(memory.attendance_events)
+
+    assert asyncio.run(scenario()) == (9, 9)
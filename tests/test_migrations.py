@@ -0,0 +1,117 @@
+"""v2.0.0 구조의 데이터베이스 파일에 마이그레이션을 적용했을 때 기록이 그대로 옮겨지는지"""
+import asyncio
+import sqlite3
+from datetime import datetime
+
+import bot
+
+# v2.0.0의 init_db()가 만들던 구조 (사용자 ID는 문자열, 시각은 ISO 문자열, 길드 구분 없음)
+BASELINE_SCHEMA = '''
+    CREATE TABLE current_work_status (
+        user_id TEXT PRIMARY KEY,
+        username TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        break_time TEXT,
+        total_break_seconds INTEGER DEFAULT 0
+    );
+    CREATE TABLE work_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        username TEXT NOT NULL,
+        date TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        work_seconds INTEGER NOT NULL,
+        break_seconds INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE break_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        username TEXT NOT NULL,
+        reason TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT,
+        duration_seconds INTEGER,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_work_history_user_date ON work_history(user_id, date);
+    CREATE INDEX idx_work_history_date ON work_history(date);
+    CREATE INDEX idx_break_history_user ON break_history(user_id, start_time);
+'''
+
+def make_baseline(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("INSERT INTO current_work_status VALUES ('42', '새이름', '2025-10-16T09:00:00', "
+                 "'2025-10-16T12:00:00', 600)")
+    conn.executemany('''
+        INSERT INTO work_history (user_id, username, date, start_time, end_time, work_seconds, break_seconds)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        ('42', '옛이름', '2025-10-13', '2025-10-13T09:00:00', '2025-10-13T18:00:00', 30600, 1800),
+        ('42', '옛이름', '2025-10-14', '2025-10-14T09:30:00', '2025-10-14T17:30:00', 28800, 0),
+        ('7', '다른사람', '2025-10-14', '2025-10-14T10:00:00', '2025-10-14T12:00:00', 7200, 0),
+    ])
+    # v2.0.0은 휴식을 시작할 때 끝 시각이 빈 행을 넣었음
+    conn.executemany('''
+        INSERT INTO break_history (user_id, username, reason, start_time, end_time, duration_seconds)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [
+        ('42', '옛이름', '점심', '2025-10-13T12:00:00', '2025-10-13T12:30:00', 1800),
+        ('42', '새이름', '회의', '2025-10-16T12:00:00', None, None),
+    ])
+    conn.commit()
+    conn.close()
+
+def epoch(text):
+    return bot.to_epoch(datetime.fromisoformat(text))
+
+def test_baseline_database_migrates_to_latest(tmp_path):
+    path = str(tmp_path / 'work_records.db')
+    make_baseline(path)
+
+    async def scenario():
+        storage = bot.Database(path)
+        storage.start()
+        try:
+            applied = await storage.migrate()
+            again = await storage.migrate()
+            snapshot, events = await storage.run(lambda tx: tx.load_journal())
+            work = await storage.run(lambda tx: tx.history_page(
+                '근무', 0, 42, datetime(2025, 10, 1).date(), datetime(2025, 10, 31).date(), 10))
+            legacy = await storage.run(lambda tx: tx.count_legacy_rows())
+            adopted = await storage.run(lambda tx: tx.adopt_legacy_rows(123, ['auto_checkout']))
+            rows = await storage.run(lambda tx: [tuple(row) for row in tx.conn.execute(
+                'SELECT guild_id, user_id, date, work_seconds, session_count FROM daily_work_summary '
+                'ORDER BY date, user_id')])
+            names = await storage.run(lambda tx: dict(tx.conn.execute(
+                'SELECT user_id, username FROM users WHERE guild_id = 123').fetchall()))
+            return applied, again, snapshot, events, work, legacy, adopted, rows, names
+        finally:
+            await storage.close()
+
+    applied, again, snapshot, events, work, legacy, adopted, rows, names = asyncio.run(scenario())
+
+    assert [version for version, _ in applied] == [version for version, _, _ in bot.MIGRATIONS]
+    assert again == []
+
+    # 출근 상태는 정수 ID와 epoch 초로 바뀌고 진행 중인 휴식의 사유는 스냅샷으로 옮겨짐.
+    # 저널 도입 이전이라 재생할 이벤트는 없음
+    assert events == []
+    (session,) = bot.fold_journal(snapshot, events).values()
+    assert session.snapshot_row() == (0, 42, epoch('2025-10-16T09:00:00'), epoch('2025-10-16T12:00:00'), '회의', 600)
+
+    # 근무 기록은 id와 값이 그대로 유지되고 최신순으로 조회됨
+    (newest, oldest), has_more = work
+    assert not has_more
+    assert tuple(newest) == (2, '2025-10-14', epoch('2025-10-14T09:30:00'), epoch('2025-10-14T17:30:00'), 28800, 0)
+    assert tuple(oldest) == (1, '2025-10-13', epoch('2025-10-13T09:00:00'), epoch('2025-10-13T18:00:00'), 30600, 1800)
+
+    # 길드 구분 이전 행은 길드 0에 있다가 배정하면 모두 옮겨짐
+    assert legacy == 5
+    assert adopted >= legacy
+    assert rows == [(123, 42, '2025-10-13', 30600, 1), (123, 7, '2025-10-14', 7200, 1),
+                    (123, 42, '2025-10-14', 28800, 1)]
+    # 표시 이름은 가장 나중에 기록된 값 (현재 출근 상태의 이름)
+    assert names == {42: '새이름', 7: '다른사람'}
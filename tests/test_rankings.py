@@ -0,0 +1,59 @@
+"""RankingStore: 길드 시간대 기준 주/월 순위표 적재, 퇴근 기록 반영, 기간 전환"""
+import asyncio
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+
+import bot
+
+# UTC 10월 31일 16:30 = 서울 11월 1일(토) 01:30, 호놀룰루 10월 31일(금) 06:30
+NOW = datetime(2025, 10, 31, 16, 30, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+def seed(storage):
+    rows = [
+        (1, 10, '2025-10-30', 0, 0, 7200, 0),
+        (1, 10, '2025-11-01', 0, 0, 3600, 0),
+        (1, 11, '2025-10-31', 0, 0, 3600, 0),
+        (2, 20, '2025-10-31', 0, 0, 3600, 0),
+    ]
+    asyncio.run(storage.run(lambda tx: tx.insert_history(rows)))
+    asyncio.run(storage.run(lambda tx: tx.upsert_users([(1, 10, 'kim'), (1, 11, 'lee'), (2, 20, 'park')])))
+
+def test_boards_follow_each_guild_date(memory):
+    bot.guild_zones.update({1: ZoneInfo('Asia/Seoul'), 2: ZoneInfo('Pacific/Honolulu')})
+    seed(memory)
+    rankings = bot.RankingStore(memory)
+    asyncio.run(rankings.load(NOW))
+
+    # 서울은 이미 11월, 호놀룰루는 아직 10월 (같은 주)
+    seoul, honolulu = date(2025, 11, 1), date(2025, 10, 31)
+    assert rankings.current(1, 'month', seoul).top(10) == [('kim', 3600)]
+    assert rankings.current(1, 'week', seoul).top(10) == [('kim', 10800), ('lee', 3600)]
+    assert rankings.current(2, 'month', honolulu).top(10) == [('park', 3600)]
+    assert rankings.current(2, 'month', seoul).top(10) == []
+
+def test_reload_one_guild_after_time_zone_change(memory):
+    bot.guild_zones.update({1: ZoneInfo('Asia/Seoul'), 2: ZoneInfo('Pacific/Honolulu')})
+    seed(memory)
+    rankings = bot.RankingStore(memory)
+    asyncio.run(rankings.load(NOW))
+    # 메모리에만 반영된 기록은 다른 길드를 다시 만들어도 남아 있어야 함
+    rankings.record(1, 11, 'lee', '2025-11-01', 600)
+
+    bot.guild_zones[2] = ZoneInfo('Asia/Seoul')
+    asyncio.run(rankings.load(NOW, 2))
+    assert rankings.current(2, 'month', date(2025, 11, 1)).top(10) == []
+    assert rankings.current(1, 'month', date(2025, 11, 1)).top(10) == [('kim', 3600), ('lee', 600)]
+
+def test_record_switches_to_newer_period_only(memory):
+    rankings = bot.RankingStore(memory)
+    rankings.record(1, 10, 'kim', '2025-10-31', 3600)
+    rankings.record(1, 11, 'lee', '2025-10-31', 3600)
+    assert rankings.current(1, 'month', date(2025, 10, 31)).rank(11) == (1, 3600)
+
+    # 다음 달 기록이 들어오면 순위표를 비우고, 그 뒤 들어온 지난달 기록은 무시
+    rankings.record(1, 10, 'kim', '2025-11-01', 600)
+    rankings.record(1, 11, 'lee', '2025-10-31', 600)
+    board = rankings.current(1, 'month', date(2025, 11, 1))
+    assert board.top(10) == [('kim', 600)] and board.rank(11) is None
+    # 조회 시점이 더 최신 기간이면 빈 순위표
+    assert len(rankings.current(1, 'month', date(2025, 12, 1))) == 0
@@ -0,0 +1,111 @@
+"""근무 리포트 엔진(WorkReportEngine)과 report.py: 기간별 합산, 초과 근무, 자정 넘김, 휴식 날짜, 워커 분할"""
+import asyncio
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import attendance
+import bot
+import report
+
+def epoch(*args):
+    return bot.to_epoch(datetime(*args))
+
+# 사용자 10: 10월 13일(월) 10시간, 14일(화) 6시간 + 22시~다음 날 2시 근무, 20일(월) 9시간
+# 사용자 11: 10월 13일 4시간
+SESSIONS = [
+    (1, 10, 'kim', '2025-10-13', epoch(2025, 10, 13, 8), epoch(2025, 10, 13, 18), 36000, 0),
+    (1, 10, 'kim', '2025-10-14', epoch(2025, 10, 14, 9), epoch(2025, 10, 14, 15), 21600, 600),
+    (1, 10, 'kim', '2025-10-14', epoch(2025, 10, 14, 22), epoch(2025, 10, 15, 2), 14400, 0),
+    (1, 10, 'kim', '2025-10-20', epoch(2025, 10, 20, 9), epoch(2025, 10, 20, 18), 32400, 0),
+    (1, 11, 'lee', '2025-10-13', epoch(2025, 10, 13, 9), epoch(2025, 10, 13, 13), 14400, 0),
+]
+HOURS_8 = 8 * 3600
+
+def engine_of(sessions=SESSIONS, breaks=(), day_range=None):
+    return attendance.aggregate_work_reports([('work_history', list(sessions)), ('break_history', list(breaks))],
+                                             day_range)
+
+def test_weekly_totals_and_overtime():
+    rows = engine_of().reports('week', HOURS_8)
+    assert [(row['period'], row['username']) for row in rows] == [
+        ('2025-W42', 'kim'), ('2025-W42', 'lee'), ('2025-W43', 'kim')]
+    kim = rows[0]
+    assert (kim['work_seconds'], kim['sessions'], kim['days']) == (72000, 3, 2)
+    assert kim['avg_day_seconds'] == 36000
+    # 13일 2시간, 14일(두 세션 합 10시간) 2시간 초과
+    assert (kim['overtime_seconds'], kim['overtime_days']) == (4 * 3600, 2)
+    assert kim['overnight_sessions'] == 1
+    assert kim['weekday_avg_seconds'][:3] == [36000, 36000, 0]
+
+def test_monthly_sorted_by_work_and_daily_periods():
+    month = engine_of().reports('month', HOURS_8)
+    assert [(row['username'], row['work_seconds']) for row in month] == [('kim', 104400), ('lee', 14400)]
+    days = engine_of().reports('day', HOURS_8)
+    assert [(row['period'], row['username']) for row in days] == [
+        ('2025-10-13', 'kim'), ('2025-10-13', 'lee'), ('2025-10-14', 'kim'), ('2025-10-20', 'kim')]
+
+def test_daily_summary_rows_match_sessions():
+    """일별 집계 입력도 같은 근무 시간, 일수, 초과 근무 (세션 시각이 없어 자정 넘김은 0)"""
+    summary = {}
+    for guild_id, user_id, username, day, _, _, work, breaks in SESSIONS:
+        values = summary.setdefault((guild_id, user_id, username, day), [0, 0, 0])
+        values[0] += work
+        values[1] += breaks
+        values[2] += 1
+    rows = [(*key, *values) for key, values in summary.items()]
+    from_days = attendance.aggregate_work_reports([('daily_work_summary', rows)]).reports('week', HOURS_8)
+    from_sessions = engine_of().reports('week', HOURS_8)
+    for row in from_sessions:
+        row['overnight_sessions'] = 0
+    assert from_days == from_sessions
+
+def test_breaks_counted_on_guild_local_day():
+    bot.guild_zones[1] = ZoneInfo('Asia/Seoul')
+    # UTC 10월 12일 15:30 = 서울 13일 00:30 (범위 안), UTC 10월 12일 14:30 = 서울 12일 23:30 (범위 밖)
+    inside = int(datetime(2025, 10, 12, 15, 30, tzinfo=timezone.utc).timestamp())
+    breaks = [(1, 11, inside), (1, 11, inside - 3600)]
+    rows = engine_of(breaks=breaks, day_range=('2025-10-13', '2025-10-31')).reports('week', HOURS_8)
+    assert {row['username']: row['breaks'] for row in rows if row['period'] == '2025-W42'} == {'kim': 0, 'lee': 1}
+
+def test_breaks_without_work_are_not_reported():
+    rows = engine_of(sessions=[], breaks=[(1, 12, epoch(2025, 10, 13, 12))]).reports('week', HOURS_8)
+    assert rows == []
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / 'work_records.db')
+
+    async def scenario():
+        storage = bot.Database(path)
+        storage.start()
+        try:
+            await storage.migrate()
+            await storage.run(lambda tx: tx.upsert_users([(1, 10, 'kim'), (1, 11, 'lee')]))
+            await storage.run(lambda tx: tx.insert_history([(g, u, d, s, e, w, b) for g, u, _, d, s, e, w, b in SESSIONS]))
+            await storage.run(lambda tx: tx.insert_breaks([(1, 10, '커피', epoch(2025, 10, 14, 12),
+                                                            epoch(2025, 10, 14, 12, 10), 600)]))
+        finally:
+            await storage.close()
+
+    asyncio.run(scenario())
+    return path
+
+def test_worker_processes_match_single_pass(database, tmp_path):
+    args = (database, date(2025, 10, 1), date(2025, 10, 31), None)
+    single = attendance.build_work_reports(*args, workers=1, archive_dir=str(tmp_path / 'archive'))
+    split = attendance.build_work_reports(*args, workers=2, archive_dir=str(tmp_path / 'archive'))
+    for period in attendance.REPORT_PERIODS:
+        assert split.reports(period, HOURS_8) == single.reports(period, HOURS_8)
+    assert single.reports('month', HOURS_8)[0]['breaks'] == 1
+
+def test_cli_errors_go_to_stderr(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        report.main(['--start', '2025-10-10', '--end', '2025-10-01'])
+    assert exit_info.value.code == 2
+    assert '시작일이 종료일보다 늦습니다' in capsys.readouterr().err
+
+    assert report.main(['--db', str(tmp_path / 'missing.db')]) == 1
+    captured = capsys.readouterr()
+    assert captured.out == '' and captured.err.startswith('❌')
@@ -0,0 +1,127 @@
+"""JobScheduler.due()/run_pending(): 처음 보는 작업, 밀린 회차 따라잡기, 실패와 미처리 회차"""
+import asyncio
+from datetime import datetime, timezone, time as dt_time
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import bot
+
+class ProbeJob(bot.ScheduledJob):
+    """실행된 회차를 기록하는 작업 (skip에 있는 길드는 처리하지 않은 것으로 돌려줌)"""
+    name = 'probe'
+
+    def __init__(self, skip=(), fail=False):
+        self.skip = set(skip)
+        self.fail = fail
+        self.executed = []
+        self.completed = []
+        self.rolled_back = []
+
+    def execute(self, tx, runs, state):
+        self.executed.append(list(runs))
+        if self.fail:
+            raise RuntimeError('boom')
+        return len(runs)
+
+    def handled(self, runs, state):
+        return [(guild_id, period) for guild_id, period in runs if guild_id not in self.skip]
+
+    async def complete(self, runs, state, result):
+        self.completed.append(result)
+
+    def rollback(self, runs, state):
+        self.rolled_back.append(list(runs))
+
+class WeeklyProbeJob(ProbeJob):
+    name = 'weekly_probe'
+    weekday = 0
+    after = ('probe',)
+
+def test_first_pass_only_records_current_period(memory):
+    bot.report_channels.update({1: {10}})
+    job = ProbeJob()
+    scheduler = bot.JobScheduler(memory, [job])
+
+    asyncio.run(scheduler.run_pending(datetime(2025, 10, 13, 12, 0)))
+    assert job.executed == []
+    assert scheduler.last_runs == {('probe', 1): '2025-10-13'}
+
+    # 같은 회차 안에서는 다시 실행하지 않음
+    asyncio.run(scheduler.run_pending(datetime(2025, 10, 13, 23, 59)))
+    assert job.executed == []
+
+def test_missed_periods_run_once_with_latest(memory):
+    bot.report_channels.update({1: {10}, 2: {20}})
+    job, weekly = ProbeJob(), WeeklyProbeJob()
+    scheduler = bot.JobScheduler(memory, [weekly, job])
+    assert scheduler.jobs == [job, weekly]
+
+    asyncio.run(scheduler.run_pending(datetime(2025, 10, 8, 12, 0)))
+    # 봇이 꺼져 있던 사이 여러 날(과 한 주)이 지나도 가장 최근 회차로 한 번만 실행
+    asyncio.run(scheduler.run_pending(datetime(2025, 10, 14, 9, 0)))
+    assert job.executed == [[(1, '2025-10-14'), (2, '2025-10-14')]]
+    assert weekly.executed == [[(1, '2025-10-13'), (2, '2025-10-13')]]
+    assert job.completed == [2]
+
+    # 실행 기록은 저장소에도 남아 다시 불러온 스케줄러도 같은 회차를 실행하지 않음
+    restarted = bot.JobScheduler(memory, [ProbeJob(), WeeklyProbeJob()])
+    asyncio.run(restarted.load())
+    assert restarted.last_runs == scheduler.last_runs
+    assert restarted.due(datetime(2025, 10, 14, 23, 0)) == ({}, [])
+
+def test_failed_pass_is_retried(memory):
+    bot.report_channels.update({1: {10}})
+    job = ProbeJob(fail=True)
+    scheduler = bot.JobScheduler(memory, [job])
+    asyncio.run(scheduler.run_pending(datetime(2025, 10, 13, 12, 0)))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scheduler.run_pending(datetime(2025, 10, 14, 0, 1)))
+    assert job.rolled_back == [[(1, '2025-10-14')]]
+    assert scheduler.last_runs == {('probe', 1): '2025-10-13'}
+
+    job.fail = False
+    asyncio.run(scheduler.run_pending(datetime(2025, 10, 14, 0, 2)))
+    assert job.executed[-1] == [(1, '2025-10-14')]
+    assert scheduler.last_runs == {('probe', 1): '2025-10-14'}
+
+def test_unhandled_runs_are_not_recorded(memory):
+    bot.report_channels.update({1: {10}, 2: {20}})
+    job = ProbeJob(skip={2})
+    scheduler = bot.JobScheduler(memory, [job])
+    asyncio.run(scheduler.run_pending(datetime(2025, 10, 13, 12, 0)))
+    asyncio.run(scheduler.run_pending(datetime(2025, 10, 14, 0, 1)))
+
+    runs = asyncio.run(memory.run(lambda tx: sorted((row['guild_id'], row['period']) for row in tx.job_runs())))
+    assert runs == [(1, '2025-10-14'), (2, '2025-10-13')]
+    due, _ = scheduler.due(datetime(2025, 10, 14, 0, 2))
+    assert due == {job: [(2, '2025-10-14')]}
+
+def test_due_uses_guild_time_zone(memory):
+    bot.report_channels.update({1: {10}, 2: {20}})
+    bot.guild_zones.update({1: ZoneInfo('Asia/Seoul'), 2: ZoneInfo('Pacific/Honolulu')})
+    job = ProbeJob()
+    scheduler = bot.JobScheduler(memory, [job])
+    scheduler.last_runs = {('probe', 1): '2025-10-12', ('probe', 2): '2025-10-11'}
+
+    # UTC 10월 12일 16:30 = 서울 13일 01:30, 호놀룰루 12일 06:30
+    now = datetime(2025, 10, 12, 16, 30, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    due, unseen = scheduler.due(now)
+    assert unseen == []
+    assert sorted(due[job]) == [(1, '2025-10-13'), (2, '2025-10-12')]
+
+def test_due_skips_unassigned_legacy_sessions(memory, monkeypatch):
+    monkeypatch.setattr(bot, 'sessions', [bot.WorkSession(0, 42, 'old', datetime(2025, 10, 13, 9, 0)),
+                                          bot.WorkSession(3, 7, 'new', datetime(2025, 10, 13, 9, 0))])
+    scheduler = bot.JobScheduler(memory, [ProbeJob()])
+    _, unseen = scheduler.due(datetime(2025, 10, 13, 12, 0))
+    assert unseen == [('probe', 3, '2025-10-13')]
+
+def test_period_before_run_time_is_previous_day():
+    job = ProbeJob()
+    job.at = dt_time(4, 0)
+    assert job.period(datetime(2025, 10, 13, 3, 59)) == '2025-10-12'
+    assert job.period(datetime(2025, 10, 13, 4, 0)) == '2025-10-13'
+    # 주간 작업은 가장 최근 월요일
+    assert WeeklyProbeJob().period(datetime(2025, 10, 19, 23, 0)) == '2025-10-13'
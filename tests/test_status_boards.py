@@ -0,0 +1,83 @@
+"""실시간 현황판(StatusBoards): 변경 모아서 한 번 수정, 최소 수정 간격, 삭제된 메시지 처리"""
+import asyncio
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+import bot
+
+class FakeMessage:
+    def __init__(self, client, message_id):
+        self.client = client
+        self.id = message_id
+
+    async def edit(self, **kwargs):
+        if self.client.missing:
+            raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), 'Unknown Message')
+        self.client.edits.append((time.monotonic(), kwargs['embeds']))
+
+    async def delete(self):
+        self.client.deleted.append(self.id)
+
+class FakeClient:
+    """현황판 메시지 수정 시각과 내용을 기록하는 클라이언트"""
+
+    def __init__(self):
+        self.edits = []
+        self.deleted = []
+        self.missing = False
+
+    def get_partial_messageable(self, channel_id):
+        return SimpleNamespace(get_partial_message=lambda message_id: FakeMessage(self, message_id))
+
+@pytest.fixture
+def boards(memory, monkeypatch):
+    """길드 1에 현황판이 켜져 있고 출근 상태 변경이 현황판에 전달되는 상태"""
+    store = bot.SessionStore(memory)
+    monkeypatch.setattr(bot, 'sessions', store)
+    boards = bot.StatusBoards(FakeClient(), memory, debounce=0.02, min_interval=0.1)
+    boards.boards[1] = (100, 200)
+    store.listeners.append(boards.mark)
+    return boards
+
+def test_changes_are_merged_into_one_edit(boards):
+    async def scenario():
+        for user_id in range(10, 15):
+            await bot.sessions.start(1, user_id, f'user{user_id}', datetime.now())
+        boards.mark(2)  # 현황판이 없는 길드는 무시
+        assert list(boards._tasks) == [1]
+        await boards._tasks[1]
+
+    asyncio.run(scenario())
+    assert boards.counters == {'changes': 5, 'edits': 1, 'failed': 0}
+    (_, embeds), = boards.client.edits
+    assert [embed.title for embed in embeds] == ['🟢 근무 중 (5명)']
+
+def test_edits_respect_min_interval(boards):
+    """수정 중이나 직후에 들어온 변경은 min_interval이 지난 뒤 한 번 더 반영"""
+    async def scenario():
+        boards.mark(1)
+        await asyncio.sleep(0.03)
+        boards.mark(1)
+        boards.mark(1)
+        await boards._tasks[1]
+
+    asyncio.run(scenario())
+    (first, _), (second, _) = boards.client.edits
+    assert second - first >= boards.min_interval
+    assert boards.counters['edits'] == 2 and 1 not in boards._tasks
+
+def test_deleted_message_disables_board(boards, memory):
+    asyncio.run(memory.run(lambda tx: tx.save_status_board(1, 100, 200)))
+    boards.client.missing = True
+
+    async def scenario():
+        boards.mark(1)
+        await boards._tasks[1]
+
+    asyncio.run(scenario())
+    assert boards.boards == {} and boards.client.deleted == [200]
+    assert asyncio.run(memory.run(lambda tx: tx.status_boards())) == []
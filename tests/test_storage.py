@@ -0,0 +1,123 @@
+"""저장소 계약: 어느 저장소든 같은 StorageTransaction 동작 (트랜잭션 원자성, 저널 압축/정리 규칙)
+
+PostgreSQL은 DATABASE_URL이 설정되어 있을 때만 실행하며, 테스트마다 임시 스키마를 만들고 지웁니다.
+"""
+import asyncio
+import copy
+import os
+import uuid
+from datetime import date
+
+import pytest
+
+import bot
+
+@pytest.fixture(params=['memory', 'sqlite', 'postgres'])
+def storage(request, tmp_path):
+    """같은 테스트를 메모리, SQLite, PostgreSQL 저장소에서 실행"""
+    schema = None
+    if request.param == 'memory':
+        storage = bot.MemoryStorage()
+    elif request.param == 'sqlite':
+        storage = bot.Database(str(tmp_path / 'work_records.db'))
+    else:
+        url = os.getenv('DATABASE_URL')
+        if not url:
+            pytest.skip('DATABASE_URL이 없어 PostgreSQL 저장소는 건너뜀')
+        psycopg = pytest.importorskip('psycopg')
+        pytest.importorskip('psycopg_pool')
+        from psycopg.conninfo import make_conninfo
+        schema = f'attendance_test_{uuid.uuid4().hex[:12]}'
+        with psycopg.connect(url, autocommit=True) as conn:
+            conn.execute(f'CREATE SCHEMA {schema}')
+        storage = bot.PostgresStorage(make_conninfo(url, options=f'-c search_path={schema}'), pool_size=2)
+    storage.start()
+    asyncio.run(storage.migrate())
+    yield storage
+    asyncio.run(storage.close())
+    if schema:
+        with psycopg.connect(url, autocommit=True) as conn:
+            conn.execute(f'DROP SCHEMA {schema} CASCADE')
+
+def run(storage, func):
+    return asyncio.run(storage.run(func))
+
+def test_migrate_is_idempotent(storage):
+    assert asyncio.run(storage.migrate()) == []
+
+def test_failed_transaction_leaves_no_trace(storage):
+    run(storage, lambda tx: tx.set_meta('kept', '1'))
+
+    def write_then_fail(tx):
+        tx.set_meta('kept', '2')
+        tx.set_meta('new', 'x')
+        tx.upsert_users([(1, 10, 'kim')])
+        tx.append_events([(1, 10, bot.EVENT_START, 100, None)])
+        tx.insert_history([(1, 10, '2025-10-13', 100, 3700, 3600, 0)])
+        tx.insert_breaks([(1, 10, '커피', 200, 300, 100)])
+        tx.save_status_board(1, 2, 3)
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        run(storage, write_then_fail)
+
+    def read(tx):
+        snapshot, events = tx.load_journal()
+        return (tx.get_meta('kept'), tx.get_meta('new'), list(snapshot), list(events),
+                list(tx.daily_report_rows(1, date(2025, 10, 1), date(2025, 10, 31))),
+                list(tx.history_page('근무', 1, 10, date(2025, 10, 1), date(2025, 10, 31), 10)[0]),
+                list(tx.status_boards()))
+    assert run(storage, read) == ('1', None, [], [], [], [], [])
+
+def test_trim_keeps_last_folded_event(storage):
+    """id < journal_snapshot인 이벤트만 지우고, 새 이벤트 id는 스냅샷보다 커야 함"""
+    run(storage, lambda tx: tx.upsert_users([(1, 10, 'kim')]))
+    run(storage, lambda tx: tx.append_events([(1, 10, bot.EVENT_START, 100, None),
+                                              (1, 10, bot.EVENT_BREAK, 200, '커피'),
+                                              (1, 10, bot.EVENT_RETURN, 300, None)]))
+    assert run(storage, lambda tx: tx.compact_journal()) == 3
+    assert run(storage, lambda tx: tx.trim_journal()) == 2
+    assert run(storage, lambda tx: tx.trim_journal()) == 0
+
+    run(storage, lambda tx: tx.append_events([(1, 10, bot.EVENT_BREAK, 400, '점심')]))
+    snapshot, events = run(storage, lambda tx: tx.load_journal())
+    assert [(row['start_time'], row['break_time'], row['total_break_seconds']) for row in snapshot] == [(100, None, 100)]
+    assert [(event['kind'], event['detail']) for event in events] == [(bot.EVENT_BREAK, '점심')]
+
+    # 다음 압축 때는 남겨 둔 이벤트가 지워지고 방금 반영한 이벤트가 남음
+    assert run(storage, lambda tx: tx.compact_journal(trim=True)) == 1
+    snapshot, events = run(storage, lambda tx: tx.load_journal())
+    assert events == [] and snapshot[0]['break_reason'] == '점심'
+
+MEMORY_TABLES = ('users', 'current_work_status', 'attendance_events', 'work_history', 'break_history',
+                 'daily_work_summary', 'weekly_work_summary', 'bot_meta', 'job_runs', 'guild_settings',
+                 'status_boards', 'last_ids')
+
+def test_memory_rollback_restores_every_table(memory):
+    """MemoryTransaction의 되돌리기 기록: 덮어쓰기, 삭제, 목록 추가, 저널 정리가 모두 원래대로"""
+    def seed(tx):
+        tx.upsert_users([(1, 10, 'kim')])
+        tx.append_events([(1, 10, bot.EVENT_START, 100, None), (1, 10, bot.EVENT_BREAK, 200, '커피')])
+        tx.compact_journal()
+        tx.append_events([(1, 10, bot.EVENT_RETURN, 300, None)])
+        tx.insert_history([(1, 10, '2025-10-13', 100, 3700, 3600, 0)])
+        tx.save_status_board(1, 2, 3)
+        tx.record_job_runs([('auto_checkout', 1, '2025-10-13')], 400)
+    run(memory, seed)
+    before = {name: copy.deepcopy(getattr(memory, name)) for name in MEMORY_TABLES}
+
+    def change_everything(tx):
+        tx.upsert_users([(1, 10, 'kim2'), (1, 11, 'lee')])
+        tx.compact_journal(trim=True)
+        tx.append_events([(1, 10, bot.EVENT_FINISH, 500, '2025-10-13')])
+        tx.insert_history([(1, 10, '2025-10-13', 500, 900, 400, 0), (1, 11, '2025-10-14', 0, 60, 60, 0)])
+        tx.insert_breaks([(2, 20, '산책', 0, 60, 60)])
+        tx.rebuild_rollups(1)
+        tx.delete_status_board(1)
+        tx.record_job_runs([('auto_checkout', 1, '2025-10-14')], 500)
+        tx.set_guild_timezone(1, 'Asia/Seoul')
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        run(memory, change_everything)
+    assert {name: getattr(memory, name) for name in MEMORY_TABLES} == before